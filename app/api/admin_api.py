@@ -0,0 +1,96 @@
+"""
+Admin API - catalog operations (hot reload, listing upserts/deletes, bulk feeds)
+"""
+
+import hmac
+import io
+import os
+import tempfile
+from typing import Optional
+
+from fastapi import APIRouter, Body, Header, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from app.rag.ingest import InvalidRecord, feed_format, ingest, validate_property
+from app.rag.retriever import apply_catalog_delta, get_property_by_id, reload_catalog, get_catalog_info
+
+router = APIRouter()
+
+# Bulk feed bytes kept in memory before spooling to a temp file
+_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+def _check_admin_token(token: Optional[str]):
+    """Admin endpoints are disabled unless ADMIN_API_TOKEN is set."""
+    expected = os.getenv("ADMIN_API_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=503, detail="Admin API not configured (set ADMIN_API_TOKEN)")
+    # Constant-time comparison so response timing doesn't leak the token
+    if not token or not hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.get("/catalog")
+def catalog_info(x_admin_token: Optional[str] = Header(None)):
+    """Version and size of the catalog currently being served."""
+    _check_admin_token(x_admin_token)
+    return get_catalog_info()
+
+
+@router.post("/catalog/reload")
+def catalog_reload(force: bool = True, x_admin_token: Optional[str] = Header(None)):
+    """Re-read properties.json and atomically swap in the new index."""
+    _check_admin_token(x_admin_token)
+    try:
+        info = reload_catalog(force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Catalog reload failed: {str(e)}")
+    return {"success": True, **info}
+
+
+@router.put("/properties/{property_id}")
+def upsert_property(property_id: str, record: dict = Body(...), x_admin_token: Optional[str] = Header(None)):
+    """Create or replace one listing in the live index (no full rebuild)."""
+    _check_admin_token(x_admin_token)
+    try:
+        clean = validate_property({**record, "id": property_id})
+    except InvalidRecord as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"success": True, "property": clean, **apply_catalog_delta(upserts=[clean])}
+
+
+@router.delete("/properties/{property_id}")
+def delete_property(property_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Remove one listing from the live index."""
+    _check_admin_token(x_admin_token)
+    if get_property_by_id(property_id) is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return {"success": True, **apply_catalog_delta(deletes=[property_id])}
+
+
+@router.post("/properties:bulk")
+async def bulk_properties(request: Request, format: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    """Stream an NDJSON or CSV feed (format= or Content-Type) into the live index.
+
+    Rows are validated one by one; valid rows are applied in batches and
+    invalid ones reported with their line numbers.
+    """
+    _check_admin_token(x_admin_token)
+    fmt = format or feed_format(None, request.headers.get("content-type"))
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    # PERFORMANCE: the body is spooled (to disk past _SPOOL_BYTES), never held whole in memory
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        lines = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        try:
+            report = await run_in_threadpool(ingest, lines, fmt, apply_catalog_delta)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Feed must be UTF-8")
+        finally:
+            lines.detach()
+
+    return {"success": report["invalid"] == 0, **report, **get_catalog_info()}
@@ -2,22 +2,61 @@
 Simple Property Search API for voice bot
 """
 
-from fastapi import APIRouter
-from typing import Optional
-from app.rag.retriever import retrieve_properties
+import hashlib
+import os
+import time
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.rag.fuzzy import MIN_SIMILARITY
+from app.rag.pagination import InvalidCursor
+from app.response.response_builder import extend_json, render_cache_stats, rendered, splice_json
+from app.llm.response_cache import response_cache_stats
+from app.rag.retriever import (
+    cursor_skipping,
+    relaxed_search_properties,
+    batch_search_properties,
+    faceted_search_properties,
+    keyword_search_properties,
+    search_properties_page,
+    semantic_search_properties,
+    get_cache_stats,
+    get_catalog_tag,
+    get_catalog_version,
+    get_property_by_id,
+    get_similar_properties,
+    resolve_location,
+)
 
 router = APIRouter()
 
+# Upper bound on filter sets per batch request
+MAX_BATCH_QUERIES = 500
 
-@router.get("/search")
-def search_properties(
-    location: Optional[str] = None,
-    bhk: Optional[str] = None,
-    budget: Optional[str] = None
-):
-    """Search properties based on filters."""
+# Conditional GET: every /api/properties GET below depends only on the catalog and its query
+PROPERTY_PATH_PREFIX = "/api/properties/"
+UNCACHED_PATHS = {"/api/properties/cache-stats"}
 
-    # Parse budget to number
+# Seconds a client may reuse a response without revalidating (0 = always revalidate)
+PROPERTY_CACHE_MAX_AGE = int(os.getenv("PROPERTY_CACHE_MAX_AGE", "0"))
+
+
+class BatchSearchQuery(BaseModel):
+    location: Optional[str] = None
+    bhk: Optional[str] = None
+    budget: Optional[str] = None          # "1.5 cr", "80 lakh" - same as /search
+    max_price: Optional[int] = None       # raw rupees, takes precedence over budget
+    property_type: Optional[str] = None
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchSearchQuery] = Field(..., max_length=MAX_BATCH_QUERIES)
+    limit: int = Field(5, ge=1, le=50)
+
+
+def parse_budget(budget: Optional[str]) -> Optional[int]:
+    """Parse a spoken/typed budget ("1.5 cr", "80 lakh") into rupees."""
     max_price = None
     if budget:
         budget_lower = budget.lower()
@@ -30,46 +69,259 @@ def search_properties(
                 max_price = int(num * 100000)
         except:
             pass
+    return max_price
+
+
+def _json_response(payload: dict, **arrays) -> Response:
+    """payload with pre-encoded card arrays spliced in (see response_builder.splice_json)."""
+    return Response(content=splice_json(payload, **arrays), media_type="application/json")
 
-    # Get properties from retriever
-    properties = retrieve_properties(
+
+def property_etag(request: Request, catalog_tag: str) -> str:
+    """Strong ETag for a GET: catalog tag + path + query params (order-insensitive)."""
+    params = sorted((key, value.strip()) for key, value in request.query_params.multi_items())
+    digest = hashlib.sha1(repr((catalog_tag, request.url.path, params)).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for GET)."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def conditional_get(request: Request, call_next):
+    """HTTP middleware: ETag + Cache-Control on property GETs, 304 when the client's copy is current.
+
+    PERFORMANCE: the ETag only needs the catalog tag and the URL, so a
+    revalidation is answered before any search runs or JSON is encoded.
+    """
+    path = request.url.path
+    if request.method != "GET" or not path.startswith(PROPERTY_PATH_PREFIX):
+        return await call_next(request)
+    if path in UNCACHED_PATHS:
+        response = await call_next(request)
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    etag = property_etag(request, get_catalog_tag())
+    cache_control = f"public, max-age={PROPERTY_CACHE_MAX_AGE}" if PROPERTY_CACHE_MAX_AGE > 0 else "no-cache"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = cache_control
+    return response
+
+
+@router.get("/search")
+def search_properties(
+    location: Optional[str] = None,
+    bhk: Optional[str] = None,
+    budget: Optional[str] = None,
+    q: Optional[str] = None,
+    possession: Optional[List[str]] = Query(None),
+    builder: Optional[List[str]] = Query(None),
+    property_type: Optional[List[str]] = Query(None, alias="type"),
+    facing: Optional[List[str]] = Query(None),
+    amenities: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = None,
+    page_size: int = Query(5, ge=1, le=50)
+):
+    """Search properties based on filters, optionally ranked by a free-text query (q).
+
+    q is matched by keywords (BM25 over descriptions, amenities and landmarks)
+    and falls back to semantic search when no listing contains its terms.
+
+    Facet params may repeat: values of one facet are OR-ed (possession=Ready to Move
+    &possession=Dec 2025), facets are AND-ed, and every listed amenity is required.
+    The first page holds the best-ranked matches; the response carries facet
+    counts for the whole match set and, when more results exist, a next_cursor
+    to pass back as cursor for the next page (later pages are in price order
+    and leave out what the first page showed).
+    With no match the query is relaxed (relaxation names the step, total counts
+    its matches); facets are only given up when nothing else matches, and are
+    then listed in dropped_facets.
+    """
+    catalog_version = get_catalog_version()
+    facet_filters = {
+        "possession": possession,
+        "builder": builder,
+        "type": property_type,
+        "facing": facing,
+        "amenities": amenities,
+    }
+
+    # Parse budget to number
+    max_price = parse_budget(budget)
+
+    # Get properties (plus facet counts) from retriever
+    faceted = faceted_search_properties(
         location=location,
         max_price=max_price,
-        bhk=bhk
+        bhk=bhk,
+        facets=facet_filters
     )
+    next_cursor = None
+    if q:
+        # PERFORMANCE: BM25 keyword index first; the embeddings API only for queries
+        # that share no term with any listing ("somewhere peaceful")
+        properties = keyword_search_properties(
+            q,
+            location=location,
+            max_price=max_price,
+            bhk=bhk,
+            facets=facet_filters
+        ) or semantic_search_properties(
+            q,
+            location=location,
+            max_price=max_price,
+            bhk=bhk,
+            facets=facet_filters
+        )
+    elif cursor:
+        try:
+            page = search_properties_page(
+                location=location,
+                max_price=max_price,
+                bhk=bhk,
+                facets=facet_filters,
+                cursor=cursor,
+                page_size=page_size
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        properties = page["results"]
+        next_cursor = page["next_cursor"]
+    else:
+        # First page: best matches by relevance (app/rag/ranking.py); the pages after it
+        # continue in (price, id) order and leave these out
+        relaxed = relaxed_search_properties(
+            location=location,
+            max_price=max_price,
+            bhk=bhk,
+            facets=facet_filters,
+            k=page_size
+        )
+        properties = relaxed["results"] if relaxed["relaxation"] is None else ()
+        if properties and relaxed["total"] > len(properties):
+            next_cursor = cursor_skipping(properties)
 
-    print(f"🏠 Property search: location={location}, bhk={bhk}, budget={budget} → {len(properties)} found")
+    print(f"🏠 Property search (catalog v{catalog_version}): location={location}, bhk={bhk}, budget={budget} → {len(properties)} found")
 
-    # If no properties found, return Raymond Realty as fallback
+    # If no properties found, loosen the query step by step (first page only)
+    total = faceted["total"]
     is_fallback = False
-    if not properties:
-        is_fallback = True
-        all_props = retrieve_properties()
-        properties = [p for p in all_props if 'raymond' in p.get('builder', '').lower()][:5]
-
-        if not properties:
-            properties = all_props[:5]
-
-    # Format response
-    cards = []
-    for p in properties[:5]:
-        cards.append({
-            "name": p.get("name", ""),
-            "price": p.get("price", 0),
-            "bhk": p.get("bhk", ""),
-            "type": p.get("type", "Apartment"),
-            "location": p.get("location", ""),
-            "area_sqft": p.get("area_sqft", 0),
-            "possession": p.get("possession", ""),
-            "builder": p.get("builder", ""),
-            "property_url": p.get("property_url", ""),
-            "virtual_tour_url": p.get("virtual_tour_url", ""),
-            "contact_number": p.get("contact_number", "")
-        })
-
-    return {
+    relaxation = None
+    dropped_facets = []
+    if not properties and not cursor:
+        # Same arguments as the first page above, so this is a query cache hit there
+        relaxed = relaxed_search_properties(
+            location=location,
+            max_price=max_price,
+            bhk=bhk,
+            facets=facet_filters,
+            k=page_size
+        )
+        properties = relaxed["results"]
+        if q and properties:
+            # Keep ranking by the free-text query within the relaxed filters
+            filters = relaxed["filters"]
+            properties = keyword_search_properties(
+                q,
+                location=filters["location"],
+                max_price=filters["max_price"],
+                bhk=filters["bhk"],
+                facets=filters["facets"]
+            ) or properties
+        relaxation = relaxed["relaxation"]
+        dropped_facets = list(relaxed["dropped_facets"])
+        total = relaxed["total"]
+        is_fallback = bool(properties)
+
+    # Format response (PERFORMANCE: cards come pre-encoded from the render cache)
+    cards = [rendered(p).api_card_json for p in properties[:page_size]]
+
+    return _json_response({
         "success": True,
         "count": len(cards),
+        "total": total,
         "is_fallback": is_fallback,
-        "properties": cards
-    }
+        "relaxation": relaxation,
+        "dropped_facets": dropped_facets,
+        "catalog_version": catalog_version,
+        "facets": faceted["facets"],
+        "next_cursor": next_cursor,
+    }, properties=cards)
+
+
+@router.post("/search:batch")
+def search_properties_batch(req: BatchSearchRequest):
+    """Match many filter sets (e.g. a CRM lead list) against the catalog in one call.
+
+    All queries see the same catalog version and are evaluated together, so
+    repeated locations/BHKs are resolved once. No Raymond fallback is applied:
+    an empty result means no inventory matches that lead.
+    """
+    start = time.time()
+    queries = [
+        {
+            "location": q.location,
+            "max_price": q.max_price or parse_budget(q.budget),
+            "bhk": q.bhk,
+            "property_type": q.property_type,
+        }
+        for q in req.queries
+    ]
+    found = batch_search_properties(queries, req.limit)
+    print(f"🏠 Batch property search: {len(queries)} queries in {(time.time() - start)*1000:.0f}ms")
+
+    results = [
+        splice_json(
+            {"total": f["total"], "count": len(f["results"])},
+            properties=[rendered(p).api_card_json for p in f["results"]],
+        )
+        for f in found
+    ]
+    return _json_response({
+        "success": True,
+        "catalog_version": get_catalog_version(),
+        "count": len(found),
+    }, results=results)
+
+
+@router.get("/{property_id}/similar")
+def similar_properties(property_id: str, limit: int = Query(5, ge=1, le=10)):
+    """Listings most like this one (price, size, BHK, locality, amenities), precomputed per catalog version."""
+    if get_property_by_id(property_id) is None:
+        raise HTTPException(status_code=404, detail=f"Property not found: {property_id}")
+
+    similar = get_similar_properties(property_id, limit)
+    return _json_response({
+        "success": True,
+        "property_id": property_id,
+        "catalog_version": get_catalog_version(),
+        "count": len(similar),
+    }, properties=[
+        extend_json(rendered(p).api_card_json, similarity=round(float(score), 4))
+        for p, score in similar
+    ])
+
+
+@router.get("/locations/resolve")
+def resolve_location_name(q: str, limit: int = 5, min_score: float = Query(MIN_SIMILARITY, ge=0.0, le=1.0)):
+    """Closest known places for a noisy location string, with similarity scores.
+
+    Candidates scoring below min_score are dropped; an unknown place returns none.
+    """
+    return {"query": q, "min_score": min_score, "candidates": resolve_location(q, limit, min_score)}
+
+
+@router.get("/cache-stats")
+def cache_stats():
+    """Query, card render and LLM response cache counters (hits, misses, evictions) for tuning."""
+    return {**get_cache_stats(), "render": render_cache_stats(), "llm": response_cache_stats()}
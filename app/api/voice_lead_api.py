@@ -2,10 +2,10 @@
 Voice Lead Capture API - Extract user info from ElevenLabs conversation and save to Salesforce
 """
 
-import re
 from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import List
+from app.conversation.slots import extract_lead_info
 
 router = APIRouter()
 
@@ -20,83 +20,11 @@ class VoiceLeadRequest(BaseModel):
     transcript: List[TranscriptMessage]
 
 
-# Location mappings
-LOCATIONS = {
-    'bangalore': ['bangalore', 'bengaluru', 'banglore', 'blr'],
-    'thane': ['thane', 'thaney'],
-    'mumbai': ['mumbai', 'bombay'],
-    'whitefield': ['whitefield'],
-    'electronic city': ['electronic city'],
-    'sarjapur': ['sarjapur'],
-    'koramangala': ['koramangala'],
-    'indiranagar': ['indiranagar']
-}
-
-
 def extract_user_info(transcript: List[TranscriptMessage]) -> dict:
     """Extract user info from conversation transcript."""
-    info = {
-        "fullName": None,
-        "emailAddress": None,
-        "mobileNumber": None,
-        "city": None,
-        "budget": None,
-        "configuration": None
-    }
-
-    # Combine all user messages
+    # Combine all user messages; one compiled keyword pass (app/conversation/slots.py)
     user_text = " ".join([m.text for m in transcript if m.role == "user"])
-    user_lower = user_text.lower()
-
-    # Extract name
-    name_patterns = [
-        r"(?:my name is|i am|i'm|this is|call me)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
-        r"(?:name is)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
-    ]
-    for pattern in name_patterns:
-        match = re.search(pattern, user_text, re.IGNORECASE)
-        if match:
-            info["fullName"] = match.group(1).strip().title()
-            break
-
-    # Extract phone (Indian 10-digit)
-    phone_patterns = [
-        r'\b([6-9]\d{9})\b',
-        r'\+91[\s-]?(\d{10})',
-    ]
-    for pattern in phone_patterns:
-        match = re.search(pattern, user_text)
-        if match:
-            phone = re.sub(r'[\s-]', '', match.group(1))
-            if len(phone) == 10:
-                info["mobileNumber"] = phone
-                break
-
-    # Extract email
-    email_match = re.search(r'[\w.+-]+@[\w-]+\.[\w.-]+', user_text)
-    if email_match:
-        info["emailAddress"] = email_match.group(0).lower()
-
-    # Extract location
-    for city, aliases in LOCATIONS.items():
-        if any(alias in user_lower for alias in aliases):
-            info["city"] = city.title()
-            break
-
-    # Extract budget
-    cr_match = re.search(r'(\d+\.?\d*)\s*(?:crore|cr)', user_lower)
-    lakh_match = re.search(r'(\d+\.?\d*)\s*(?:lakh|lac)', user_lower)
-    if cr_match:
-        info["budget"] = f"{cr_match.group(1)} crore"
-    elif lakh_match:
-        info["budget"] = f"{lakh_match.group(1)} lakh"
-
-    # Extract BHK
-    bhk_match = re.search(r'(\d)\s*(?:bhk|bedroom)', user_lower)
-    if bhk_match:
-        info["configuration"] = f"{bhk_match.group(1)} BHK"
-
-    return info
+    return extract_lead_info(user_text)
 
 
 def save_to_salesforce(info: dict) -> dict:
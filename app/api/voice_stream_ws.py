@@ -8,6 +8,7 @@ from openai import OpenAI
 
 from app.conversation.manager import ConversationManager
 from app.speech.tts import text_to_speech_bytes, text_to_speech_stream
+from app.response.response_builder import cards_json, splice_json
 
 router = APIRouter()
 client = OpenAI()
@@ -47,7 +48,7 @@ async def voice_ws(ws: WebSocket):
 
     # Get or create conversation manager for this session
     if session_id not in ws_sessions:
-        ws_sessions[session_id] = {"cm": ConversationManager(), "language": None}
+        ws_sessions[session_id] = {"cm": ConversationManager(), "language": None, "previews": False}
     session = ws_sessions[session_id]
     cm = session["cm"]
     selected_language = session.get("language")
@@ -81,6 +82,12 @@ async def voice_ws(ws: WebSocket):
                                 "message": f"Unsupported language: {lang_code}. Supported: {list(SUPPORTED_LANGUAGES.keys())}"
                             })
                         continue
+                    # Opt in to early "properties_preview" cards (prefetched search results)
+                    # Format: {"type": "set_previews", "enabled": true}
+                    if msg_json.get("type") == "set_previews":
+                        session["previews"] = bool(msg_json.get("enabled"))
+                        await ws.send_json({"type": "previews_set", "enabled": session["previews"]})
+                        continue
                     # Handle get supported languages request
                     if msg_json.get("type") == "get_languages":
                         await ws.send_json({
@@ -101,7 +108,8 @@ async def voice_ws(ws: WebSocket):
                     turn_start = time.time()
 
                     # Process complete utterance (STT + LLM)
-                    response = await process_turn(pcm_buffer, cm, language=selected_language)
+                    response = await process_turn(pcm_buffer, cm, language=selected_language,
+                                                  previews=session["previews"])
                     pcm_buffer.clear()
 
                     llm_done = time.time()
@@ -114,6 +122,14 @@ async def voice_ws(ws: WebSocket):
                         "detected_language": response.get("detected_language")
                     })
 
+                    # Push prefetched cards early so the client can preload them (shown at the farewell);
+                    # only sent to clients that opted in with set_previews
+                    if response.get("prefetched_properties"):
+                        print(f"📤 Pushing {len(response['prefetched_properties'])} prefetched property cards")
+                        await ws.send_text(splice_json(
+                            {"type": "properties_preview"}, data=cards_json(response["prefetched_properties"])
+                        ).decode("utf-8"))
+
                     # Send response text
                     await ws.send_json({
                         "type": "response",
@@ -123,10 +139,10 @@ async def voice_ws(ws: WebSocket):
                     # Send property cards if available
                     if response.get("properties"):
                         print(f"📤 Sending {len(response['properties'])} property cards to client")
-                        await ws.send_json({
-                            "type": "properties",
-                            "data": response["properties"]
-                        })
+                        # PERFORMANCE: cards carry their JSON from the render cache
+                        await ws.send_text(splice_json(
+                            {"type": "properties"}, data=cards_json(response["properties"])
+                        ).decode("utf-8"))
 
                     # STREAMING TTS: Send audio chunks immediately as they arrive
                     if USE_STREAMING_TTS:
@@ -184,13 +200,14 @@ async def voice_ws(ws: WebSocket):
             del ws_sessions[session_id]
 
 
-async def process_turn(pcm_buffer: list, cm: ConversationManager, language: str = None) -> dict:
+async def process_turn(pcm_buffer: list, cm: ConversationManager, language: str = None, previews: bool = False) -> dict:
     """Process a complete voice turn: STT → LLM (TTS is handled separately for streaming)
 
     Args:
         pcm_buffer: List of audio chunks (float32)
         cm: ConversationManager instance
         language: Optional language code (None for auto-detect)
+        previews: Include cards of a finished background property search (client opted in)
     """
     stt_start = time.time()
 
@@ -245,6 +262,8 @@ async def process_turn(pcm_buffer: list, cm: ConversationManager, language: str
     assistant_text = result["text"]
     properties = result.get("properties", [])
     conversation_ended = result.get("conversation_ended", False)
+    # PERFORMANCE: cards the background search already has ready, before they are asked for
+    prefetched = None if properties or not previews else cm.ready_properties()
 
     llm_time = time.time() - llm_start
     print(f"⚡ LLM completed in {llm_time*1000:.0f}ms")
@@ -255,6 +274,7 @@ async def process_turn(pcm_buffer: list, cm: ConversationManager, language: str
         "user_text": user_text,
         "assistant_text": assistant_text,
         "properties": properties,
+        "prefetched_properties": prefetched,
         "conversation_ended": conversation_ended,
         "detected_language": detected_language
     }
@@ -0,0 +1,125 @@
+"""
+Bounded conversation history and token-budgeted prompt assembly.
+
+The chat messages sent to the LLM are laid out so the provider's prompt
+cache can reuse as much as possible, and nothing is sent twice:
+
+    system   stable persona + rules (identical every turn -> cached prefix)
+    system   "Earlier in this call: ..." rolling summary (when there is one)
+    ...      recent turns from the ring buffer, newest kept first, within budget
+    system   volatile lead status (changes every turn, so it goes last)
+
+History is a ring buffer of CONVERSATION_HISTORY messages; caller messages
+that fall out of it are folded into a short rolling summary capped at
+SUMMARY_TOKENS, so a long call keeps constant memory and prompt size.
+Tokens are counted locally with tiktoken when it is installed, else with a
+conservative estimate.
+"""
+
+import os
+import re
+from collections import deque
+
+# Messages kept verbatim; older ones are folded into the summary
+CONVERSATION_HISTORY = int(os.getenv("CONVERSATION_HISTORY", "8"))
+# Input token budget per LLM call (system prompt + summary + turns + status)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+SUMMARY_TOKENS = 80
+
+# Per-message framing tokens in the chat format
+MESSAGE_OVERHEAD = 4
+
+_PIECE_RE = re.compile(r"\w{1,4}|[^\w\s]")
+_encode = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text for gpt-4o-mini (tiktoken), or an over-estimate without it."""
+    global _encode
+    if _encode is None:
+        try:
+            import tiktoken
+
+            _encode = tiktoken.encoding_for_model("gpt-4o-mini").encode
+        except Exception:  # not installed, or its BPE file can't be fetched
+            _encode = _PIECE_RE.findall
+    return len(_encode(text or ""))
+
+
+def _clip(text: str, words: int) -> str:
+    parts = (text or "").split()
+    return " ".join(parts[:words]) + (" ..." if len(parts) > words else "")
+
+
+class ConversationHistory:
+    """Ring buffer of {"role", "content"} messages plus a rolling summary of evicted ones."""
+
+    def __init__(self, max_messages: int = CONVERSATION_HISTORY, summary_tokens: int = SUMMARY_TOKENS):
+        self.messages = deque(maxlen=max_messages)
+        self.summary_tokens = summary_tokens
+        self._summary = deque()  # (line, tokens)
+        self._summary_size = 0
+        self.total = 0  # messages ever appended
+
+    def append(self, message: dict):
+        if len(self.messages) == self.messages.maxlen:
+            self._fold(self.messages[0])
+        self.messages.append(message)
+        self.total += 1
+
+    def _fold(self, message: dict):
+        """Summarize an evicted caller message in one short line; drop the oldest lines past the cap.
+
+        Priya's own replies are not kept: what she collected is in the lead status.
+        """
+        if message["role"] != "user":
+            return
+        line = f"Caller: {_clip(message['content'], 20)}"
+        tokens = count_tokens(line)
+        self._summary.append((line, tokens))
+        self._summary_size += tokens
+        while self._summary_size > self.summary_tokens and len(self._summary) > 1:
+            _, dropped = self._summary.popleft()
+            self._summary_size -= dropped
+
+    @property
+    def summary(self) -> str:
+        return "\n".join(line for line, _ in self._summary)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __reversed__(self):
+        return reversed(self.messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self.messages)[index]
+        return self.messages[index]
+
+
+def assemble_messages(system_prompt: str, history: ConversationHistory, status: str,
+                      budget: int = PROMPT_TOKEN_BUDGET) -> list:
+    """Chat messages for one LLM call: stable prefix, summary, recent turns, status last.
+
+    The newest message (the caller's current turn) is always included; older
+    turns are added newest-first while they fit the budget.
+    """
+    head = [{"role": "system", "content": system_prompt}]
+    if history.summary:
+        head.append({"role": "system", "content": f"Earlier in this call:\n{history.summary}"})
+    tail = [{"role": "system", "content": status}]
+
+    remaining = budget - sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in head + tail)
+    recent = []
+    for message in reversed(history):
+        cost = count_tokens(message["content"]) + MESSAGE_OVERHEAD
+        if recent and cost > remaining:
+            break
+        recent.append({"role": message["role"], "content": message["content"]})
+        remaining -= cost
+    recent.reverse()
+    return head + recent + tail
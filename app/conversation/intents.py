@@ -0,0 +1,259 @@
+"""
+In-process intent classifier for caller utterances.
+
+Replaces the network round trip of the LLM intent engine (prompts.py
+SYSTEM_PROMPT) for routine routing. Utterances become hashed n-gram
+features (word unigrams/bigrams plus character trigrams, so ASR typos
+still match) and a multinomial logistic regression trained with NumPy on
+app/data/intent_utterances.tsv scores them in microseconds. Phone numbers
+and emails are mapped to shape tokens, so the training file does not need
+real ones.
+
+Only utterances the model is unsure about (probability below
+INTENT_MIN_CONFIDENCE) are escalated to the LLM engine; its JSON is parsed
+with json_utils.parse_json_safe and the local guess is kept if that fails.
+ConversationManager calls it without an LLM: confident "more options",
+"similar" and goodbye turns are routed directly (INTENT_ROUTING), the rest
+are answered by the reply LLM as before.
+
+    python -m app.conversation.intents eval [--folds 5]
+    python -m app.conversation.intents "is there a swimming pool"
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from app.conversation.json_utils import parse_json_safe
+from app.conversation.prompts import SYSTEM_PROMPT
+
+N_FEATURES = 1 << 14
+EPOCHS = 200
+LEARNING_RATE = 30.0
+L2 = 1e-4
+
+# Below this probability the LLM intent engine decides instead
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "0.5"))
+HIGH_CONFIDENCE = 0.85
+
+# Intents that map to a tool of the LLM engine's schema
+INTENT_TOOLS = {"account_details": "get_account_details"}
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "intent_utterances.tsv")
+
+_TOKEN_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+|\+?\d[\d\s-]{6,}\d|[a-z0-9']+")
+
+
+def _shape(token: str) -> str:
+    """Emails and phone-like digit runs become shape tokens ("<email>", "<digits10>")."""
+    if "@" in token:
+        return "<email>"
+    if token[0].isdigit() or token[0] == "+":
+        digits = re.sub(r"\D", "", token)
+        return f"<digits{len(digits)}>" if len(digits) >= 4 else token
+    return token
+
+
+def _key(gram: str) -> int:
+    # crc32 rather than hash(): stable across processes (PYTHONHASHSEED)
+    return zlib.crc32(gram.encode("utf-8")) & (N_FEATURES - 1)
+
+
+@lru_cache(maxsize=8192)
+def _token_keys(token: str) -> tuple:
+    """Feature ids of a token on its own: the word and its character trigrams."""
+    keys = [_key(f"w:{token}")]
+    if not token.startswith("<"):
+        padded = f"<{token}>"
+        keys.extend(_key(f"c:{padded[i:i + 3]}") for i in range(len(padded) - 2))
+    return tuple(keys)
+
+
+def features(text: str):
+    """(hashed feature ids, L2-normalized weights) of one utterance."""
+    tokens = [_shape(t) for t in _TOKEN_RE.findall((text or "").lower())]
+    counts = {}
+    previous = "<s>"
+    # PERFORMANCE: per-token ids are memoized; only the bigrams are hashed per call
+    for token in tokens:
+        for key in (*_token_keys(token), _key(f"b:{previous} {token}")):
+            counts[key] = counts.get(key, 0.0) + 1.0
+        previous = token
+    if not counts:
+        counts[_key("<empty>")] = 1.0
+
+    ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return ids, weights / np.linalg.norm(weights)
+
+
+def load_utterances(path: str = DEFAULT_DATA_PATH):
+    """[(intent, utterance)] from the tab-separated training file (# comments allowed)."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            intent, utterance = line.split("\t", 1)
+            examples.append((intent.strip(), utterance.strip()))
+    return examples
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over hashed n-gram features."""
+
+    def __init__(self, examples):
+        start = time.perf_counter()
+        self.intents = sorted({intent for intent, _ in examples})
+        label = {intent: i for i, intent in enumerate(self.intents)}
+        y = np.array([label[intent] for intent, _ in examples])
+
+        # PERFORMANCE: train over the feature ids that actually occur, then scatter
+        # into the full hashed space (a few thousand columns instead of 16k)
+        encoded = [features(text) for _, text in examples]
+        columns = np.unique(np.concatenate([ids for ids, _ in encoded]))
+        x = np.zeros((len(examples), columns.size), dtype=np.float32)
+        for row, (ids, weights) in enumerate(encoded):
+            np.add.at(x[row], np.searchsorted(columns, ids), weights)
+
+        targets = np.eye(len(self.intents), dtype=np.float32)[y]
+        w = np.zeros((columns.size, len(self.intents)), dtype=np.float32)
+        b = np.zeros(len(self.intents), dtype=np.float32)
+        for _ in range(EPOCHS):
+            gradient = (_softmax(x @ w + b) - targets) / len(examples)
+            w -= LEARNING_RATE * (x.T @ gradient + L2 * w)
+            b -= LEARNING_RATE * gradient.sum(axis=0)
+
+        self.weights = np.zeros((N_FEATURES, len(self.intents)), dtype=np.float32)
+        self.weights[columns] = w
+        self.bias = b
+        self.train_seconds = time.perf_counter() - start
+
+    def probabilities(self, text: str) -> np.ndarray:
+        ids, weights = features(text)
+        return _softmax(weights @ self.weights[ids] + self.bias)
+
+    def predict(self, text: str):
+        """(intent, probability) of the most likely intent."""
+        p = self.probabilities(text)
+        best = int(p.argmax())
+        return self.intents[best], float(p[best])
+
+
+def _softmax(z):
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> IntentClassifier:
+    """Classifier trained on the bundled utterance file (once per process)."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = IntentClassifier(load_utterances())
+                print(f"🎯 Intent classifier trained: {len(_classifier.intents)} intents "
+                      f"in {_classifier.train_seconds*1000:.0f}ms")
+    return _classifier
+
+
+def _confidence_label(probability: float) -> str:
+    if probability >= HIGH_CONFIDENCE:
+        return "high"
+    return "medium" if probability >= INTENT_MIN_CONFIDENCE else "low"
+
+
+def classify_intent(text: str, llm=None) -> dict:
+    """Intent of an utterance in the LLM engine's schema, plus "score" and "source".
+
+    Answered locally unless the classifier is unsure and an llm (LLMClient)
+    is given; then the LLM engine decides, falling back to the local guess
+    if its reply is not valid JSON.
+    """
+    intent, probability = get_classifier().predict(text)
+    result = {
+        "intent": intent,
+        "tool": INTENT_TOOLS.get(intent),
+        "arguments": {},
+        "confidence": _confidence_label(probability),
+        "requires_confirmation": False,
+        "score": round(probability, 4),
+        "source": "local",
+    }
+    if probability >= INTENT_MIN_CONFIDENCE or llm is None:
+        return result
+
+    try:
+        parsed = parse_json_safe(llm.generate(SYSTEM_PROMPT, text))
+    except Exception as e:
+        print(f"Intent LLM error: {e}")
+        parsed = None
+    if isinstance(parsed, dict) and parsed.get("intent"):
+        return {**result, **parsed, "source": "llm"}
+    return result
+
+
+def evaluate(path: str = DEFAULT_DATA_PATH, folds: int = 5):
+    """Stratified k-fold accuracy, escalation rate at INTENT_MIN_CONFIDENCE, and per-call latency."""
+    examples = load_utterances(path)
+    fold_of = {}
+    seen = {}
+    for i, (intent, _) in enumerate(examples):
+        fold_of[i] = seen.get(intent, 0) % folds
+        seen[intent] = seen.get(intent, 0) + 1
+
+    correct = confident = confident_correct = 0
+    errors = {}
+    for fold in range(folds):
+        train = [ex for i, ex in enumerate(examples) if fold_of[i] != fold]
+        model = IntentClassifier(train)
+        for i, (intent, text) in enumerate(examples):
+            if fold_of[i] != fold:
+                continue
+            predicted, probability = model.predict(text)
+            correct += predicted == intent
+            if probability >= INTENT_MIN_CONFIDENCE:
+                confident += 1
+                confident_correct += predicted == intent
+            if predicted != intent:
+                errors[intent] = errors.get(intent, 0) + 1
+
+    n = len(examples)
+    print(f"🎯 {n} utterances, {len(seen)} intents, {folds}-fold cross-validation")
+    print(f"   accuracy: {correct / n:.1%}")
+    print(f"   answered locally (p >= {INTENT_MIN_CONFIDENCE}): {confident / n:.1%}, "
+          f"accuracy {confident_correct / max(confident, 1):.1%}; escalated to LLM: {1 - confident / n:.1%}")
+    if errors:
+        print(f"   misses by intent: {dict(sorted(errors.items(), key=lambda item: -item[1]))}")
+
+    model = IntentClassifier(examples)
+    print(f"   training: {model.train_seconds*1000:.0f}ms")
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        for _, text in examples:
+            model.predict(text)
+    print(f"   predict: {(time.perf_counter() - start) / (runs * n) * 1e6:.1f}µs per utterance")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        print('Usage: python -m app.conversation.intents eval [--folds N] | "<utterance>"')
+        sys.exit(1)
+    if args[0] == "eval":
+        evaluate(folds=int(args[args.index("--folds") + 1]) if "--folds" in args else 5)
+    else:
+        print(classify_intent(" ".join(args)))
@@ -1,32 +1,66 @@
 print("ConversationManager v5.2 - Fixed email validation + responsive property display")
 
 import json
+import os
 import re
-from difflib import get_close_matches
+from concurrent.futures import ThreadPoolExecutor
+from app.conversation.slots import (
+    EMAIL_DOMAIN_TYPOS,
+    EMAIL_TLD_TYPOS,
+    EMAIL_VALID_ENDINGS,
+    KNOWN_CITIES,
+    extract_budget,
+    extract_bhk,
+    extract_email,
+    extract_name,
+    scan,
+)
+from app.conversation.context import ConversationHistory, assemble_messages
+from app.conversation.intents import HIGH_CONFIDENCE, INTENT_MIN_CONFIDENCE, classify_intent
+from app.conversation.policy import SHOW_PROPERTIES, TEMPLATED_REPLIES, templated_reply
 from app.llm.openai_client import OpenAIClient
-from app.rag.retriever import retrieve_properties
-from app.response.response_builder import format_property_cards
+from app.llm.response_cache import cached_reply, fingerprint
+from app.rag.retriever import relaxed_search_properties, search_properties_page, cursor_skipping, get_similar_properties
+from app.response.response_builder import format_price, format_property_cards
 
-# Known cities for fuzzy matching
-KNOWN_CITIES = ["Bangalore", "Mumbai", "Thane", "Whitefield", "Electronic City",
-                "Sarjapur", "Yelahanka", "Hebbal", "Bandra", "Andheri", "Powai"]
+# Start the farewell property search in the background once city/BHK/budget are known
+PROPERTY_PREFETCH = os.getenv("PROPERTY_PREFETCH", "true").lower() == "true"
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="property-prefetch")
 
+# Route phrasings the keyword scan misses with the local intent classifier (app/conversation/intents.py).
+# Unsure turns are not escalated to the LLM intent engine - the reply LLM answers them as before.
+INTENT_ROUTING = os.getenv("INTENT_ROUTING", "true").lower() == "true"
+
+# Stable across turns and sessions so the provider can cache it as a prompt prefix
 SYSTEM_PROMPT = """You are Priya, a friendly real estate assistant for Raymond Realty.
 
 RULES:
 1. Keep responses SHORT (1-2 sentences max)
 2. Be warm and conversational like a real person
 3. Collect: name, phone, email - naturally in conversation
-4. Remember context throughout the conversation
+4. Remember context throughout the conversation"""
 
-CURRENT STATUS:
+# Volatile per-turn part, sent after the conversation
+STATUS_PROMPT = """CURRENT STATUS:
 {status}
 
-CONVERSATION SO FAR:
-{context}
-
 RESPOND NATURALLY based on what's missing or what user is asking."""
 
+# Cached replies are only reused with the prompts they were generated with
+PROMPT_VERSION = fingerprint(SYSTEM_PROMPT, STATUS_PROMPT)
+
+# Lead fields replaced by placeholders in cached replies (the cache key only records whether they are set)
+_TEMPLATE_FIELDS = ("name", "phone", "email")
+
+# Budgets within the same 25 lakh band share cached replies
+BUDGET_BAND = 2500000
+
+
+def _search_properties(city, max_price, bhk) -> dict:
+    """Relaxed search plus rendered cards for the farewell (prefetch pool or inline)."""
+    found = relaxed_search_properties(location=city, max_price=max_price, bhk=bhk)
+    return {"found": found, "cards": format_property_cards(list(found["results"]))}
+
 
 class ConversationManager:
     """Intelligent human-like conversation manager."""
@@ -36,8 +70,12 @@ class ConversationManager:
         self.llm = OpenAIClient()
         self.lead = {}
         self.lead_saved = False
-        self.history = []
+        self.history = ConversationHistory()  # Ring buffer + rolling summary (app/conversation/context.py)
         self.pending_validation = None  # Track if we're waiting for correction
+        self.more_properties = None  # Filters, cursor and already shown ids for 'more options'
+        self.shown_properties = []  # Cards shown so far, most recent last
+        self.prefetch = None  # (search key, Future) of the background property search
+        self.prefetch_pushed = None  # Search key whose prefetched cards were pushed to the client
 
     def handle_user_input(self, user_text: str) -> dict:
         """Process user message intelligently."""
@@ -45,8 +83,10 @@ class ConversationManager:
         print(f"User: '{user_text}'")
 
         # Step 1: Smart extraction with validation
+        lead_before = dict(self.lead)
         validation_issue = self._smart_extract(user_text)
         print(f"Lead data: {self.lead}")
+        self._prefetch_properties()
 
         # Step 2: Add to history
         self.history.append({"role": "user", "content": user_text})
@@ -61,6 +101,14 @@ class ConversationManager:
         if self._wants_to_end(user_text):
             return self._farewell_with_properties()
 
+        # Step 5a: "More options" after properties were shown - next page via cursor
+        if self.more_properties and self._wants_more_properties(user_text):
+            return self._show_more_properties()
+
+        # Step 5b: "Something similar to that one" - precomputed neighbor lists
+        if self.shown_properties and self._wants_similar_properties(user_text):
+            return self._show_similar_properties(user_text)
+
         # Step 5: Check if user explicitly wants properties NOW
         if self._wants_properties_now(user_text):
             # If we have at least name and phone, show properties
@@ -70,15 +118,27 @@ class ConversationManager:
             elif self.lead.get("name"):
                 return self._farewell_with_properties()
 
-        # Step 6: If all info collected, auto-show properties
-        if self._has_all_info():
-            response = self._generate_response(user_text)
-            # Auto-show properties if LLM mentions showing
-            if "show" in response.lower() or "here" in response.lower():
+        # Step 6: Predictable turn (greeting, "ok", just gave name/phone/email) - templated, no LLM call
+        response = None
+        if TEMPLATED_REPLIES:
+            response = templated_reply(self.lead, lead_before, scan(user_text), self.history)
+            if response == SHOW_PROPERTIES:
                 return self._farewell_with_properties()
+            if response:
+                print("⚡ Templated reply (LLM skipped)")
+
+        # Step 6b: "More options" / "similar" / "bye" phrasings the keyword scan missed - no LLM call
+        if response is None and INTENT_ROUTING:
+            routed = self._route_by_intent(user_text)
+            if routed:
+                return routed
 
         # Step 7: Generate intelligent response
-        response = self._generate_response(user_text)
+        if response is None:
+            response = self._generate_response(user_text)
+            # If all info collected, auto-show properties when the LLM mentions showing
+            if self._has_all_info() and ("show" in response.lower() or "here" in response.lower()):
+                return self._farewell_with_properties()
         print(f"Bot: {response}")
 
         self.history.append({"role": "assistant", "content": response})
@@ -88,10 +148,11 @@ class ConversationManager:
 
     def _smart_extract(self, text: str) -> str:
         """Smart extraction with validation. Returns error message if validation fails."""
-        t = text.lower().strip()
+        # PERFORMANCE: one compiled keyword pass per turn, shared with the _wants_* checks
+        found = scan(text)
 
         # --- CITY DETECTION (Fuzzy matching) ---
-        detected_city = self._detect_city(t)
+        detected_city = found.city
         if detected_city:
             self.lead["city"] = detected_city
             print(f"  City detected: {detected_city}")
@@ -99,7 +160,7 @@ class ConversationManager:
         # --- PHONE DETECTION with validation ---
         # Look for any sequence of digits (skip if we already have valid phone)
         if not self.lead.get("phone"):
-            digits = re.sub(r'\D', '', text)
+            digits = found.digits
             if len(digits) >= 7:  # Looks like a phone attempt
                 if len(digits) == 10 and digits[0] in '6789':
                     self.lead["phone"] = digits
@@ -116,57 +177,26 @@ class ConversationManager:
         # --- EMAIL DETECTION with validation ---
         # Look for anything with @ symbol (skip if we already have valid email)
         if '@' in text and not self.lead.get("email"):
-            # Clean the text - remove trailing punctuation
-            clean_text = text.rstrip('.,!?;:')
-            email_match = re.search(r'[\w.+-]+@[\w-]+\.[\w.-]+', clean_text)
+            email_match = extract_email(found)
             if email_match:
-                email = email_match.group().lower().rstrip('.')  # Remove any trailing dots
+                email = email_match.lower().rstrip('.')  # Remove any trailing dots
 
                 # Extract domain part for validation
                 domain = email.split('@')[1] if '@' in email else ''
 
                 # Check for common TLD typos (only at the END of email)
-                tld_typos = {
-                    '.cm': '.com',
-                    '.con': '.com',
-                    '.cpm': '.com',
-                    '.vom': '.com',
-                    '.ocm': '.com',
-                    '.comm': '.com',
-                    '.coм': '.com',
-                    '.iin': '.in',
-                    '.orgg': '.org',
-                }
-
-                for typo, correction in tld_typos.items():
+                for typo, correction in EMAIL_TLD_TYPOS.items():
                     if email.endswith(typo):
                         suggested = email[:-len(typo)] + correction
                         return f"Did you mean {suggested}? Just want to make sure I have it right."
 
                 # Check for common domain typos (exact domain match only)
-                domain_typos = {
-                    'gmial.com': 'gmail.com',
-                    'gmal.com': 'gmail.com',
-                    'gamil.com': 'gmail.com',
-                    'gnail.com': 'gmail.com',
-                    'gmaill.com': 'gmail.com',
-                    'gmali.com': 'gmail.com',
-                    'yaho.com': 'yahoo.com',
-                    'yahooo.com': 'yahoo.com',
-                    'yaoo.com': 'yahoo.com',
-                    'hotmal.com': 'hotmail.com',
-                    'hotmial.com': 'hotmail.com',
-                    'outloo.com': 'outlook.com',
-                    'outlok.com': 'outlook.com',
-                }
-
-                if domain in domain_typos:
-                    suggested = email.replace(domain, domain_typos[domain])
+                if domain in EMAIL_DOMAIN_TYPOS:
+                    suggested = email.replace(domain, EMAIL_DOMAIN_TYPOS[domain])
                     return f"Did you mean {suggested}? Just want to make sure I have it right."
 
                 # Validate domain has proper TLD
-                valid_tlds = ['com', 'in', 'org', 'net', 'co', 'io', 'edu', 'gov', 'info', 'biz', 'co.in', 'org.in', 'ac.in', 'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com']
-                has_valid_tld = any(email.endswith('.' + tld) or email.endswith('@' + tld) for tld in valid_tlds)
+                has_valid_tld = email.endswith(EMAIL_VALID_ENDINGS)
 
                 if not has_valid_tld:
                     return f"That email doesn't look quite right. Could you please check and share it again?"
@@ -178,85 +208,126 @@ class ConversationManager:
 
         # --- NAME DETECTION ---
         if not self.lead.get("name"):
-            # Check for name patterns
-            name_patterns = [
-                r"(?:my name is|i am|i'm|this is|call me|it's|its)\s+([a-zA-Z]+)",
-                r"^([A-Z][a-z]{2,15})$"  # Single capitalized word (2-15 chars)
-            ]
-            excluded = ["looking", "interested", "fine", "good", "ok", "yes", "no",
-                       "bye", "goodbye", "thanks", "thank", "hi", "hello", "hey",
-                       "show", "property", "apartment", "flat", "house", "home",
-                       "schedule", "site", "visit", "want", "need", "please",
-                       "great", "awesome", "sure", "okay", "yeah", "yup", "nope"]
-
-            for p in name_patterns:
-                m = re.search(p, text, re.I)
-                if m:
-                    name = m.group(1).title()
-                    if name.lower() not in excluded and 2 <= len(name) <= 20:
-                        self.lead["name"] = name
-                        print(f"  Name: {name}")
-                        break
+            name = extract_name(found)
+            if name:
+                self.lead["name"] = name
+                print(f"  Name: {name}")
 
         # --- BHK DETECTION ---
-        bhk_match = re.search(r'([1-4])\s*(?:bhk|bedroom|bed)', t)
-        if bhk_match:
-            self.lead["bhk"] = f"{bhk_match.group(1)} BHK"
+        bhk = extract_bhk(found)
+        if bhk:
+            self.lead["bhk"] = bhk
             print(f"  BHK: {self.lead['bhk']}")
 
         # --- BUDGET DETECTION ---
-        budget_match = re.search(r'(\d+(?:\.\d+)?)\s*(cr|crore|lakh|lac|l)\b', t)
-        if budget_match:
-            num = budget_match.group(1)
-            unit = budget_match.group(2)
-            if unit in ['cr', 'crore']:
-                self.lead["budget"] = f"{num} crore"
-            else:
-                self.lead["budget"] = f"{num} lakh"
+        budget = extract_budget(found)
+        if budget:
+            self.lead["budget"] = budget
             print(f"  Budget: {self.lead['budget']}")
 
         return None  # No validation issues
 
     def _detect_city(self, text: str) -> str:
         """Fuzzy match city names from user text."""
-        text = text.lower()
-
-        # Direct mappings (including common variations)
-        direct_map = {
-            "bangalore": "Bangalore", "bengaluru": "Bangalore", "blr": "Bangalore",
-            "mumbai": "Mumbai", "bombay": "Mumbai",
-            "thane": "Thane",
-            "whitefield": "Whitefield",
-            "electronic city": "Electronic City", "ec": "Electronic City",
-        }
-
-        for key, city in direct_map.items():
-            if key in text:
-                return city
-
-        # Fuzzy matching for typos
-        words = text.split()
-        for word in words:
-            if len(word) >= 4:  # Only check words with 4+ chars
-                matches = get_close_matches(word, [c.lower() for c in KNOWN_CITIES], n=1, cutoff=0.7)
-                if matches:
-                    # Find the original city name
-                    for city in KNOWN_CITIES:
-                        if city.lower() == matches[0]:
-                            return city
-        return None
+        return scan(text).city
 
     def _wants_to_end(self, text: str) -> bool:
         """Check if user wants to end conversation."""
-        t = text.lower()
-        endings = ["bye", "goodbye", "that's all", "done", "end", "later", "no thanks", "exit", "quit"]
-        return any(e in t for e in endings)
+        return "end" in scan(text).intents
 
     def _wants_properties_now(self, text: str) -> bool:
         """Check if user wants to see properties."""
+        return "show" in scan(text).intents
+
+    def _wants_more_properties(self, text: str) -> bool:
+        """Check if user asks for more options after seeing some."""
+        return "more" in scan(text).intents
+
+    def _wants_similar_properties(self, text: str) -> bool:
+        """Check if user asks for listings like one they were shown."""
+        return "similar" in scan(text).intents
+
+    def _show_similar_properties(self, text: str) -> dict:
+        """Show listings closest to the card the user refers to (by name or position, else the first)."""
         t = text.lower()
-        triggers = ["show", "display", "list", "see", "view", "get", "find", "search", "property", "properties"]
-        return any(trigger in t for trigger in triggers)
+        recent = self.shown_properties[-3:]
+        reference = recent[0]
+        for position, word in enumerate(["first", "second", "third"]):
+            if word in t and position < len(recent):
+                reference = recent[position]
+        # A distinctive word of a shown property's name ("the Jewels one") wins
+        for card in reversed(self.shown_properties):
+            words = [w for w in (card.get("name") or "").lower().split() if len(w) > 3 and w not in ("raymond", "realty")]
+            if any(w in t for w in words):
+                reference = card
+                break
+
+        shown_ids = {card["id"] for card in self.shown_properties}
+        similar = [p for p, _score in get_similar_properties(reference["id"], limit=10) if p["id"] not in shown_ids]
+        cards = format_property_cards(similar[:3])
+        if not cards:
+            text = f"I don't have anything else quite like {reference['name']} right now. Would you like to try a different area or budget?"
+            self.history.append({"role": "assistant", "content": text})
+            return {"text": text}
+
+        self.shown_properties.extend(cards)
+        text = f"Here {'is 1 property' if len(cards) == 1 else f'are {len(cards)} properties'} similar to {reference['name']}!"
+        self.history.append({"role": "assistant", "content": text})
+        return {"text": text, "properties": cards}
+
+    def _route_by_intent(self, text: str):
+        """Reply for a confidently classified routing intent, else None.
+
+        Low-confidence turns are not escalated to an intent LLM: they fall
+        through to _generate_response, the normal reply LLM.
+        """
+        found = classify_intent(text)
+        intent, score = found["intent"], found["score"]
+        if score < INTENT_MIN_CONFIDENCE:
+            return None
+        if intent == "more_options" and self.more_properties:
+            print(f"🎯 Intent routed: {intent} ({score:.2f})")
+            return self._show_more_properties()
+        if intent == "similar_properties" and self.shown_properties:
+            print(f"🎯 Intent routed: {intent} ({score:.2f})")
+            return self._show_similar_properties(text)
+        # Ending the conversation can't be taken back, so only on high confidence
+        if score >= HIGH_CONFIDENCE and (intent == "goodbye" or (intent == "search_properties" and self.lead.get("name"))):
+            print(f"🎯 Intent routed: {intent} ({score:.2f})")
+            return self._farewell_with_properties()
+        return None
+
+    def _remember_shown(self, cards, **filters):
+        """Keep the filters so 'more options' can continue the search.
+
+        The cards shown are best-ranked, not the first in (price, id) order, so
+        'more options' pages through the whole match set from the start and
+        leaves these ids out - every match is shown exactly once.
+        """
+        if not cards:
+            return
+        self.shown_properties.extend(cards)
+        self.more_properties = {"filters": filters, "cursor": cursor_skipping(cards)}
+
+    def _show_more_properties(self) -> dict:
+        """Show the next properties for the last search, in (price, id) order."""
+        more = self.more_properties
+        page = search_properties_page(cursor=more["cursor"], page_size=3, **more["filters"])
+        cards = format_property_cards(list(page["results"]))
+        if not cards:
+            self.more_properties = None
+            text = "That's everything I have for that search right now. Would you like to try a different area or budget?"
+            self.history.append({"role": "assistant", "content": text})
+            return {"text": text}
+
+        self.shown_properties.extend(cards)
+        if page["next_cursor"]:
+            more["cursor"] = page["next_cursor"]
+        else:
+            self.more_properties = None
+        text = "Here's one more option for you!" if len(cards) == 1 else f"Here are {len(cards)} more options for you!"
+        self.history.append({"role": "assistant", "content": text})
+        return {"text": text, "properties": cards}
 
     def _has_all_info(self) -> bool:
         """Check if we have all required info."""
@@ -290,22 +361,50 @@ class ConversationManager:
 
         status = "\n".join(status_parts)
 
-        # Build context
-        context_lines = []
-        for msg in self.history[-8:]:
-            role = "User" if msg["role"] == "user" else "Priya"
-            context_lines.append(f"{role}: {msg['content']}")
-        context = "\n".join(context_lines) if context_lines else "Start of conversation"
-
-        prompt = SYSTEM_PROMPT.format(status=status, context=context)
+        # PERFORMANCE: stable prefix, summary + recent turns within budget, status last;
+        # the current message is already the newest history entry, so it is sent once
+        def generate():
+            return self.llm.complete(assemble_messages(SYSTEM_PROMPT, self.history, STATUS_PROMPT.format(status=status)))
 
         try:
-            response = self.llm.generate(prompt, user_text, self.history[-4:])
-            return response.strip()
+            # PERFORMANCE: the same words in the same lead state reuse a cached reply. The key holds
+            # no personal data; the caller's details are swapped for placeholders in the cached text
+            key_text = self._to_template(user_text)
+            response = cached_reply(key_text, self._reply_context(), lambda: self._to_template(generate()))
+            return self._from_template(response).strip()
         except Exception as e:
             print(f"LLM error: {e}")
             return self._fallback_response()
 
+    def _reply_context(self) -> str:
+        """Response-cache context: which contact fields are collected plus the search slots (city, BHK, budget band)."""
+        collected = "".join("1" if self.lead.get(field) else "0" for field in _TEMPLATE_FIELDS)
+        budget = self._parse_budget(self.lead.get("budget"))
+        band = budget // BUDGET_BAND if budget else str(self.lead.get("budget") or "").lower()
+        return self.llm.cache_context(
+            PROMPT_VERSION, collected, (self.lead.get("city") or "").lower(), str(self.lead.get("bhk") or "").upper(), band)
+
+    def _template_values(self):
+        """(placeholder, caller value) pairs, longest value first so a full name wins over the first name."""
+        values = [(f"{{{field}}}", str(self.lead[field])) for field in _TEMPLATE_FIELDS if self.lead.get(field)]
+        name = str(self.lead.get("name") or "").split()
+        if len(name) > 1:
+            values.append(("{first_name}", name[0]))
+        if self.lead.get("budget"):
+            values.append(("{budget}", str(self.lead["budget"])))
+        # Very short values would also match inside unrelated words
+        return sorted((pair for pair in values if len(pair[1]) >= 3), key=lambda pair: -len(pair[1]))
+
+    def _to_template(self, reply: str) -> str:
+        for placeholder, value in self._template_values():
+            reply = reply.replace(value, placeholder)
+        return reply
+
+    def _from_template(self, reply: str) -> str:
+        for placeholder, value in self._template_values():
+            reply = reply.replace(placeholder, value)
+        return reply
+
     def _fallback_response(self) -> str:
         """Fallback when LLM fails."""
         if not self.lead.get("name"):
@@ -328,31 +427,86 @@ class ConversationManager:
 
         print(f"Searching: city={city}, bhk={bhk}, budget={budget}")
 
-        props = retrieve_properties(location=city, max_price=budget, bhk=bhk)
-
-        if not props and city:
-            print(f"No properties in {city}, showing all...")
-            props = retrieve_properties(max_price=budget, bhk=bhk)
-
-        if props:
-            cards = format_property_cards(props, city, budget, bhk)
-            if city:
+        # One pass: exact match, else the least relaxed budget/BHK/locality/city step that has results
+        result = self._property_results()
+        found, cards = result["found"], result["cards"]
+        if found["relaxation"]:
+            print(f"No exact match, relaxed search: {found['relaxation']} → {found['filters']}")
+
+        if cards:
+            if found["relaxation"] == "top_picks":
+                self.shown_properties.extend(cards)
+                text = f"Here are some excellent properties{' for you, ' + name if name else ''}!"
+                return {"text": text, "properties": cards, "conversation_ended": True}
+
+            self._remember_shown(cards, **{k: v for k, v in found["filters"].items() if k != "property_type"})
+            note = self._relaxation_note(found, city, budget, bhk)
+            if note:
+                count = "is 1 property" if len(cards) == 1 else f"are {len(cards)} properties"
+                text = f"I couldn't find an exact match, so here {count} {note}{', ' + name if name else ''}! Our team will call you shortly."
+            elif city:
                 text = f"Here are {len(cards)} properties in {city} for you{', ' + name if name else ''}! Our team will call you shortly."
             else:
                 text = f"Here are {len(cards)} great properties for you{', ' + name if name else ''}! Our team will call you shortly."
 
             self.history.append({"role": "assistant", "content": text})
-            return {"text": text, "properties": cards, "conversation_ended": True}
-
-        # Fallback
-        all_props = retrieve_properties()
-        if all_props:
-            cards = format_property_cards(all_props[:5])
-            text = f"Here are some excellent properties{' for you, ' + name if name else ''}!"
-            return {"text": text, "properties": cards, "conversation_ended": True}
+            return {"text": text, "properties": cards, "conversation_ended": True, "relaxation": found["relaxation"]}
 
         return {"text": f"Thanks{', ' + name if name else ''}! Our team will contact you soon!", "conversation_ended": True}
 
+    def _search_key(self) -> tuple:
+        """(city, max_price, bhk) the farewell search would run with now."""
+        return (self.lead.get("city"), self._parse_budget(self.lead.get("budget")), self.lead.get("bhk"))
+
+    def _prefetch_properties(self):
+        """Start the farewell search in the background when city/BHK/budget are new or changed."""
+        key = self._search_key()
+        if not PROPERTY_PREFETCH or not any(key) or (self.prefetch and self.prefetch[0] == key):
+            return
+        if self.prefetch:
+            # Stale preferences: a queued search never runs, a running one is ignored
+            self.prefetch[1].cancel()
+        print(f"🔮 Prefetching properties: city={key[0]}, bhk={key[2]}, budget={key[1]}")
+        self.prefetch = (key, _prefetch_pool.submit(_search_properties, *key))
+
+    def _property_results(self) -> dict:
+        """Farewell search results: the prefetched ones if they match the current preferences."""
+        key = self._search_key()
+        if self.prefetch and self.prefetch[0] == key and not self.prefetch[1].cancelled():
+            future = self.prefetch[1]
+            ready = future.done()
+            try:
+                result = future.result()
+                print(f"⚡ Prefetched properties {'ready' if ready else 'awaited'}: {len(result['cards'])} cards")
+                return result
+            except Exception as e:
+                print(f"Property prefetch error: {e}")
+        return _search_properties(*key)
+
+    def ready_properties(self):
+        """Cards of a finished prefetch for the current preferences, once per search (else None)."""
+        key = self._search_key()
+        if not self.prefetch or self.prefetch[0] != key or self.prefetch_pushed == key:
+            return None
+        future = self.prefetch[1]
+        if not future.done() or future.cancelled() or future.exception():
+            return None
+        self.prefetch_pushed = key
+        return future.result()["cards"] or None
+
+    def _relaxation_note(self, found, city, budget, bhk) -> str:
+        """How the search was loosened, phrased for the caller ("" for an exact match)."""
+        relaxation = found["relaxation"]
+        if relaxation in ("budget_10", "budget_20"):
+            return f"slightly above your budget, up to {format_price(found['filters']['max_price'])}"
+        if relaxation == "adjacent_bhk":
+            return f"with one bedroom more or less than {bhk}" + (f" in {city}" if city else "")
+        if relaxation == "nearby_locality":
+            return f"in areas near {city}"
+        if relaxation == "any_city":
+            return f"in other cities, since nothing in {city} fits right now" if city else "that come closest to what you asked for"
+        return ""
+
     def _parse_budget(self, val):
         if not val:
             return None
@@ -0,0 +1,132 @@
+"""
+Templated replies for turns the lead state already decides.
+
+Most turns of a lead-capture call are predictable: the greeting, asking for
+the phone right after the name, asking for the email after the phone,
+"ok" / "sure". Those are answered here from a template set (the old
+_fallback_response strings plus variants) instead of a gpt-4o-mini round
+trip, which saves 400-1200ms per turn. A turn goes to the LLM whenever the
+user asks something or says more than the slots we extracted.
+"""
+
+import os
+import random
+import re
+
+# Answer predictable turns from templates instead of the LLM
+TEMPLATED_REPLIES = os.getenv("TEMPLATED_REPLIES", "true").lower() == "true"
+
+# Returned when the lead is complete and the user just confirmed / added details
+SHOW_PROPERTIES = "show_properties"
+
+_QUESTION_RE = re.compile(
+    r"\?|\b(?:what|how|where|when|which|why|who|whose|can you|could you|would you|will you|do you|does|"
+    r"is there|are there|is it|tell me|explain|price|cost|amenit\w*|possession|loan|emi|visit|brochure)\b"
+)
+_WORD_RE = re.compile(r"[a-z']+")
+
+# Words that carry no request of their own (greetings, acks, slot phrasing)
+_FILLER = frozenset("""
+    hi hii hello hey namaste hola good morning afternoon evening ok okay k yes yeah yep yup sure fine alright
+    cool great perfect thanks thank you ya haan ji please
+    i i'm im am my name's name it's its this me call is mine here a an the and or of for in at to with on
+    looking look want need searching property properties flat flats apartment apartments home house
+    number phone mobile contact email mail id address
+    bhk bedroom bedrooms bed cr crore crores lakh lakhs lac l budget under around about upto up max
+""".split())
+
+_AFFIRMATIVE = frozenset("ok okay k yes yeah yep yup sure fine alright cool great perfect please haan ji".split())
+
+_GREETINGS = [
+    "Hi! I'm Priya from Raymond Realty.",
+    "Hello! This is Priya from Raymond Realty.",
+    "Hi there, I'm Priya with Raymond Realty.",
+]
+
+_ACKS = {
+    "name": ["Nice to meet you, {name}!", "Lovely to meet you, {name}!", "Thanks, {name}!"],
+    "phone": ["Got it, thanks!", "Perfect, I've noted your number.", "Thanks, got your number."],
+    "email": ["Perfect, thanks!", "Got your email, thanks!", "Great, noted."],
+    "preference": ["{Preference} - great choice!", "Sure, I can help with {preference}.", "Lovely, {preference} it is."],
+}
+
+_ASKS = {
+    "name": ["May I know your name?", "What's your name?", "Who am I speaking with?"],
+    "phone": ["What's your phone number?", "What's the best number to reach you on?", "Could you share your mobile number?"],
+    "email": ["And your email address please?", "What's your email address?", "Could you share your email too?"],
+}
+
+
+def _missing(lead: dict):
+    for field in ("name", "phone", "email"):
+        if not lead.get(field):
+            return field
+    return None
+
+
+def _preference(lead: dict) -> str:
+    """ "a 2 BHK in Thane under 1.5 crore" from whatever preferences are known."""
+    text = f"a {lead['bhk']}" if lead.get("bhk") else "a home"
+    if lead.get("city"):
+        text += f" in {lead['city']}"
+    if lead.get("budget"):
+        text += f" under {lead['budget']}"
+    return text
+
+
+def _leftover(found, lead: dict) -> list:
+    """Words left once slot values and filler are taken out (None for a question)."""
+    if _QUESTION_RE.search(found.lower):
+        return None
+    known = set()
+    for field in ("name", "city"):
+        if lead.get(field):
+            known.update(lead[field].lower().split())
+    text = found.lower
+    if "@" in text:
+        text = " ".join(word for word in text.split() if "@" not in word)
+    return [w for w in _WORD_RE.findall(text) if w not in _FILLER and w not in known]
+
+
+def templated_reply(lead: dict, before: dict, found, history: list):
+    """Reply for a predictable turn, SHOW_PROPERTIES, or None to let the LLM answer.
+
+    lead/before: lead fields after/before this turn's extraction; found: the
+    turn's slots.scan(); history: conversation so far (this turn included).
+    """
+    leftover = _leftover(found, lead)
+    if leftover is None:
+        return None
+
+    captured = [field for field in ("name", "phone", "email") if lead.get(field) and not before.get(field)]
+    if any(lead.get(field) != before.get(field) for field in ("city", "bhk", "budget")):
+        captured.append("preference")
+    # A stray word next to a slot value is fine ("Rahul here mate"); anything else is open-ended
+    if len(leftover) > (1 if captured else 0):
+        return None
+    words = _WORD_RE.findall(found.lower)
+    affirmative = bool(words) and all(w in _AFFIRMATIVE for w in words)
+
+    missing = _missing(lead)
+    if missing is None:
+        # Lead complete: new details or a "yes" to "shall I show you some properties?"
+        return SHOW_PROPERTIES if captured or affirmative else None
+
+    first_turn = sum(1 for msg in history if msg["role"] == "user") <= 1
+    if captured:
+        opener = _ACKS[captured[0]]
+    elif first_turn:
+        opener = _GREETINGS
+    else:
+        opener = [""]
+
+    values = {"name": lead.get("name", ""), "preference": _preference(lead)}
+    values["Preference"] = values["preference"][:1].upper() + values["preference"][1:]
+    last_reply = next((msg["content"] for msg in reversed(history) if msg["role"] == "assistant"), None)
+
+    # Vary the wording, but never repeat the previous reply word for word
+    for _ in range(3):
+        reply = f"{random.choice(opener).format(**values)} {random.choice(_ASKS[missing])}".strip()
+        if reply != last_reply:
+            break
+    return reply
@@ -11,6 +11,11 @@ Schema:
   "requires_confirmation": true | false
 }
 
+Intents (use one of these names):
+greeting, provide_name, provide_phone, provide_email, search_properties,
+more_options, similar_properties, ask_price, ask_amenities, ask_possession,
+ask_location, schedule_visit, affirm, deny, goodbye, account_details
+
 Available tools:
 - get_account_details(account_id?: string)
 
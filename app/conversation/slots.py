@@ -0,0 +1,379 @@
+"""
+Compiled slot and intent extraction for chat and voice turns.
+
+Every keyword the conversation code looks for (city names and aliases,
+end / show / more / similar triggers, name cues, BHK units) lives in one
+Aho-Corasick automaton built at import time, so an utterance is scanned
+once, in time linear in its length, however many keywords there are. The
+phone, email, name, BHK and budget regexes are compiled once and only run
+when the scan saw something for them to match; fuzzy city matching is
+memoized per word.
+
+Keywords keep the old substring semantics ("end" still fires inside
+"weekend"), so ConversationManager and the voice lead capture extract
+exactly what they did before.
+
+Benchmark:  python -m app.conversation.slots bench
+"""
+
+import re
+import sys
+import time
+from collections import deque
+from difflib import get_close_matches
+from functools import lru_cache
+from typing import NamedTuple
+
+# Known cities for fuzzy matching
+KNOWN_CITIES = ["Bangalore", "Mumbai", "Thane", "Whitefield", "Electronic City",
+                "Sarjapur", "Yelahanka", "Hebbal", "Bandra", "Andheri", "Powai"]
+
+# Chat city aliases, earlier entries win
+CITY_ALIASES = {
+    "bangalore": "Bangalore", "bengaluru": "Bangalore", "blr": "Bangalore",
+    "mumbai": "Mumbai", "bombay": "Mumbai",
+    "thane": "Thane",
+    "whitefield": "Whitefield",
+    "electronic city": "Electronic City", "ec": "Electronic City",
+}
+
+# Voice lead capture locations, earlier cities win
+LEAD_LOCATIONS = {
+    'bangalore': ['bangalore', 'bengaluru', 'banglore', 'blr'],
+    'thane': ['thane', 'thaney'],
+    'mumbai': ['mumbai', 'bombay'],
+    'whitefield': ['whitefield'],
+    'electronic city': ['electronic city'],
+    'sarjapur': ['sarjapur'],
+    'koramangala': ['koramangala'],
+    'indiranagar': ['indiranagar']
+}
+
+INTENT_TRIGGERS = {
+    "end": ["bye", "goodbye", "that's all", "done", "end", "later", "no thanks", "exit", "quit"],
+    "show": ["show", "display", "list", "see", "view", "get", "find", "search", "property", "properties"],
+    "more": ["more option", "more propert", "show more", "any more", "anything else", "other option"],
+    "similar": ["similar", "something like", "like that", "like this", "like the", "same kind", "more like"],
+    # Only gate the regexes below; never reported as intents on their own
+    "name": ["my name is", "name is", "i am", "i'm", "this is", "call me", "it's", "its"],
+    "bhk": ["bhk", "bed"],
+}
+
+# Words that look like a name after "i am" / on their own but aren't
+NAME_EXCLUDED = frozenset([
+    "looking", "interested", "fine", "good", "ok", "yes", "no",
+    "bye", "goodbye", "thanks", "thank", "hi", "hello", "hey",
+    "show", "property", "apartment", "flat", "house", "home",
+    "schedule", "site", "visit", "want", "need", "please",
+    "great", "awesome", "sure", "okay", "yeah", "yup", "nope",
+])
+
+# Common email typos, checked on the lowercased address
+EMAIL_TLD_TYPOS = {
+    '.cm': '.com',
+    '.con': '.com',
+    '.cpm': '.com',
+    '.vom': '.com',
+    '.ocm': '.com',
+    '.comm': '.com',
+    '.coм': '.com',
+    '.iin': '.in',
+    '.orgg': '.org',
+}
+EMAIL_DOMAIN_TYPOS = {
+    'gmial.com': 'gmail.com',
+    'gmal.com': 'gmail.com',
+    'gamil.com': 'gmail.com',
+    'gnail.com': 'gmail.com',
+    'gmaill.com': 'gmail.com',
+    'gmali.com': 'gmail.com',
+    'yaho.com': 'yahoo.com',
+    'yahooo.com': 'yahoo.com',
+    'yaoo.com': 'yahoo.com',
+    'hotmal.com': 'hotmail.com',
+    'hotmial.com': 'hotmail.com',
+    'outloo.com': 'outlook.com',
+    'outlok.com': 'outlook.com',
+}
+_VALID_TLDS = ['com', 'in', 'org', 'net', 'co', 'io', 'edu', 'gov', 'info', 'biz', 'co.in', 'org.in', 'ac.in',
+               'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com']
+# "name@x.com" / "name@gmail.com" style endings an address must have (str.endswith tuple)
+EMAIL_VALID_ENDINGS = tuple(f"{sep}{tld}" for tld in _VALID_TLDS for sep in ".@")
+
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+_NON_DIGIT_RE = re.compile(r'\D')
+
+# Chat turn patterns (ConversationManager)
+_NAME_CUE_RE = re.compile(r"(?:my name is|i am|i'm|this is|call me|it's|its)\s+([a-zA-Z]+)", re.I)
+_SINGLE_NAME_RE = re.compile(r"^([A-Z][a-z]{2,15})$", re.I)  # Single capitalized word (2-15 chars)
+_BHK_RE = re.compile(r'([1-4])\s*(?:bhk|bedroom|bed)')
+_BUDGET_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(cr|crore|lakh|lac|l)\b')
+
+# Whole-transcript patterns (voice lead capture)
+_LEAD_NAME_RES = [
+    re.compile(r"(?:my name is|i am|i'm|this is|call me)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", re.I),
+    re.compile(r"(?:name is)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", re.I),
+]
+_LEAD_PHONE_RES = [
+    re.compile(r'\b([6-9]\d{9})\b'),
+    re.compile(r'\+91[\s-]?(\d{10})'),
+]
+_LEAD_CRORE_RE = re.compile(r'(\d+\.?\d*)\s*(?:crore|cr)')
+_LEAD_LAKH_RE = re.compile(r'(\d+\.?\d*)\s*(?:lakh|lac)')
+_LEAD_BHK_RE = re.compile(r'(\d)\s*(?:bhk|bedroom)')
+
+
+class KeywordAutomaton:
+    """Aho-Corasick matcher: every keyword occurring in a text, in one pass.
+
+    Built as a full DFA over the keywords' alphabet, so each input
+    character costs one dict lookup; characters outside it reset to the root.
+    """
+
+    def __init__(self, keywords):
+        """keywords: iterable of (keyword, payload); find() returns the payloads."""
+        goto, out = [{}], [set()]
+        for keyword, payload in keywords:
+            state = 0
+            for ch in keyword:
+                if ch not in goto[state]:
+                    goto.append({})
+                    out.append(set())
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            out[state].add(payload)
+
+        # Breadth-first: fail links, outputs merged along them, missing edges filled in
+        delta = [dict(goto[0])]
+        delta.extend({} for _ in goto[1:])
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            out[state] |= out[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0)
+                delta[state][ch] = child
+                queue.append(child)
+
+        self._delta = delta
+        self._out = [frozenset(o) for o in out]
+
+    def __len__(self):
+        return len(self._delta)
+
+    def find(self, text: str) -> set:
+        """Payloads of all keywords that occur in text (overlaps included)."""
+        found = set()
+        delta, out = self._delta, self._out
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+def _keywords():
+    for rank, (alias, city) in enumerate(CITY_ALIASES.items()):
+        yield alias, ("city", rank, city)
+    for rank, (city, aliases) in enumerate(LEAD_LOCATIONS.items()):
+        for alias in aliases:
+            yield alias, ("location", rank, city.title())
+    for intent, triggers in INTENT_TRIGGERS.items():
+        for trigger in triggers:
+            yield trigger, ("intent", 0, intent)
+
+
+_AUTOMATON = KeywordAutomaton(_keywords())
+_KNOWN_CITIES_LOWER = {city.lower(): city for city in KNOWN_CITIES}
+
+
+class Scan(NamedTuple):
+    """Everything the keyword pass found in one utterance."""
+    text: str
+    lower: str
+    intents: frozenset  # "end", "show", "more", "similar" (+ "name"/"bhk" regex gates)
+    city: str           # chat city: first alias, else a fuzzy word match (or None)
+    location: str       # voice lead city (or None)
+    digits: str         # every digit in the text, concatenated
+
+
+@lru_cache(maxsize=4096)
+def fuzzy_city(word: str):
+    """Known city a (lowercase) word is a likely typo of, e.g. "mumbay" -> "Mumbai"."""
+    matches = get_close_matches(word, list(_KNOWN_CITIES_LOWER), n=1, cutoff=0.7)
+    return _KNOWN_CITIES_LOWER[matches[0]] if matches else None
+
+
+@lru_cache(maxsize=256)
+def scan(text: str) -> Scan:
+    """Single keyword pass over an utterance (memoized: callers in one turn share it)."""
+    lower = (text or "").lower()
+    intents, cities, locations = set(), [], []
+    for group, rank, value in _AUTOMATON.find(lower):
+        if group == "intent":
+            intents.add(value)
+        else:
+            (cities if group == "city" else locations).append((rank, value))
+
+    city = min(cities)[1] if cities else None
+    if city is None:
+        # Fuzzy matching for typos
+        for word in lower.split():
+            if len(word) >= 4:  # Only check words with 4+ chars
+                city = fuzzy_city(word)
+                if city:
+                    break
+
+    return Scan(
+        text=text or "",
+        lower=lower,
+        intents=frozenset(intents),
+        city=city,
+        location=min(locations)[1] if locations else None,
+        digits=_NON_DIGIT_RE.sub("", text or ""),
+    )
+
+
+def extract_email(s: Scan):
+    """First email-looking match (original case) or None."""
+    if "@" not in s.text:
+        return None
+    match = EMAIL_RE.search(s.text.rstrip('.,!?;:'))
+    return match.group() if match else None
+
+
+def extract_name(s: Scan):
+    """Name given in a chat turn ("I'm Rahul", or just "Rahul")."""
+    patterns = []
+    if "name" in s.intents:
+        patterns.append(_NAME_CUE_RE)
+    if len(s.text) <= 17:
+        patterns.append(_SINGLE_NAME_RE)
+    for pattern in patterns:
+        match = pattern.search(s.text)
+        if match:
+            name = match.group(1).title()
+            if name.lower() not in NAME_EXCLUDED and 2 <= len(name) <= 20:
+                return name
+    return None
+
+
+def extract_bhk(s: Scan):
+    """"2 BHK" from "2bhk" / "2 bedroom", or None."""
+    if "bhk" not in s.intents:
+        return None
+    match = _BHK_RE.search(s.lower)
+    return f"{match.group(1)} BHK" if match else None
+
+
+def extract_budget(s: Scan):
+    """"1.5 crore" / "80 lakh", or None."""
+    if not s.digits:
+        return None
+    match = _BUDGET_RE.search(s.lower)
+    if not match:
+        return None
+    num, unit = match.group(1), match.group(2)
+    return f"{num} crore" if unit in ('cr', 'crore') else f"{num} lakh"
+
+
+def extract_lead_info(user_text: str) -> dict:
+    """Lead fields from a whole conversation's user text (voice lead capture)."""
+    s = scan(user_text)
+    info = {
+        "fullName": None,
+        "emailAddress": None,
+        "mobileNumber": None,
+        "city": s.location,
+        "budget": None,
+        "configuration": None
+    }
+
+    if "name" in s.intents:
+        for pattern in _LEAD_NAME_RES:
+            match = pattern.search(user_text)
+            if match:
+                info["fullName"] = match.group(1).strip().title()
+                break
+
+    # Indian 10-digit mobile
+    if len(s.digits) >= 10:
+        for pattern in _LEAD_PHONE_RES:
+            match = pattern.search(user_text)
+            if match:
+                phone = re.sub(r'[\s-]', '', match.group(1))
+                if len(phone) == 10:
+                    info["mobileNumber"] = phone
+                    break
+
+    if "@" in user_text:
+        match = EMAIL_RE.search(user_text)
+        if match:
+            info["emailAddress"] = match.group(0).lower()
+
+    if s.digits:
+        cr_match = _LEAD_CRORE_RE.search(s.lower)
+        lakh_match = _LEAD_LAKH_RE.search(s.lower)
+        if cr_match:
+            info["budget"] = f"{cr_match.group(1)} crore"
+        elif lakh_match:
+            info["budget"] = f"{lakh_match.group(1)} lakh"
+
+    if "bhk" in s.intents:
+        bhk_match = _LEAD_BHK_RE.search(s.lower)
+        if bhk_match:
+            info["configuration"] = f"{bhk_match.group(1)} BHK"
+
+    return info
+
+
+SAMPLE_TURNS = [
+    "Hi, I am looking for property in Bangalore",
+    "My name is Rahul",
+    "9876543210",
+    "rahul.sharma@gmail.com",
+    "I want a 2 BHK under 1.5 crore near whitefeild",
+    "show me something similar to the first one",
+    "any more options in mumbay?",
+    "ok thanks, that's all for today, bye",
+    "Can you tell me about the amenities and possession date of the Thane project",
+]
+
+
+def benchmark(turns=SAMPLE_TURNS, runs: int = 2000):
+    """Per-turn extraction latency, with the scan memo cleared (cold) and warm."""
+    def extract_all(text):
+        s = scan(text)
+        return (s.city, extract_email(s), extract_name(s), extract_bhk(s), extract_budget(s),
+                "end" in s.intents, "show" in s.intents)
+
+    print(f"🔤 Slot automaton: {len(_AUTOMATON)} states")
+    for label, clear in (("cold", True), ("warm", False)):
+        start = time.perf_counter()
+        for _ in range(runs):
+            for text in turns:
+                if clear:
+                    scan.cache_clear()
+                extract_all(text)
+        elapsed = (time.perf_counter() - start) / (runs * len(turns))
+        print(f"   chat turn ({label}): {elapsed*1e6:.1f}µs")
+
+    transcript = " ".join(turns)
+    start = time.perf_counter()
+    for _ in range(runs):
+        scan.cache_clear()
+        extract_lead_info(transcript)
+    elapsed = (time.perf_counter() - start) / runs
+    print(f"   voice transcript ({len(transcript)} chars): {elapsed*1e6:.1f}µs")
+    for text in turns:
+        print(f"   {text!r}: {extract_all(text)}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["bench"]:
+        print("Usage: python -m app.conversation.slots bench")
+        sys.exit(1)
+    benchmark()
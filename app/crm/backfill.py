@@ -0,0 +1,264 @@
+"""
+Bulk lead extraction from archived voice transcripts.
+
+/api/voice/capture-lead handles one transcript per request; this job
+backfills archives of ElevenLabs conversations. NDJSON files are streamed
+line by line and handed to a process pool in chunks of BACKFILL_CHUNK_SIZE
+raw lines. Workers parse the JSON and run the same extraction as
+/capture-lead (slots.extract_lead_info), so the parent only reads, writes
+and pushes. At most a few chunks per worker are in flight, keeping memory
+constant for archives of any size.
+
+One transcript per line:
+
+    {"session_id": "...", "transcript": [{"role": "user", "text": "..."}, {"role": "agent", "text": "..."}]}
+
+("conversation_id" / "messages" / "message" are accepted too, as exported
+by ElevenLabs.) Transcripts with a name, phone or email are written to
+--out as NDJSON; --push also creates the complete ones (name + phone) in
+Salesforce in batches of BACKFILL_CRM_BATCH, once per mobile number. Numbers
+are only deduplicated within one run: running --push again over the same
+archive creates every lead again. Only connection errors and 5xx responses
+are retried, since a lead POST that reached Salesforce may have created it.
+
+    python -m app.crm.backfill archive/*.ndjson --out leads.ndjson [--workers 8] [--chunk-size 500]
+    python -m app.crm.backfill archive/*.ndjson --push
+"""
+
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import requests
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential
+
+from app.conversation.slots import extract_lead_info
+
+BACKFILL_CHUNK_SIZE = 500
+# Chunks queued per worker; enough to keep every worker busy while the parent writes
+CHUNKS_IN_FLIGHT = 4
+BACKFILL_CRM_BATCH = 50
+CRM_CONCURRENCY = 4
+MAX_ERRORS = 100
+
+
+def _user_text(record: dict) -> str:
+    messages = record.get("transcript") or record.get("messages") or []
+    if not isinstance(messages, list):
+        raise ValueError("transcript must be a list of messages")
+    return " ".join(
+        str(m.get("text") or m.get("message") or "")
+        for m in messages
+        if isinstance(m, dict) and m.get("role") == "user"
+    )
+
+
+def _retryable(error: Exception) -> bool:
+    """Lead POSTs aren't idempotent: retry only when the request failed to connect or Salesforce failed (5xx)."""
+    from app.crm.create_lead import SalesforceLeadError
+
+    if isinstance(error, SalesforceLeadError):
+        return error.status_code >= 500
+    return isinstance(error, requests.ConnectionError)
+
+
+def extract_chunk(chunk):
+    """Worker: (path, first line number, raw lines, keep leads) -> (lead NDJSON lines, complete leads, invalid, counts).
+
+    Complete leads (name + phone) are returned as dicts only when keep is set (CRM push).
+    """
+    path, first_line, lines, keep = chunk
+    start = time.process_time()
+    out, complete, invalid = [], [], []
+    transcripts = complete_count = 0
+    for line_no, line in enumerate(lines, first_line):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            info = extract_lead_info(_user_text(record))
+        except Exception as e:
+            # One malformed record must not abort the whole chunk (and the run)
+            invalid.append({"file": path, "line": line_no, "error": str(e)})
+            continue
+        transcripts += 1
+        if not (info["fullName"] or info["mobileNumber"] or info["emailAddress"]):
+            continue
+        lead = {
+            "session_id": record.get("session_id") or record.get("conversation_id") or record.get("id"),
+            "file": path,
+            "line": line_no,
+            **info,
+        }
+        # PERFORMANCE: serialized here so the parent only writes
+        out.append(json.dumps(lead, ensure_ascii=False) + "\n")
+        if info["fullName"] and info["mobileNumber"]:
+            complete_count += 1
+            if keep:
+                complete.append(lead)
+    counts = {"transcripts": transcripts, "complete": complete_count, "cpu_seconds": time.process_time() - start}
+    return out, complete, invalid, counts
+
+
+def iter_chunks(paths, chunk_size: int = BACKFILL_CHUNK_SIZE):
+    """(path, first line number, lines) chunks of every file, read lazily."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            lines, first = [], 1
+            for line_no, line in enumerate(f, 1):
+                lines.append(line)
+                if len(lines) >= chunk_size:
+                    yield path, first, lines
+                    lines, first = [], line_no + 1
+            if lines:
+                yield path, first, lines
+
+
+class CRMPusher:
+    """Creates complete leads in Salesforce in batches, once per mobile number (within this run only)."""
+
+    def __init__(self, batch_size: int = BACKFILL_CRM_BATCH, max_concurrency: int = CRM_CONCURRENCY):
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.pending = []
+        self.seen = set()
+        self.token = None
+        self.report = {"pushed": 0, "duplicates": 0, "failed": 0, "errors": []}
+
+    def add(self, lead: dict):
+        if lead["mobileNumber"] in self.seen:
+            self.report["duplicates"] += 1
+            return
+        self.seen.add(lead["mobileNumber"])
+        self.pending.append(lead)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def _push(self, lead: dict):
+        from app.crm.create_lead import create_salesforce_lead, web_to_lead_payload
+
+        for attempt in Retrying(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, max=8),
+                                retry=retry_if_exception(_retryable), reraise=True):
+            with attempt:
+                # quiet: no per-lead log lines with names and numbers for a whole archive
+                create_salesforce_lead(web_to_lead_payload(lead), self.token["access_token"], self.token["instance_url"],
+                                       quiet=True)
+
+    def flush(self):
+        if not self.pending:
+            return
+        from app.crm.salesforce_auth import get_access_token
+
+        batch, self.pending = self.pending, []
+        try:
+            # One OAuth token per batch rather than per lead
+            self.token = get_access_token()
+        except Exception as e:
+            self._failed(batch, e)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = [(lead, pool.submit(self._push, lead)) for lead in batch]
+            for lead, future in futures:
+                try:
+                    future.result()
+                    self.report["pushed"] += 1
+                except Exception as e:
+                    self._failed([lead], e)
+
+    def _failed(self, leads, error):
+        self.report["failed"] += len(leads)
+        for lead in leads:
+            if len(self.report["errors"]) < MAX_ERRORS:
+                self.report["errors"].append({"file": lead["file"], "line": lead["line"], "error": str(error)})
+
+
+def backfill(paths, out=None, push: bool = False, workers: int = None, chunk_size: int = BACKFILL_CHUNK_SIZE) -> dict:
+    """Extract leads from NDJSON transcript files across a process pool.
+
+    out: writable text file for the lead NDJSON (None = don't write).
+    Returns counts, invalid lines, CRM results and throughput.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.time()
+    report = {"files": len(paths), "workers": workers, "transcripts": 0, "leads": 0, "complete": 0,
+              "invalid": 0, "errors": [], "cpu_seconds": 0.0}
+    pusher = CRMPusher() if push else None
+
+    def collect(result):
+        lines, complete, invalid, counts = result
+        report["transcripts"] += counts["transcripts"]
+        report["complete"] += counts["complete"]
+        report["cpu_seconds"] += counts["cpu_seconds"]
+        report["leads"] += len(lines)
+        report["invalid"] += len(invalid)
+        report["errors"].extend(invalid[:MAX_ERRORS - len(report["errors"])])
+        if out is not None:
+            out.writelines(lines)
+        for lead in complete:
+            pusher.add(lead)
+
+    # PERFORMANCE: bounded window of chunks, collected in submission order (deterministic output)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for path, first_line, lines in iter_chunks(paths, chunk_size):
+            in_flight.append(pool.submit(extract_chunk, (path, first_line, lines, push)))
+            if len(in_flight) >= workers * CHUNKS_IN_FLIGHT:
+                collect(in_flight.popleft().result())
+        while in_flight:
+            collect(in_flight.popleft().result())
+    if pusher:
+        pusher.flush()
+        report["crm"] = pusher.report
+
+    seconds = time.time() - start
+    report["seconds"] = round(seconds, 3)
+    report["cpu_seconds"] = round(report["cpu_seconds"], 3)
+    report["per_second"] = round(report["transcripts"] / seconds, 1) if seconds else 0.0
+    report["per_second_per_worker"] = round(report["per_second"] / workers, 1)
+    # Extraction rate of one core, independent of pool overhead and I/O
+    report["per_cpu_second"] = round(report["transcripts"] / report["cpu_seconds"], 1) if report["cpu_seconds"] else 0.0
+    return report
+
+
+def _option(args, name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--out", "--workers", "--chunk-size"}
+    paths = [a for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or args[i - 1] not in options)]
+    if not paths:
+        print("Usage: python -m app.crm.backfill <transcripts.ndjson ...> [--out leads.ndjson] [--push] "
+              "[--workers N] [--chunk-size N]")
+        sys.exit(1)
+
+    out_path = _option(args, "--out")
+    out = open(out_path, "w", encoding="utf-8") if out_path else None
+    try:
+        report = backfill(paths, out=out, push="--push" in args,
+                          workers=int(_option(args, "--workers", 0)) or None,
+                          chunk_size=int(_option(args, "--chunk-size", BACKFILL_CHUNK_SIZE)))
+    finally:
+        if out:
+            out.close()
+
+    print(f"📇 Backfill: {report['transcripts']} transcripts from {report['files']} files "
+          f"({report['invalid']} invalid lines) in {report['seconds']}s with {report['workers']} workers")
+    print(f"   throughput: {report['per_second']}/s, {report['per_second_per_worker']}/s per worker, "
+          f"{report['per_cpu_second']} per CPU-second of extraction")
+    print(f"   leads: {report['leads']} ({report['complete']} with name + phone)"
+          + (f", written to {out_path}" if out_path else ""))
+    if "crm" in report:
+        crm = report["crm"]
+        print(f"   CRM: {crm['pushed']} pushed, {crm['duplicates']} duplicate numbers, {crm['failed']} failed")
+        print("   note: numbers are only deduplicated within this run - pushing the same archive again creates the leads again")
+        for error in crm["errors"]:
+            print(f"   {error['file']}:{error['line']}: {error['error']}")
+    for error in report["errors"]:
+        print(f"   {error['file']}:{error['line']}: {error['error']}")
@@ -1,9 +1,39 @@
 import requests
 import os
 
+# Seconds to wait for Salesforce to answer a lead request
+SF_REQUEST_TIMEOUT = float(os.getenv("SF_REQUEST_TIMEOUT", "15"))
 
-def create_salesforce_lead(payload, access_token, instance_url=None):
-    """Create a lead in Salesforce using the WebToLead API."""
+
+class SalesforceLeadError(Exception):
+    """Salesforce answered a lead request with an error status."""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Salesforce Lead Error {status_code}: {text}")
+        self.status_code = status_code
+
+
+def web_to_lead_payload(info: dict, source: str = "Website") -> dict:
+    """WebToLead request body from extracted lead fields (fullName, mobileNumber, ...).
+
+    Missing fields are sent empty; a lead without a city is never given a default one.
+    """
+    return {"wl": {
+        "fullName": info.get("fullName") or "",
+        "emailAddress": info.get("emailAddress") or "",
+        "mobileNumber": info.get("mobileNumber") or "",
+        "city": info.get("city") or "",
+        "budget": str(info.get("budget") or ""),
+        "configuration": info.get("configuration") or "",
+        "source": source
+    }}
+
+
+def create_salesforce_lead(payload, access_token, instance_url=None, quiet: bool = False):
+    """Create a lead in Salesforce using the WebToLead API.
+
+    quiet skips the per-lead logging (which includes the caller's details) for bulk jobs.
+    """
     # Use the specific endpoint from env, or fallback to instance_url
     url = os.getenv("SF_CREATE_LEAD_URL")
 
@@ -15,16 +45,17 @@ def create_salesforce_lead(payload, access_token, instance_url=None):
         "Content-Type": "application/json"
     }
 
-    print(f"Creating Salesforce lead at: {url}")
-    print(f"Payload: {payload}")
+    if not quiet:
+        print(f"Creating Salesforce lead at: {url}")
+        print(f"Payload: {payload}")
 
-    response = requests.post(url, json=payload, headers=headers)
+    response = requests.post(url, json=payload, headers=headers, timeout=SF_REQUEST_TIMEOUT)
 
     if response.status_code not in (200, 201):
-        print(f"Salesforce Lead Error: {response.status_code} - {response.text}")
-        raise Exception(
-            f"Salesforce Lead Error {response.status_code}: {response.text}"
-        )
+        if not quiet:
+            print(f"Salesforce Lead Error: {response.status_code} - {response.text}")
+        raise SalesforceLeadError(response.status_code, response.text)
 
-    print(f"Salesforce Lead Created: {response.text}")
+    if not quiet:
+        print(f"Salesforce Lead Created: {response.text}")
     return response.json() if response.text else {"status": "success"}
@@ -1,6 +1,8 @@
 import requests
 import os
 
+from app.crm.create_lead import SF_REQUEST_TIMEOUT
+
 SF_AUTH_URL = os.getenv("SF_AUTH_URL")
 SF_CLIENT_ID = os.getenv("SF_CLIENT_ID")
 SF_CLIENT_SECRET = os.getenv("SF_CLIENT_SECRET")
@@ -20,7 +22,7 @@ def get_access_token():
         "password": os.getenv("SF_PASSWORD"),
     }
 
-    response = requests.post(url, data=payload)
+    response = requests.post(url, data=payload, timeout=SF_REQUEST_TIMEOUT)
 
     if response.status_code != 200:
         print(f"Salesforce Auth Error: {response.status_code} - {response.text}")
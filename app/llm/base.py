@@ -4,3 +4,7 @@ from typing import List, Dict
 class LLMClient:
     def generate(self, system_prompt: str, user_text: str, history: List[Dict] = None) -> str:
         raise NotImplementedError
+
+    def complete(self, messages: List[Dict]) -> str:
+        """Reply to an already assembled chat message list."""
+        raise NotImplementedError
@@ -6,11 +6,18 @@ from dotenv import load_dotenv
 from openai import OpenAI
 
 from app.llm.base import LLMClient
+from app.llm.response_cache import cached_reply, fingerprint
 
 load_dotenv()
 
 
 class OpenAIClient(LLMClient):
+    MODEL = "gpt-4o-mini"
+    # PERFORMANCE: Very short responses for voice
+    MAX_TOKENS = 80
+    # PERFORMANCE: Lower temperature = faster, more deterministic
+    TEMPERATURE = 0.3
+
     def __init__(self):
         api_key = os.getenv("OPENAI_API_KEY")
 
@@ -25,8 +32,6 @@ class OpenAIClient(LLMClient):
         self.client = OpenAI(api_key=api_key, http_client=http_client)
 
     def generate(self, system_prompt: str, user_text: str, history: List[Dict] = None) -> str:
-        start = time.time()
-
         messages = [{"role": "system", "content": system_prompt}]
 
         # Add conversation history if provided (limit to last 4 messages for speed)
@@ -35,17 +40,29 @@ class OpenAIClient(LLMClient):
 
         # Add current user message
         messages.append({"role": "user", "content": user_text})
+        if history:
+            return self.complete(messages)
+        # PERFORMANCE: without history the reply depends only on the prompt, the text and the model settings
+        return cached_reply(user_text, self.cache_context(system_prompt), lambda: self.complete(messages))
+
+    def cache_context(self, *parts) -> str:
+        """Response-cache context for a reply that depends on parts plus this client's model settings."""
+        return fingerprint(self.MODEL, self.MAX_TOKENS, self.TEMPERATURE, *parts)
+
+    def complete(self, messages: List[Dict]) -> str:
+        start = time.time()
 
         response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=self.MODEL,
             messages=messages,
-            # PERFORMANCE: Very short responses for voice
-            max_tokens=80,
-            # PERFORMANCE: Lower temperature = faster, more deterministic
-            temperature=0.3,
+            max_tokens=self.MAX_TOKENS,
+            temperature=self.TEMPERATURE,
         )
 
         result = response.choices[0].message.content
-        print(f"⚡ OpenAI API call: {(time.time() - start)*1000:.0f}ms, {len(result)} chars")
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        tokens = f", {usage.prompt_tokens} prompt tokens ({getattr(details, 'cached_tokens', 0) or 0} cached)" if usage else ""
+        print(f"⚡ OpenAI API call: {(time.time() - start)*1000:.0f}ms, {len(result)} chars{tokens}")
 
         return result
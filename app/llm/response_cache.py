@@ -0,0 +1,250 @@
+"""
+Response cache for LLM generations.
+
+Openings and acknowledgements ("hi", "show me property in Thane", "ok
+thanks") repeat across calls in the same lead state, and each one was a
+gpt-4o-mini round trip. Replies are cached under (normalized user text,
+context fingerprint) - the context being the prompt version, model settings
+and a lead-state fingerprint (which contact fields are collected, city, BHK,
+budget band; never the caller's details) - with a TTL and an LRU size bound,
+and concurrent identical misses share a single LLM call.
+
+An optional similarity tier (RESPONSE_CACHE_SIMILARITY > 0) also answers
+near-duplicate wordings: the user text is embedded and compared with the
+cached texts of the same context.
+
+Hit rate and LLM time saved: response_cache_stats(), exported as "llm" by
+GET /api/properties/cache-stats.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Reuse LLM replies for the same words in the same lead state
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "true").lower() == "true"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# Cosine similarity for near-duplicate hits (0 = exact normalized text only)
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+# Embedder for the similarity tier, one of app/rag/embedder.py EMBEDDERS
+RESPONSE_CACHE_EMBEDDER = os.getenv("RESPONSE_CACHE_EMBEDDER", "local")
+
+# Words, numbers and emails; punctuation and spacing don't change the reply
+_WORD_RE = re.compile(r"[a-z0-9@]+(?:[.+_-][a-z0-9@]+)*")
+
+
+def normalize_text(text: str) -> str:
+    """ "Hi!!  Show me property in Thane." -> "hi show me property in thane" """
+    return " ".join(_WORD_RE.findall((text or "").lower()))
+
+
+def fingerprint(*parts) -> str:
+    """Short stable hash of the parts (lead status, prompt text)."""
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+class _Flight:
+    """One in-progress miss that identical concurrent requests wait on."""
+
+    __slots__ = ("done", "reply", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.reply = None
+        self.error = None
+
+
+class ResponseCache:
+    """TTL + LRU cache of LLM replies with single-flight misses and an optional similarity tier.
+
+    context is a fingerprint of what besides the user text the reply depends
+    on (prompt version, model settings, lead state); only replies generated
+    in the same context are ever reused.
+    """
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL,
+                 similarity: float = 0.0, embed_fn=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity = similarity if embed_fn else 0.0
+        self._embed = embed_fn
+        self._entries = OrderedDict()  # (text, context) -> (reply, expires_at, llm seconds)
+        self._vectors = {}  # context -> {text: unit vector}, for the similarity tier
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.seconds_saved = 0.0
+        self.llm_seconds = 0.0
+
+    def get_or_generate(self, text: str, context: str, generate) -> str:
+        """Cached reply for text in context, else the result of generate() (called once per miss)."""
+        key = (normalize_text(text), context)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry:
+                self.hits += 1
+                self.seconds_saved += entry[2]
+                return entry[0]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            # PERFORMANCE: an identical miss is already at the LLM - wait for its reply
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                self.coalesced += 1
+            return flight.reply
+
+        try:
+            vector = self._unit_vector(key[0]) if self.similarity else None
+            if vector is not None:
+                similar = self._most_similar(vector, context)
+                if similar:
+                    flight.reply = similar[0]
+                    with self._lock:
+                        self.similar_hits += 1
+                        self.seconds_saved += similar[1]
+                        self._store(key, similar[0], similar[1], None)
+                    return similar[0]
+
+            start = time.perf_counter()
+            reply = generate()
+            seconds = time.perf_counter() - start
+            flight.reply = reply
+            with self._lock:
+                self.misses += 1
+                self.llm_seconds += seconds
+                self._store(key, reply, seconds, vector)
+            return reply
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, reply, seconds, vector):
+        self._entries[key] = (reply, time.monotonic() + self.ttl, seconds)
+        self._entries.move_to_end(key)
+        if vector is not None:
+            self._vectors.setdefault(key[1], {})[key[0]] = vector
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+        bucket = self._vectors.get(key[1])
+        if bucket is not None:
+            bucket.pop(key[0], None)
+            if not bucket:
+                del self._vectors[key[1]]
+
+    def _unit_vector(self, text: str):
+        try:
+            vector = np.asarray(self._embed([text])[0], dtype=np.float32)
+        except Exception as e:
+            print(f"Response cache embedding error: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _most_similar(self, vector, context: str):
+        """(reply, llm seconds) of the closest cached text in context above the threshold, or None."""
+        with self._lock:
+            bucket = self._vectors.get(context)
+            if not bucket:
+                return None
+            texts = list(bucket)
+            scores = np.stack([bucket[t] for t in texts]) @ vector
+            best = int(scores.argmax())
+            if scores[best] < self.similarity:
+                return None
+            entry = self._lookup((texts[best], context))
+            return (entry[0], entry[2]) if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            answered = self.hits + self.similar_hits + self.coalesced
+            lookups = answered + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "similarity": self.similarity,
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(answered / lookups, 4) if lookups else 0.0,
+                "avg_llm_ms": round(self.llm_seconds / self.misses * 1000, 1) if self.misses else 0.0,
+                "llm_seconds_saved": round(self.seconds_saved, 3),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide cache configured from the RESPONSE_CACHE_* env vars."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                embed_fn = None
+                if RESPONSE_CACHE_SIMILARITY > 0:
+                    from app.rag.embedder import get_embedder
+
+                    embed_fn, _ = get_embedder(RESPONSE_CACHE_EMBEDDER)
+                _cache = ResponseCache(similarity=RESPONSE_CACHE_SIMILARITY, embed_fn=embed_fn)
+    return _cache
+
+
+def cached_reply(text: str, context: str, generate) -> str:
+    """generate() through the process-wide cache (or directly when RESPONSE_CACHE=false)."""
+    if not RESPONSE_CACHE:
+        return generate()
+    return get_response_cache().get_or_generate(text, context, generate)
+
+
+def response_cache_stats() -> dict:
+    return get_response_cache().stats() if RESPONSE_CACHE else {"enabled": False}
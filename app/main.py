@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -11,7 +12,11 @@ from app.api.voice_chat_api import router as voice_chat_router
 from app.api.voice_stream_ws import router as voice_ws_router
 from app.api.elevenlabs_agent import router as elevenlabs_router
 from app.api.voice_lead_api import router as voice_lead_router
-from app.api.property_api import router as property_router
+from app.api.property_api import router as property_router, conditional_get
+from app.api.admin_api import router as admin_router
+from app.rag.retriever import property_index
+from app.conversation.intents import get_classifier
+from app.conversation.manager import INTENT_ROUTING
 
 app = FastAPI(title="Raymond Voice Bot")
 
@@ -24,6 +29,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ETag / 304 for /api/properties GETs
+app.middleware("http")(conditional_get)
+
 # Routes
 app.include_router(chat_router)
 app.include_router(voice_chat_router)
@@ -31,6 +39,20 @@ app.include_router(voice_ws_router)
 app.include_router(elevenlabs_router, prefix="/elevenlabs", tags=["ElevenLabs"])
 app.include_router(voice_lead_router, prefix="/api/voice", tags=["Voice Lead"])
 app.include_router(property_router, prefix="/api/properties", tags=["Properties"])
+app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
+
+
+@app.on_event("startup")
+def start_catalog_watcher():
+    # Pick up properties.json edits without restarting workers (0 disables)
+    property_index.start_watcher(float(os.getenv("CATALOG_WATCH_INTERVAL", "5")))
+
+
+@app.on_event("startup")
+def train_intent_classifier():
+    # Train once per worker at startup rather than inside the first conversation turn
+    if INTENT_ROUTING:
+        get_classifier()
 
 @app.get("/")
 def root():
@@ -0,0 +1,176 @@
+"""
+BM25 keyword index over listing descriptions, amenities and landmarks.
+
+"clubhouse", "sky garden" or "near Upvan Lake" are answered from an inverted
+index instead of the embeddings API. Postings are stored CSR-style: one
+int32 row array for the whole vocabulary plus offsets per term. Document
+lengths and IDF are folded into a precomputed float32 impact per posting,
+so a query term is one slice and one scatter-add.
+
+Scoring is Okapi BM25 (k1=1.2, b=0.75) over the three fields as one
+document, with light plural folding ("pools" -> "pool") and stopwords
+("near", "with", "a") dropped from both sides.
+
+Benchmark:  python -m app.rag.bm25 bench [--synthetic 30000]
+"""
+
+import re
+import sys
+import time
+from collections import Counter
+from itertools import repeat
+
+import numpy as np
+
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset((
+    "a", "an", "and", "at", "by", "for", "from", "in", "is", "near", "nearby", "of", "on",
+    "or", "the", "to", "with", "close", "walking", "distance", "km", "i", "want", "looking",
+    "property", "properties", "flat", "flats", "home", "homes", "apartment", "apartments",
+))
+
+
+def _fold(token: str) -> str:
+    """Fold simple plurals so "pools" matches "pool" (but not "glass" -> "glas")."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def terms(text: str) -> list:
+    """Index terms of a text: lowercase alphanumeric tokens, plurals folded, stopwords dropped."""
+    return [_fold(t) for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with BM25 scoring over one catalog snapshot's rows."""
+
+    def __init__(self, catalog, reference=None):
+        """reference: a BM25Index whose corpus statistics (document count, document
+        frequencies, average length) are added to this one's, so scores of a small
+        index (the delta overlay) are comparable with the reference's."""
+        self.size = len(catalog)
+        columns = (catalog.strings("description"), catalog.lists("amenities"), catalog.lists("nearby_landmarks"))
+
+        vocab = {}
+        cached = {}  # field value -> term ids (amenity/landmark names repeat across listings)
+        rows, term_ids, tfs = [], [], []
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for row, (description, amenities, landmarks) in enumerate(zip(*columns)):
+            counts = Counter()
+            for value in (description, *amenities, *landmarks):
+                ids = cached.get(value)
+                if ids is None:
+                    ids = cached[value] = [vocab.setdefault(term, len(vocab)) for term in terms(value)]
+                counts.update(ids)
+            lengths[row] = sum(counts.values())
+            rows.extend(repeat(row, len(counts)))
+            term_ids.extend(counts.keys())
+            tfs.extend(counts.values())
+
+        # PERFORMANCE: group postings by term once (stable sort keeps rows ascending)
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        order = np.argsort(term_ids, kind="stable")
+        self._rows = np.asarray(rows, dtype=np.int32)[order]
+        self._offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=self._offsets[1:])
+        self._vocab = vocab
+
+        # Document lengths -> per-row norm k1 * (1 - b + b * len / avg len)
+        self.total_length = float(lengths.sum())
+        documents, total_length = self.size, self.total_length
+        df = np.diff(self._offsets).astype(np.float64)
+        if reference is not None:
+            documents += reference.size
+            total_length += reference.total_length
+            df += [reference.document_frequency(term) for term in vocab]
+        avg_length = total_length / documents if total_length else 1.0
+        norms = K1 * (1.0 - B + B * lengths / avg_length)
+        idf = np.log1p((documents - df + 0.5) / (df + 0.5))
+
+        # PERFORMANCE: each posting's BM25 contribution is query independent, so it is
+        # computed here once; a query term is then a single scatter-add of its slice
+        tf = np.asarray(tfs, dtype=np.float32)[order]
+        self._impacts = (np.repeat(idf, np.diff(self._offsets)) * tf * (K1 + 1.0)
+                         / (tf + norms[self._rows])).astype(np.float32)
+
+    def __len__(self):
+        return len(self._vocab)
+
+    def document_frequency(self, term: str) -> int:
+        term_id = self._vocab.get(term)
+        return 0 if term_id is None else int(self._offsets[term_id + 1] - self._offsets[term_id])
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every row for query (0 = no query term present)."""
+        score = np.zeros(self.size, dtype=np.float32)
+        for term in set(terms(query)):
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            # Rows are unique within one term's postings, so fancy-index += is safe
+            score[self._rows[start:end]] += self._impacts[start:end]
+        return score
+
+    def top_k(self, query: str, mask=None, k: int = 5) -> list:
+        """[(row, score)] for the k best rows matching at least one query term, best first.
+
+        mask restricts the candidates (structured/facet filters); ties go to the
+        lower row, i.e. the cheaper listing.
+        """
+        score = self.scores(query)
+        hit = score > 0
+        if mask is not None:
+            hit &= mask
+        rows = np.flatnonzero(hit)
+        if rows.size == 0 or k <= 0:
+            return []
+        if rows.size > k:
+            # PERFORMANCE: partition is O(n); only the k winners get sorted
+            rows = rows[np.argpartition(-score[rows], k - 1)[:k]]
+        rows = rows[np.lexsort((rows, -score[rows]))]
+        return [(int(r), float(score[r])) for r in rows]
+
+
+def benchmark(data_path: str, synthetic: int = 0, queries=("clubhouse", "sky garden", "near Upvan Lake", "swimming pool gym")):
+    """Index build time and per-query latency on the catalog (or a synthetic one of N rows)."""
+    import json
+
+    from app.rag.catalog import InMemoryCatalog, _synthetic_catalog
+
+    if synthetic:
+        properties = _synthetic_catalog(synthetic, data_path)
+    else:
+        with open(data_path, "r", encoding="utf-8") as f:
+            properties = json.load(f)
+    catalog = InMemoryCatalog(properties)
+
+    start = time.perf_counter()
+    index = BM25Index(catalog)
+    print(f"📚 BM25 index: {len(catalog)} properties, {len(index)} terms, {index._rows.size} postings "
+          f"in {(time.perf_counter() - start)*1000:.0f}ms")
+
+    for query in queries:
+        runs = 200
+        start = time.perf_counter()
+        for _ in range(runs):
+            hits = index.top_k(query, k=5)
+        elapsed = (time.perf_counter() - start) / runs
+        print(f"   {query!r}: {elapsed*1e6:.0f}µs, top {[catalog.records[r]['id'] for r, _ in hits[:3]]}")
+
+
+if __name__ == "__main__":
+    import os
+
+    args = sys.argv[1:]
+    if args[:1] != ["bench"]:
+        print("Usage: python -m app.rag.bm25 bench [--synthetic N]")
+        sys.exit(1)
+
+    default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "properties.json")
+    synthetic = int(args[args.index("--synthetic") + 1]) if "--synthetic" in args else 0
+    benchmark(default_path, synthetic)
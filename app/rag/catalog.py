@@ -0,0 +1,358 @@
+"""
+Catalog storage backends for CatalogSnapshot.
+
+InMemoryCatalog wraps a list of property dicts (parsed properties.json).
+ColumnarCatalog memory-maps a compiled snapshot of the same catalog:
+numeric columns are .npy arrays, string columns and the full JSON records
+live in offset-indexed blobs. Workers share the pages through the OS cache
+and only the handful of records returned by a search are ever decoded.
+
+Both expose rows in (price, id) order with the same interface:
+    len(catalog), catalog.records[row], catalog.strings(name),
+    catalog.lists(name), catalog.numbers(name)
+
+Compile:    python -m app.rag.catalog compile
+Benchmark:  python -m app.rag.catalog bench [--synthetic 20000]
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+STRING_COLUMNS = (
+    "id", "name", "location", "city", "bhk", "type", "possession",
+    "builder", "facing", "nearby_metro", "nearby_mall", "description",
+)
+LIST_COLUMNS = ("nearby_landmarks", "amenities")
+NUMERIC_COLUMNS = ("price", "area_sqft", "price_per_sqft")
+
+# Separator for list columns inside one string cell
+_LIST_SEP = "\x1f"
+
+# Decoded records kept per columnar snapshot
+RECORD_CACHE_SIZE = 4096
+
+
+def freeze(value):
+    """Return a read-only copy of a JSON value (dicts become mapping proxies, lists tuples)."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """Plain JSON-serializable copy of a frozen record (inverse of freeze)."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+
+def price_key(prop) -> float:
+    """Price used for ordering; unpriced listings sort after everything else."""
+    price = prop.get("price")
+    return price if price is not None else float("inf")
+
+
+def row_order(properties) -> list:
+    """Properties in (price, id) order - the row numbering used by every index."""
+    return sorted(properties, key=lambda p: (price_key(p), str(p["id"])))
+
+
+def source_fingerprint(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def _number(value) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else float("nan")
+
+
+class InMemoryCatalog:
+    """Catalog backed by a list of parsed property dicts."""
+
+    def __init__(self, properties):
+        self.records = [freeze(p) for p in row_order(properties)]
+
+    def __len__(self):
+        return len(self.records)
+
+    def strings(self, name):
+        return [p.get(name) or "" for p in self.records]
+
+    def lists(self, name):
+        return [tuple(p.get(name) or ()) for p in self.records]
+
+    def numbers(self, name):
+        if name == "price":
+            return np.array([price_key(p) for p in self.records], dtype=np.float64)
+        return np.array([_number(p.get(name)) for p in self.records], dtype=np.float64)
+
+
+class _BlobColumn:
+    """Sequence of strings stored as one utf-8 blob plus int64 offsets."""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def raw(self, row) -> bytes:
+        return self._blob[int(self._offsets[row]):int(self._offsets[row + 1])]
+
+    def __getitem__(self, row):
+        return self.raw(row).decode("utf-8")
+
+    def __iter__(self):
+        offsets = self._offsets.tolist()
+        blob = self._blob
+        for start, end in zip(offsets, offsets[1:]):
+            yield blob[start:end].decode("utf-8")
+
+
+class _LazyRecords:
+    """Sequence of frozen property records decoded from the blob on access."""
+
+    def __init__(self, column: _BlobColumn):
+        self._column = column
+        self._decode = lru_cache(maxsize=RECORD_CACHE_SIZE)(self._decode_row)
+
+    def _decode_row(self, row):
+        return freeze(json.loads(self._column.raw(row)))
+
+    def __len__(self):
+        return len(self._column)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self._decode(r) for r in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self._decode(row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self._decode(row)
+
+
+def _write_blob(directory, name, values):
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    with open(os.path.join(directory, f"{name}.blob"), "wb") as f:
+        for b in encoded:
+            f.write(b)
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+
+
+def _open_blob(directory, name) -> _BlobColumn:
+    offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode="r")
+    path = os.path.join(directory, f"{name}.blob")
+    if os.path.getsize(path) == 0:
+        return _BlobColumn(b"", offsets)
+    with open(path, "rb") as f:
+        # The mapping stays valid after the file object is closed
+        return _BlobColumn(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), offsets)
+
+
+class ColumnarCatalog:
+    """Memory-mapped compiled catalog (see compile_catalog)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.fingerprint = self.meta["source_fingerprint"]
+        self._columns = {}
+        self.records = _LazyRecords(_open_blob(directory, "records"))
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def _blob(self, name):
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = _open_blob(self.directory, name)
+        return column
+
+    def strings(self, name):
+        return self._blob(name)
+
+    def lists(self, name):
+        return [tuple(s.split(_LIST_SEP)) if s else () for s in self._blob(name)]
+
+    def numbers(self, name):
+        return np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+
+
+def compiled_root(data_path: str) -> str:
+    """Directory holding compiled snapshots, one subdirectory per source fingerprint."""
+    return f"{os.path.splitext(data_path)[0]}.catalog"
+
+
+def compile_catalog(properties, out_dir: str, fingerprint: str):
+    """Write the columnar snapshot of properties into out_dir (atomically)."""
+    rows = row_order(properties)
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    for name in NUMERIC_COLUMNS:
+        if name == "price":
+            values = [price_key(p) for p in rows]
+        else:
+            values = [_number(p.get(name)) for p in rows]
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.array(values, dtype=np.float64))
+
+    for name in STRING_COLUMNS:
+        _write_blob(tmp_dir, name, [str(p.get(name) or "") for p in rows])
+    for name in LIST_COLUMNS:
+        _write_blob(tmp_dir, name, [_LIST_SEP.join(p.get(name) or ()) for p in rows])
+    _write_blob(tmp_dir, "records", [json.dumps(p, ensure_ascii=False, separators=(",", ":")) for p in rows])
+
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "format_version": FORMAT_VERSION,
+            "count": len(rows),
+            "source_fingerprint": fingerprint,
+            "compiled_at": time.time(),
+        }, f, indent=2)
+
+    try:
+        os.rename(tmp_dir, out_dir)
+    except OSError:
+        # Another worker compiled the same fingerprint first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def open_compiled(data_path: str, raw: bytes, properties=None):
+    """Open (compiling first if needed) the snapshot matching raw catalog bytes.
+
+    properties may be passed to skip re-parsing raw when a compile is needed.
+    Older compiled snapshots are pruned.
+    """
+    fingerprint = source_fingerprint(raw)
+    root = compiled_root(data_path)
+    out_dir = os.path.join(root, fingerprint)
+
+    meta_path = os.path.join(out_dir, "meta.json")
+    fresh = False
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            fresh = json.load(f).get("format_version") == FORMAT_VERSION
+        if not fresh:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    if not fresh:
+        os.makedirs(root, exist_ok=True)
+        start = time.time()
+        compile_catalog(properties if properties is not None else json.loads(raw), out_dir, fingerprint)
+        print(f"🗜️ Compiled catalog {fingerprint} in {(time.time() - start)*1000:.0f}ms → {out_dir}")
+        # Old snapshots stay readable for workers that still have them mapped (POSIX unlink semantics)
+        for name in os.listdir(root):
+            if name != fingerprint and ".tmp-" not in name:
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    return ColumnarCatalog(out_dir)
+
+
+def _synthetic_catalog(n: int, base_path: str):
+    with open(base_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    catalog = []
+    for i in range(n):
+        p = dict(base[i % len(base)])
+        p["id"] = f"{p['id']}-{i}"
+        if p.get("price"):
+            p["price"] = int(p["price"] * (0.8 + (i % 41) / 100))
+        catalog.append(p)
+    return catalog
+
+
+_BENCH_CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+from app.rag.catalog import ColumnarCatalog, InMemoryCatalog
+from app.rag.index import CatalogSnapshot
+
+def memory_kb():
+    # VmHWM/VmRSS reset on exec, unlike ru_maxrss which Linux inherits from the parent
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return int(fields["VmRSS"].split()[0]), int(fields["VmHWM"].split()[0])
+
+rss0, _ = memory_kb()
+t0 = time.perf_counter()
+if {mode!r} == "json":
+    with open({path!r}, "rb") as f:
+        catalog = InMemoryCatalog(json.loads(f.read()))
+else:
+    catalog = ColumnarCatalog({path!r})
+snapshot = CatalogSnapshot(catalog, {path!r})
+t1 = time.perf_counter()
+snapshot.search(location="thane", max_price=15000000)
+rss1, peak = memory_kb()
+print(json.dumps({{"seconds": t1 - t0, "rss_kb": rss1 - rss0, "peak_kb": peak - rss0}}))
+"""
+
+
+def benchmark(data_path: str, synthetic: int = 0):
+    """Compare startup time and RSS growth: json.load vs mmap columnar snapshot (Linux)."""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    with tempfile.TemporaryDirectory() as tmp:
+        if synthetic:
+            properties = _synthetic_catalog(synthetic, data_path)
+            json_path = os.path.join(tmp, "properties.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(properties, f)
+        else:
+            json_path = data_path
+        with open(json_path, "rb") as f:
+            raw = f.read()
+        columnar_dir = os.path.join(tmp, "compiled")
+        compile_catalog(json.loads(raw), columnar_dir, source_fingerprint(raw))
+
+        for mode, path in (("json", json_path), ("columnar", columnar_dir)):
+            out = subprocess.run(
+                [sys.executable, "-c", _BENCH_CHILD.format(root=root, mode=mode, path=path)],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(out)
+            print(f"{mode:>9}: {len(raw) / 1e6:.1f} MB source, startup {result['seconds']*1000:.1f}ms, "
+                  f"RSS +{result['rss_kb'] / 1024:.1f} MB (peak +{result['peak_kb'] / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] not in ("compile", "bench"):
+        print("Usage: python -m app.rag.catalog compile | bench [--synthetic N]")
+        sys.exit(1)
+
+    default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "properties.json")
+    if args[0] == "compile":
+        with open(default_path, "rb") as f:
+            raw = f.read()
+        catalog = open_compiled(default_path, raw)
+        print(f"✅ {len(catalog)} properties compiled to {catalog.directory}")
+    else:
+        synthetic = int(args[args.index("--synthetic") + 1]) if "--synthetic" in args else 0
+        benchmark(default_path, synthetic)
@@ -0,0 +1,202 @@
+"""
+Live overlay index for incremental catalog changes.
+
+Upserts and deletes are appended to the delta journal (app/rag/journal.py).
+The served catalog is then a LiveCatalog: the snapshot built from
+properties.json with every changed id hidden (CatalogSnapshot.without), plus
+a small overlay snapshot holding the upserted listings. Each change only
+rebuilds the overlay, so a price update costs O(changes) instead of a full
+catalog rebuild. Once CATALOG_COMPACT_AFTER changes pile up they are folded
+into properties.json and the journal starts over.
+"""
+
+import heapq
+import json
+import os
+import time
+
+from app.rag.bm25 import BM25Index
+from app.rag.catalog import InMemoryCatalog, source_fingerprint, thaw
+from app.rag.fuzzy import MIN_SIMILARITY
+from app.rag.index import TOP_K, CatalogSnapshot, _catalog_versions
+from app.rag.merge import (
+    merge_batch,
+    merge_faceted,
+    merge_hits,
+    merge_pages,
+    merge_relaxed,
+    merge_scored,
+    record_key,
+)
+
+# Changes kept in the overlay before they are folded into properties.json
+COMPACT_AFTER = int(os.getenv("CATALOG_COMPACT_AFTER", "1000"))
+
+
+def overlay_path(data_path: str) -> str:
+    """Name the overlay's embedding/similar-list files are derived from (never written itself)."""
+    return f"{os.path.splitext(data_path)[0]}.delta.json"
+
+
+class LiveCatalog:
+    """CatalogSnapshot-compatible view of a base catalog plus uncompacted changes.
+
+    Ranked results from the two parts are merged by score, browse results by
+    (price, id). The overlay's price-per-sqft "value" feature and its
+    similar-property lists only see the overlay itself until compaction.
+    """
+
+    def __init__(self, source, changes: dict, embedding_model: str = None):
+        self.source = source
+        self.changes = dict(changes)
+        self.data_path = source.data_path
+        self.loaded_at = time.time()
+
+        # PERFORMANCE: the base indexes are shared as-is; changed ids are only masked out
+        self.base = source.without(self.changes)
+
+        upserts = [record for record in self.changes.values() if record is not None]
+        self.overlay = None
+        if upserts:
+            raw = json.dumps(sorted(upserts, key=lambda p: str(p["id"])), sort_keys=True, default=str).encode("utf-8")
+            self.overlay = CatalogSnapshot(
+                InMemoryCatalog(upserts),
+                overlay_path(source.data_path),
+                embedding_model=embedding_model,
+                fingerprint=source_fingerprint(raw),
+            )
+            if hasattr(source, "keywords"):
+                # BM25 weights from base + overlay so keyword scores merge fairly
+                self.overlay.keywords = BM25Index(self.overlay.catalog, reference=source.keywords)
+        self.fingerprint = f"{source.fingerprint}+{self.overlay.fingerprint}" if self.overlay else source.fingerprint
+
+        hidden = sum(1 for property_id in self.changes if source.get_by_id(property_id) is not None)
+        self._count = len(source) - hidden + len(upserts)
+        self.version = next(_catalog_versions)
+
+    def __len__(self):
+        return self._count
+
+    def _parts(self):
+        return [self.base, self.overlay] if self.overlay is not None else [self.base]
+
+    @property
+    def properties(self):
+        """Every live record in (price, id) order."""
+        base = (p for p in self.source.properties if str(p["id"]) not in self.changes)
+        return list(heapq.merge(base, self.overlay.properties if self.overlay else (), key=record_key))
+
+    def delta_stats(self) -> dict:
+        deletes = sum(1 for record in self.changes.values() if record is None)
+        return {"changes": len(self.changes), "upserts": len(self.changes) - deletes, "deletes": deletes}
+
+    def shard_stats(self):
+        return self.source.shard_stats() if hasattr(self.source, "shard_stats") else None
+
+    # -- CatalogSnapshot interface ---------------------------------------------
+
+    def search(self, location=None, max_price=None, bhk=None, property_type=None, weights=None):
+        """Search properties with multiple filters, best matches first."""
+        return [prop for prop, _score in self.search_hits(location, max_price, bhk, property_type, weights)]
+
+    def search_hits(self, location=None, max_price=None, bhk=None, property_type=None, weights=None, k=TOP_K):
+        return merge_hits([
+            part.search_hits(location, max_price, bhk, property_type, weights, k) for part in self._parts()
+        ], k)
+
+    def faceted_search(self, location=None, max_price=None, bhk=None, property_type=None, facets=None, limit=TOP_K):
+        return merge_faceted([
+            part.faceted_search(location, max_price, bhk, property_type, facets, limit) for part in self._parts()
+        ], limit)
+
+    def search_page(self, location=None, max_price=None, bhk=None, property_type=None, facets=None, after=None, page_size=TOP_K):
+        return merge_pages([
+            part.search_page(location, max_price, bhk, property_type, facets, after, page_size) for part in self._parts()
+        ], page_size)
+
+    def batch_search(self, queries, limit=TOP_K):
+        found = [part.batch_search(queries, limit) for part in self._parts()]
+        return [merge_batch(parts, limit) for parts in zip(*found)]
+
+    def relaxed_search(self, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        return merge_relaxed([
+            part.relaxed_search(location, max_price, bhk, property_type, k, facets) for part in self._parts()
+        ], k)
+
+    query_key = CatalogSnapshot.query_key
+
+    def keyword_search(self, query, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """BM25 top-k over descriptions, amenities and landmarks, pre-filtered by the structured and facet filters."""
+        hits = self.keyword_hits(query, location, max_price, bhk, property_type, k, facets)
+        print(f"📚 Keyword search: '{query}' → {len(hits)} properties")
+        return [prop for prop, _score in hits]
+
+    def keyword_hits(self, query, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        return merge_scored([
+            part.keyword_hits(query, location, max_price, bhk, property_type, k, facets) for part in self._parts()
+        ], k)
+
+    def semantic_search(self, query, embedder, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """Cosine top-k over property text, pre-filtered by the structured and facet filters."""
+        embed_fn, model = embedder
+        if not self.semantic_ready(model):
+            return []  # not built yet: don't spend an embeddings call on the query
+        hits = self.semantic_hits(embed_fn([query])[0], embedder, location, max_price, bhk, property_type, k, facets)
+        print(f"🧠 Semantic search: '{query}' → {len(hits)} properties")
+        return [prop for prop, _score in hits]
+
+    def semantic_ready(self, model) -> bool:
+        return self.base.semantic_ready(model)
+
+    def semantic_hits(self, query_vector, embedder, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        return merge_scored([
+            part.semantic_hits(query_vector, embedder, location, max_price, bhk, property_type, k, facets)
+            for part in self._parts()
+        ], k)
+
+    def price_bucket(self, max_price):
+        """The parts have separate price columns, so the budget itself is the cache key."""
+        return max_price or None
+
+    def get_by_id(self, property_id):
+        """Get a single property by ID."""
+        if property_id in self.changes:
+            return self.overlay.get_by_id(property_id) if self.changes[property_id] is not None else None
+        return self.base.get_by_id(property_id)
+
+    def similar_properties(self, property_id, limit=TOP_K):
+        """Base neighbor lists with changed listings swapped in; new listings use the overlay's lists."""
+        if property_id in self.changes and self.changes[property_id] is None:
+            return []
+        found = self.source.similar_properties(property_id, limit + len(self.changes))
+        hits = [(self.get_by_id(str(prop["id"])), score) for prop, score in found]
+        hits = [(prop, score) for prop, score in hits if prop is not None]
+        if not hits and self.overlay is not None:
+            hits = self.overlay.similar_properties(property_id, limit)
+        return hits[:limit]
+
+    def resolve_location(self, query, limit=5, min_score=MIN_SIMILARITY):
+        places = {}
+        for part in self._parts():
+            for match in part.resolve_location(query, limit, min_score):
+                known = places.setdefault(match["place"], dict(match, count=0))
+                known["score"] = max(known["score"], match["score"])
+                known["count"] += match["count"]
+        return sorted(places.values(), key=lambda m: -m["score"])[:limit]
+
+    def get_locations(self):
+        """Get list of unique locations."""
+        return sorted({loc for part in self._parts() for loc in part.get_locations()})
+
+
+def compact(source, changes: dict, data_path: str):
+    """Write source + changes as the new properties.json (atomic replace)."""
+    records = [thaw(p) for p in source.properties if str(p["id"]) not in changes]
+    records += [thaw(record) for record in changes.values() if record is not None]
+    tmp_path = f"{data_path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, data_path)
+    return len(records)
@@ -1,10 +1,59 @@
-from openai import OpenAI
+import os
+import re
+import zlib
+
+import numpy as np
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Dimension of the offline hashing embedder
+LOCAL_EMBEDDING_DIM = 256
+
+_client = None
+
+
+def _get_client():
+    """Create the OpenAI client on first use so importing this module needs no API key."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI()
+    return _client
 
-client = OpenAI()
 
 def embed_texts(texts: list[str]) -> list[list[float]]:
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
+    response = _get_client().embeddings.create(
+        model=EMBEDDING_MODEL,
         input=texts
     )
     return [d.embedding for d in response.data]
+
+
+def local_embed_texts(texts: list[str]) -> list[list[float]]:
+    """Deterministic offline embedder (hashed word and word-pair features).
+
+    No network calls - used for tests, benchmarks and local development.
+    """
+    vectors = np.zeros((len(texts), LOCAL_EMBEDDING_DIM), dtype=np.float32)
+    for i, text in enumerate(texts):
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vectors[i, h % LOCAL_EMBEDDING_DIM] += 1.0 if h & 0x80000000 else -1.0
+    return vectors.tolist()
+
+
+# name -> (embed function, model name stored alongside the vectors)
+EMBEDDERS = {
+    "openai": (embed_texts, EMBEDDING_MODEL),
+    "local": (local_embed_texts, f"local-hash-{LOCAL_EMBEDDING_DIM}"),
+}
+
+
+def get_embedder(name: str = None):
+    """Return (embed_fn, model_name) for the configured embedder (RAG_EMBEDDER env)."""
+    name = name or os.getenv("RAG_EMBEDDER", "openai")
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder: {name}. Available: {list(EMBEDDERS)}")
+    return EMBEDDERS[name]
@@ -0,0 +1,143 @@
+"""
+Persistent embedding cache keyed by content hash, plus an incremental builder.
+
+Vectors are stored in SQLite under sha256(model + text), so rebuilding the
+semantic index only embeds texts that are new or changed since the last build.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from tenacity import Retrying, stop_after_attempt, wait_exponential
+
+
+def content_key(text: str, model: str) -> str:
+    """Cache key for one embedding: hash of model name and text."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """SQLite-backed map of content key -> float32 vector."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get_many(self, keys) -> dict:
+        """Return {key: vector} for the keys present in the store."""
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            # SQLite caps bound parameters per statement
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items, model: str):
+        """Store [(key, vector)] pairs."""
+        rows = []
+        for key, vector in items:
+            vector = np.asarray(vector, dtype=np.float32)
+            rows.append((key, model, int(vector.shape[0]), vector.tobytes()))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+class EmbeddingBuilder:
+    """Embed texts through the store: reuse cached vectors, batch and retry the rest."""
+
+    def __init__(self, store: EmbeddingStore, embed_fn, model: str,
+                 batch_size: int = 64, max_batch_chars: int = 32000,
+                 max_concurrency: int = 4, max_retries: int = 3):
+        self.store = store
+        self.embed_fn = embed_fn
+        self.model = model
+        self.batch_size = batch_size
+        self.max_batch_chars = max_batch_chars
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+
+    def _batches(self, texts):
+        """Split texts into batches bounded by count and total characters."""
+        batch, chars = [], 0
+        for text in texts:
+            if batch and (len(batch) >= self.batch_size or chars + len(text) > self.max_batch_chars):
+                yield batch
+                batch, chars = [], 0
+            batch.append(text)
+            chars += len(text)
+        if batch:
+            yield batch
+
+    def _embed_batch(self, batch):
+        for attempt in Retrying(
+            stop=stop_after_attempt(self.max_retries),
+            wait=wait_exponential(multiplier=0.5, max=8),
+            reraise=True,
+        ):
+            with attempt:
+                vectors = self.embed_fn(batch)
+        if len(vectors) != len(batch):
+            raise ValueError(f"Embedder returned {len(vectors)} vectors for {len(batch)} texts")
+        return batch, vectors
+
+    def build(self, texts):
+        """Return (matrix, report) with one float32 row per input text."""
+        start = time.time()
+        keys = [content_key(t, self.model) for t in texts]
+        cached = self.store.get_many(set(keys))
+
+        # Embed each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+
+        batches = list(self._batches(list(missing.values())))
+        if batches:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                for batch, vectors in pool.map(self._embed_batch, batches):
+                    computed = [(content_key(t, self.model), v) for t, v in zip(batch, vectors)]
+                    self.store.put_many(computed, self.model)
+                    for key, vector in computed:
+                        cached[key] = np.asarray(vector, dtype=np.float32)
+
+        matrix = np.vstack([cached[k] for k in keys]) if keys else np.zeros((0, 0), dtype=np.float32)
+        report = {
+            "total": len(texts),
+            "reused": len(texts) - sum(1 for k in keys if k in missing),
+            "computed": len(missing),
+            "batches": len(batches),
+            "seconds": round(time.time() - start, 4),
+        }
+        return matrix, report
@@ -0,0 +1,104 @@
+"""
+Bitset facet index: one boolean row mask per (facet, value).
+
+Filters are AND across facets and OR within a facet's values, except for
+amenities where every requested amenity must be present. Facet counts are
+disjunctive: each facet is counted with every filter applied except its own,
+so "3 ready to move, 5 under construction" stays available after the caller
+picks one of them.
+"""
+
+import numpy as np
+
+# facet name -> catalog column
+STRING_FACETS = ("possession", "builder", "type", "facing", "bhk")
+LIST_FACETS = ("amenities",)
+FACETS = STRING_FACETS + LIST_FACETS
+
+# Facets where a row must match every requested value (instead of any)
+MATCH_ALL_FACETS = {"amenities"}
+
+
+def value_key(facet: str, value) -> str:
+    """Case-insensitive key for a facet value ("2" and "2 bhk" are the same BHK)."""
+    value = str(value).strip()
+    if facet == "bhk" and value and "BHK" not in value.upper():
+        value = f"{value} BHK"
+    return value.lower()
+
+
+class FacetIndex:
+    """Per-value boolean masks over the rows of one catalog snapshot."""
+
+    def __init__(self, catalog):
+        self.size = len(catalog)
+        self.values = {}     # facet -> [display value]
+        self._keys = {}      # facet -> {value key: position}
+        self._matrices = {}  # facet -> bool array (values, rows)
+
+        for facet in FACETS:
+            if facet in LIST_FACETS:
+                cells = catalog.lists(facet)
+            else:
+                cells = [(v,) if v else () for v in catalog.strings(facet)]
+
+            keys, display, positions = {}, [], ([], [])
+            for row, cell in enumerate(cells):
+                for value in cell:
+                    key = value_key(facet, value)
+                    if key not in keys:
+                        keys[key] = len(display)
+                        display.append(str(value).strip())
+                    positions[0].append(keys[key])
+                    positions[1].append(row)
+
+            matrix = np.zeros((len(display), self.size), dtype=bool)
+            matrix[positions[0], positions[1]] = True
+            self.values[facet] = display
+            self._keys[facet] = keys
+            self._matrices[facet] = matrix
+
+    def facet_mask(self, facet: str, values) -> np.ndarray:
+        """Rows matching the requested values of one facet."""
+        matrix = self._matrices[facet]
+        ids = [self._keys[facet].get(value_key(facet, v)) for v in values]
+        if facet in MATCH_ALL_FACETS:
+            if any(i is None for i in ids):
+                return np.zeros(self.size, dtype=bool)
+            return matrix[ids].all(axis=0)
+        ids = [i for i in ids if i is not None]
+        if not ids:
+            return np.zeros(self.size, dtype=bool)
+        return matrix[ids].any(axis=0)
+
+    def filter(self, base: np.ndarray, filters: dict):
+        """Apply facet filters to a base row mask.
+
+        Returns (mask, per-facet masks) - the latter are reused for counting.
+        """
+        facet_masks = {
+            facet: self.facet_mask(facet, values)
+            for facet, values in (filters or {}).items()
+            if values and facet in self._matrices
+        }
+        mask = base.copy()
+        for m in facet_masks.values():
+            mask &= m
+        return mask, facet_masks
+
+    def counts(self, base: np.ndarray, facet_masks: dict, facets=FACETS) -> dict:
+        """{facet: {value: count}} over base, excluding each facet's own filter."""
+        result = {}
+        for facet in facets:
+            mask = base
+            for other, m in facet_masks.items():
+                if other != facet:
+                    mask = mask & m
+            # PERFORMANCE: count over the matched rows only - a narrow filter gathers
+            # a few columns instead of ANDing the whole (values, rows) matrix
+            rows = np.flatnonzero(mask)
+            totals = np.count_nonzero(self._matrices[facet][:, rows], axis=1)
+            nonzero = np.flatnonzero(totals)
+            nonzero = nonzero[np.argsort(-totals[nonzero], kind="stable")]
+            result[facet] = {self.values[facet][i]: int(totals[i]) for i in nonzero}
+        return result
@@ -0,0 +1,63 @@
+"""
+Character-trigram index for fuzzy place-name matching.
+
+Noisy STT transcripts ("thaane", "whitfeild", "gorbunder") rarely match a
+place name exactly. Each name is split into padded character trigrams;
+a query is scored against every name sharing at least one trigram using the
+Dice coefficient. Cost depends on the number of distinct place names, not on
+the number of listings.
+"""
+
+import re
+from collections import defaultdict
+
+# Minimum Dice similarity for a fuzzy match to be used by search or offered by location resolution
+MIN_SIMILARITY = 0.5
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_place(text: str) -> str:
+    """Lowercase and collapse punctuation/whitespace to single spaces."""
+    return _NON_ALNUM_RE.sub(" ", text.lower()).strip()
+
+
+def trigrams(text: str) -> set:
+    """Padded character trigrams of a normalized string."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Ranked fuzzy lookup over a fixed list of names."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self._sizes = []
+        self._postings = defaultdict(list)  # trigram -> [name ids]
+        for name_id, name in enumerate(self.names):
+            grams = trigrams(normalize_place(name))
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(name_id)
+
+    def search(self, query: str, limit: int = 5, min_score: float = 0.0):
+        """Return [(name, score)] best-first, score = Dice similarity in [0, 1]."""
+        query_grams = trigrams(normalize_place(query))
+        if not query_grams or not self.names:
+            return []
+
+        overlap = defaultdict(int)
+        for gram in query_grams:
+            for name_id in self._postings.get(gram, ()):
+                overlap[name_id] += 1
+
+        scored = []
+        n_query = len(query_grams)
+        for name_id, shared in overlap.items():
+            score = 2.0 * shared / (n_query + self._sizes[name_id])
+            if score >= min_score:
+                scored.append((score, name_id))
+
+        scored.sort(key=lambda item: (-item[0], self.names[item[1]]))
+        return [(self.names[name_id], round(score, 4)) for score, name_id in scored[:limit]]
@@ -1,21 +1,663 @@
+import copy
 import json
 import os
+import re
+import itertools
+import threading
+import time
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+from app.rag.bm25 import BM25Index
+from app.rag.cache import QueryCache
+from app.rag.catalog import InMemoryCatalog, open_compiled, source_fingerprint
+from app.rag.embedder import get_embedder
+from app.rag.facets import FacetIndex, value_key
+from app.rag.fuzzy import MIN_SIMILARITY, TrigramIndex, normalize_place
+from app.rag.ranking import RankingFeatures, bhk_number
+from app.rag.semantic import SemanticIndex
+from app.rag.journal import DeltaJournal, fold, journal_path
+from app.rag.similar import SimilarIndex
 
 # PERFORMANCE: Singleton instance to avoid reloading
 _instance = None
 
-# Location normalization for flexible matching
+# Incremented every time a catalog is indexed
+_catalog_versions = itertools.count(1)
+
+# Location synonyms that no spelling similarity would find.
+# Misspellings ("banglore", "thaane") are resolved by the trigram index instead.
 LOCATION_ALIASES = {
-    "banglore": "bangalore",
-    "bengalor": "bangalore",
-    "bangalor": "bangalore",
     "bengaluru": "bangalore",
     "blr": "bangalore",
-    "thana": "thane",
     "bombay": "mumbai",
-    "white field": "whitefield",
 }
 
+# Number of results returned by search()
+TOP_K = 5
+
+# Zero-result ladder for relaxed_search(), tried in order; each step keeps the
+# previous steps' relaxations. (name, budget factor or None = no budget,
+# BHK: exact/adjacent/any, place: location/city/any, keep property type and facets)
+RELAXATIONS = (
+    ("exact", 1.0, "exact", "location", True),
+    ("budget_10", 1.1, "exact", "location", True),
+    ("budget_20", 1.2, "exact", "location", True),
+    ("adjacent_bhk", 1.2, "adjacent", "location", True),
+    ("nearby_locality", 1.2, "adjacent", "city", True),
+    ("any_city", 1.2, "adjacent", "any", True),
+    ("top_picks", None, "any", "any", False),
+)
+ANY_CITY_LEVEL = 5
+
+# Serve from the compiled columnar snapshot (app/rag/catalog.py), compiling on demand
+USE_COMPILED_CATALOG = os.getenv("CATALOG_COMPILED", "true").lower() == "true"
+
+# Split the catalog into per-city shards loaded on first use (app/rag/shards.py)
+USE_SHARDED_CATALOG = os.getenv("CATALOG_SHARDED", "false").lower() == "true"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list:
+    """Split text into lowercase alphanumeric tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def canonical_bhk(bhk) -> str:
+    """Normalize a BHK value to the "N BHK" form used in the catalog."""
+    bhk_str = str(bhk).upper()
+    if "BHK" not in bhk_str:
+        bhk_str = f"{bhk} BHK"
+    return bhk_str
+
+
+def normalize_location(location) -> str:
+    """Lowercase a location and resolve known aliases/misspellings."""
+    location_lower = location.lower().strip()
+    return LOCATION_ALIASES.get(location_lower, location_lower)
+
+
+class CatalogSnapshot:
+    """Immutable, fully built index over one version of the catalog.
+
+    PropertyIndex publishes a new snapshot with a single reference swap on
+    reload; searches that already hold the old snapshot finish on it.
+    """
+
+    def __init__(self, catalog, data_path: str, embedding_model: str = None, fingerprint: str = None,
+                 similar_path: str = None, embeddings_path: str = None):
+        self.catalog = catalog
+        self.data_path = data_path
+        # Semantic index files are stored next to this path (default: the catalog file)
+        self.embeddings_path = embeddings_path or data_path
+        self.fingerprint = fingerprint or getattr(catalog, "fingerprint", None)
+        self.loaded_at = time.time()
+
+        # PERFORMANCE: Rows are numbered in (price, id) order, so a max_price
+        # filter is a bisect on self._prices and the smallest row numbers of any
+        # candidate set are already the cheapest matches - no sort per query.
+        # Listings without a price sort last and never pass a budget filter.
+        # Records are frozen because search results are shared between callers;
+        # with a compiled catalog they are only decoded when returned.
+        self.properties = catalog.records
+        self._prices = catalog.numbers("price")
+        self._ids = list(catalog.strings("id"))
+        self._by_id = {}
+        for row, property_id in enumerate(self._ids):
+            self._by_id.setdefault(property_id, row)
+
+        # Posting lists: token -> set of rows
+        self._place_postings = {}
+        self._bhk_postings = {}
+        self._type_postings = {}
+
+        # Whole place names (localities, cities, landmarks, metro stations) -> rows
+        self._place_names = {}
+
+        place_columns = [catalog.strings(name) for name in ("location", "city", "nearby_metro")]
+        landmarks = catalog.lists("nearby_landmarks")
+        for row, (location, city, metro, row_landmarks) in enumerate(zip(*place_columns, landmarks)):
+            place_text = " ".join([location, city, metro, *row_landmarks])
+            for token in set(tokenize(place_text)):
+                self._place_postings.setdefault(token, set()).add(row)
+
+            names = [*location.split(","), city, metro.split("(")[0], *row_landmarks]
+            for name in names:
+                name = name.strip()
+                if name:
+                    self._place_names.setdefault(name, set()).add(row)
+
+        for row, bhk in enumerate(catalog.strings("bhk")):
+            self._bhk_postings.setdefault(bhk.upper(), set()).add(row)
+        for row, property_type in enumerate(catalog.strings("type")):
+            self._type_postings.setdefault(property_type.lower(), set()).add(row)
+
+        # Sorted vocabulary so a query token can match every indexed token it prefixes
+        self._place_vocab = sorted(self._place_postings)
+
+        # PERFORMANCE: Trigram indexes resolve misspelled places without scanning listings
+        self._token_fuzzy = TrigramIndex(t for t in self._place_vocab if len(t) >= 3 and not t.isdigit())
+        self._name_fuzzy = TrigramIndex(sorted(self._place_names))
+
+        locations = set()
+        for location in catalog.strings("location"):
+            # Extract area name from location
+            loc = location.split(",")[0].strip()
+            if loc:
+                locations.add(loc)
+        self._locations = sorted(locations)
+
+        # Bitsets for possession/builder/type/facing/bhk/amenity filters and counts
+        self.facets = FacetIndex(catalog)
+
+        # BM25 inverted index for keyword queries ("clubhouse", "near Upvan Lake")
+        self.keywords = BM25Index(catalog)
+
+        # Feature columns for relevance ranking of search() results
+        self.ranking = RankingFeatures(catalog, self._prices)
+
+        # City code per row: "nearby locality" relaxes a locality to its whole city
+        self._city_names, self._city_codes = np.unique(
+            np.array([city.strip().lower() for city in catalog.strings("city")], dtype=str), return_inverse=True)
+
+        # Embedding matrix for semantic search, memory-mapped if already built
+        self.semantic = SemanticIndex.load(self.properties, self.embeddings_path, embedding_model, self.fingerprint)
+
+        # k nearest listings per id, loaded or incrementally rebuilt for this version
+        self.similar = SimilarIndex.load_or_build(catalog, similar_path or data_path, self.semantic, self.fingerprint)
+
+        # Sorted match lists reused by search_page (dies with the snapshot on reload)
+        self._rows_cache = QueryCache(max_size=256)
+
+        # Tombstones (see without()): rows hidden from every search, None = all alive
+        self._dead = frozenset()
+        self._alive = None
+
+        self.version = next(_catalog_versions)
+
+    def __len__(self):
+        return len(self.properties)
+
+    def without(self, ids):
+        """Copy of this snapshot with the listings in ids hidden.
+
+        PERFORMANCE: the copy shares every index with this snapshot and only
+        adds a row mask, so deleting or replacing a listing (app/rag/delta.py)
+        costs O(rows) bits instead of a rebuild.
+        """
+        dead = {self._by_id[i] for i in ids if i in self._by_id} | self._dead
+        if dead == self._dead:
+            return self
+
+        snapshot = copy.copy(self)
+        snapshot._dead = frozenset(dead)
+        snapshot._alive = np.ones(len(self.properties), dtype=bool)
+        snapshot._alive[list(dead)] = False
+        snapshot._rows_cache = QueryCache(max_size=256)
+        snapshot.version = next(_catalog_versions)
+        return snapshot
+
+    def with_semantic(self, semantic):
+        """Copy of this snapshot that serves semantic search from semantic (built after publish)."""
+        snapshot = copy.copy(self)
+        snapshot.semantic = semantic
+        snapshot._rows_cache = QueryCache(max_size=256)
+        snapshot.version = next(_catalog_versions)
+        return snapshot
+
+    def _match_place(self, text):
+        """Rows whose location/city/landmark/metro tokens match every token of text.
+
+        Returns None when text has no searchable tokens (no filtering).
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+
+        rows = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            lo = bisect_left(self._place_vocab, token)
+            hi = lo
+            token_rows = set()
+            while hi < len(self._place_vocab) and self._place_vocab[hi].startswith(token):
+                token_rows |= self._place_postings[self._place_vocab[hi]]
+                hi += 1
+            if not token_rows and len(token) >= 3:
+                # Misspelled token: use the closest indexed token(s) instead
+                token_rows = self._fuzzy_token_rows(token)
+            rows = token_rows if rows is None else rows & token_rows
+            if not rows:
+                break
+        return rows
+
+    def _fuzzy_token_rows(self, token):
+        """Rows of the indexed tokens most similar to token (ties included)."""
+        matches = self._token_fuzzy.search(token, limit=3, min_score=MIN_SIMILARITY)
+        rows = set()
+        for match, score in matches:
+            if score < matches[0][1]:
+                break
+            rows |= self._place_postings[match]
+        return rows
+
+    def resolve_location(self, query, limit=5, min_score=MIN_SIMILARITY):
+        """Rank known place names by similarity to query.
+
+        Returns [{"place", "score", "count"}] best-first; names scoring below
+        min_score are left out, so an unknown place gives no candidates.
+        """
+        matches = self._name_fuzzy.search(normalize_location(query), limit=limit, min_score=min_score)
+        return [
+            {"place": name, "score": score, "count": len(self._place_names[name])}
+            for name, score in matches
+        ]
+
+    @staticmethod
+    def _match_keys(postings, needle):
+        """Union the posting lists of every key containing needle (few distinct keys)."""
+        rows = set()
+        for key, key_rows in postings.items():
+            if needle in key:
+                rows |= key_rows
+        return rows
+
+    def _location_rows(self, location):
+        """Rows matching a location (None = no searchable tokens, no filtering)."""
+        location_lower = location.lower().strip()
+        # Normalize location using aliases (handle misspellings)
+        normalized_location = normalize_location(location)
+
+        location_rows = self._match_place(normalized_location)
+        if normalized_location != location_lower:
+            original_rows = self._match_place(location_lower)  # Also try original
+            if location_rows is None or original_rows is None:
+                location_rows = None
+            else:
+                location_rows = location_rows | original_rows
+
+        if location_rows == set():
+            # No token-level match: fall back to the closest whole place name
+            best = self._name_fuzzy.search(normalized_location, limit=1, min_score=MIN_SIMILARITY)
+            if best:
+                print(f"🔍 Fuzzy location: '{location}' → '{best[0][0]}' (score {best[0][1]})")
+                location_rows = self._place_names[best[0][0]]
+
+        if location_rows is not None:
+            print(f"🔍 Property search: location='{location}' (normalized: '{normalized_location}'), found {len(location_rows)} properties")
+        return location_rows
+
+    def _filter_rows(self, location=None, max_price=None, bhk=None, property_type=None):
+        """Apply the structured filters.
+
+        Returns (matched, cutoff): matched is the set of rows passing the
+        location/BHK/type filters (None = no such filter) and rows below
+        cutoff are within budget.
+        """
+        candidate_sets = []
+
+        # Filter by location (matches location field or nearby landmarks)
+        if location:
+            location_rows = self._location_rows(location)
+            if location_rows is not None:
+                candidate_sets.append(location_rows)
+
+        # Filter by BHK
+        if bhk:
+            candidate_sets.append(self._match_keys(self._bhk_postings, canonical_bhk(bhk)))
+
+        # Filter by property type (Apartment, Villa, Plot)
+        if property_type:
+            candidate_sets.append(self._match_keys(self._type_postings, property_type.lower()))
+
+        # Filter by max price: rows below the cutoff are exactly those within budget
+        cutoff = self.price_bucket(max_price) if max_price else len(self.properties)
+
+        if not candidate_sets:
+            return None, cutoff
+
+        # Intersect smallest posting list first
+        candidate_sets.sort(key=len)
+        matched = set(candidate_sets[0])
+        for rows_set in candidate_sets[1:]:
+            matched &= rows_set
+        return matched, cutoff
+
+    def _sorted_rows(self, matched, cutoff):
+        """Sorted row array for the output of _filter_rows, tombstoned rows removed."""
+        if matched is None:
+            rows = np.arange(cutoff)
+        else:
+            rows = np.fromiter(matched, dtype=np.int64, count=len(matched))
+            rows = np.sort(rows[rows < cutoff])
+        if self._alive is not None:
+            rows = rows[self._alive[rows]]
+        return rows
+
+    def search(self, location=None, max_price=None, bhk=None, property_type=None, weights=None):
+        """Search properties with multiple filters, best matches first."""
+        return [prop for prop, _score in self.search_hits(location, max_price, bhk, property_type, weights)]
+
+    def search_hits(self, location=None, max_price=None, bhk=None, property_type=None, weights=None, k=TOP_K):
+        """[(record, relevance score)] for the k best matches (see app/rag/ranking.py)."""
+        rows = self._sorted_rows(*self._filter_rows(location, max_price, bhk, property_type))
+
+        # PERFORMANCE: one vectorized scoring pass over the candidates, top-k by partition
+        hits = self.ranking.top_k(rows, k, max_price, bhk, weights)
+        return [(self.properties[r], score) for r, score in hits]
+
+    def batch_search(self, queries, limit=TOP_K):
+        """Evaluate many filter sets together.
+
+        queries: [{"location", "max_price", "bhk", "property_type"}] (keys optional).
+        Returns [{"results": [...], "scores": [...], "total": n}] in query order,
+        results ranked like search().
+
+        PERFORMANCE: each distinct location/BHK/type is resolved once and each
+        distinct combination intersected once into a sorted row array; every
+        budget is turned into a row cutoff by a single vectorized searchsorted,
+        and a query's matches within budget are a prefix of its combination's
+        rows, found by one more searchsorted per combination and then ranked.
+        """
+        n = len(self.properties)
+        budgets = np.array([q.get("max_price") or np.inf for q in queries], dtype=np.float64)
+        cutoffs = np.searchsorted(self._prices, budgets, side="right")
+
+        location_rows, bhk_rows, type_rows = {}, {}, {}
+        groups = {}  # (location, bhk, type) -> [query positions]
+        for i, q in enumerate(queries):
+            location = q["location"].lower().strip() if q.get("location") else None
+            bhk = canonical_bhk(q["bhk"]) if q.get("bhk") else None
+            property_type = q["property_type"].lower() if q.get("property_type") else None
+            if location and location not in location_rows:
+                location_rows[location] = self._location_rows(location)
+            if bhk and bhk not in bhk_rows:
+                bhk_rows[bhk] = self._match_keys(self._bhk_postings, bhk)
+            if property_type and property_type not in type_rows:
+                type_rows[property_type] = self._match_keys(self._type_postings, property_type)
+            groups.setdefault((location, bhk, property_type), []).append(i)
+
+        out = [None] * len(queries)
+        for (location, bhk, property_type), positions in groups.items():
+            candidate_sets = [
+                rows for rows in (
+                    location_rows.get(location) if location else None,
+                    bhk_rows.get(bhk) if bhk else None,
+                    type_rows.get(property_type) if property_type else None,
+                ) if rows is not None
+            ]
+            group_cutoffs = cutoffs[positions]
+            if candidate_sets:
+                candidate_sets.sort(key=len)
+                matched = set(candidate_sets[0]).intersection(*candidate_sets[1:])
+                rows = self._sorted_rows(matched, n)
+                ends = np.searchsorted(rows, group_cutoffs)
+            elif self._alive is not None:
+                rows = np.flatnonzero(self._alive)
+                ends = np.searchsorted(rows, group_cutoffs)
+            else:
+                rows = np.arange(n)
+                ends = group_cutoffs
+            for i, end in zip(positions, ends.tolist()):
+                hits = self.ranking.top_k(rows[:end], limit, queries[i].get("max_price"), bhk)
+                out[i] = {
+                    "results": [self.properties[r] for r, _score in hits],
+                    "scores": [score for _r, score in hits],
+                    "total": int(end),
+                }
+        return out
+
+    def relaxed_search(self, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K,
+                       facets=None, start=0, stop=None):
+        """Best matches under the first RELAXATIONS step that has any.
+
+        Location, BHK, type and facets are resolved once into row masks; each
+        ladder step is then a few vectorized ANDs and a price cutoff, so a
+        zero-result query costs one pass instead of one search per fallback.
+        Facets are kept with the property type (dropped only for top picks).
+        start/stop limit the ladder (used by the sharded catalog).
+
+        Returns {"results", "scores", "total", "relaxation" (None = exact match),
+        "level", "filters"} - filters approximate the step as search filters.
+        """
+        n = len(self.properties)
+        everything = np.ones(n, dtype=bool)
+
+        def mask_of(rows):
+            mask = np.zeros(n, dtype=bool)
+            mask[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+            return mask
+
+        places = {"any": everything}
+        city = None
+        if location:
+            location_rows = self._location_rows(location)
+            if location_rows is None:
+                places["location"] = places["city"] = everything
+            else:
+                places["location"] = mask_of(location_rows)
+                if location_rows:
+                    codes = np.unique(self._city_codes[places["location"]])
+                    places["city"] = np.isin(self._city_codes, codes)
+                    city = str(self._city_names[codes[0]]) if codes.size == 1 else None
+
+        bhks = {"any": everything}
+        if bhk:
+            bhks["exact"] = mask_of(self._match_keys(self._bhk_postings, canonical_bhk(bhk)))
+            wanted = bhk_number(bhk)
+            bhks["adjacent"] = bhks["exact"] if np.isnan(wanted) else bhks["exact"] | (np.abs(self.ranking.bhk - wanted) <= 1)
+        type_mask = mask_of(self._match_keys(self._type_postings, property_type.lower())) if property_type else everything
+        faceted = bool(facets) and any(facets.values())
+        if faceted:
+            type_mask, _ = self.facets.filter(type_mask, facets)
+
+        tried = set()
+        for level, (name, factor, bhk_mode, place_mode, keep_type) in enumerate(RELAXATIONS[start:stop], start):
+            # Skip steps that relax nothing this query constrains
+            effective = (factor if max_price else None, bhk_mode if bhk else None,
+                         place_mode if location else None, keep_type if property_type or faceted else None)
+            if effective in tried or (location and place_mode not in places):
+                continue
+            tried.add(effective)
+
+            mask = places[place_mode if location else "any"] & bhks[bhk_mode if bhk else "any"]
+            if self._alive is not None:
+                mask &= self._alive
+            if keep_type:
+                mask &= type_mask
+            budget = int(max_price * factor) if max_price and factor else None
+            if budget:
+                mask[self.price_bucket(budget):] = False
+
+            rows = np.flatnonzero(mask)
+            if rows.size:
+                hits = self.ranking.top_k(rows, k, max_price, bhk)
+                return {
+                    "results": [self.properties[r] for r, _score in hits],
+                    "scores": [score for _r, score in hits],
+                    "total": int(rows.size),
+                    "relaxation": None if name == "exact" else name,
+                    "level": level,
+                    "filters": {
+                        "location": {"location": location, "city": city}.get(place_mode),
+                        "max_price": budget,
+                        "bhk": bhk if bhk_mode == "exact" else None,
+                        "property_type": property_type if keep_type else None,
+                        "facets": facets if keep_type and faceted else None,
+                    },
+                }
+
+        return {"results": [], "scores": [], "total": 0, "relaxation": None, "level": None, "filters": None}
+
+    def _base_mask(self, matched, cutoff):
+        """Boolean row mask for the output of _filter_rows."""
+        mask = np.zeros(len(self.properties), dtype=bool)
+        if matched is None:
+            mask[:cutoff] = True
+        else:
+            rows = np.fromiter(matched, dtype=np.int64, count=len(matched))
+            mask[rows[rows < cutoff]] = True
+        if self._alive is not None:
+            mask &= self._alive
+        return mask
+
+    def faceted_search(self, location=None, max_price=None, bhk=None, property_type=None, facets=None, limit=TOP_K):
+        """Search with extra facet filters ({facet: [values]}) and return facet counts.
+
+        Returns {"results": [...], "total": n, "facets": {facet: {value: count}}}.
+        """
+        matched, cutoff = self._filter_rows(location, max_price, bhk, property_type)
+        base = self._base_mask(matched, cutoff)
+        mask, facet_masks = self.facets.filter(base, facets)
+        rows = np.flatnonzero(mask)
+        return {
+            "results": [self.properties[int(r)] for r in rows[:limit]],
+            "total": int(rows.size),
+            "facets": self.facets.counts(base, facet_masks),
+        }
+
+    def matching_rows(self, location=None, max_price=None, bhk=None, property_type=None, facets=None):
+        """Sorted read-only array of every row passing the filters (the full result list in price order)."""
+        matched, cutoff = self._filter_rows(location, max_price, bhk, property_type)
+        if facets:
+            mask, _ = self.facets.filter(self._base_mask(matched, cutoff), facets)
+            rows = np.flatnonzero(mask)
+        else:
+            rows = self._sorted_rows(matched, cutoff)
+        rows.flags.writeable = False
+        return rows
+
+    def search_page(self, location=None, max_price=None, bhk=None, property_type=None, facets=None, after=None, page_size=TOP_K):
+        """One page of price-ordered results starting after the (price, id) key `after`.
+
+        The full sorted match list is computed once per distinct filter set;
+        each further page is a bisect to the key plus a slice.
+        Returns {"results": [...], "total": n, "has_more": bool}.
+        """
+        key = self.query_key(location, max_price, bhk, property_type, facets)
+        rows = self._rows_cache.get(key, self.version)
+        if rows is None:
+            rows = self.matching_rows(location, max_price, bhk, property_type, facets)
+            self._rows_cache.put(key, rows, self.version)
+
+        start = int(np.searchsorted(rows, self.row_after(*after))) if after else 0
+        page = rows[start:start + page_size]
+        return {
+            "results": [self.properties[int(r)] for r in page],
+            "total": len(rows),
+            "has_more": start + page_size < len(rows),
+        }
+
+    def query_key(self, location=None, max_price=None, bhk=None, property_type=None, facets=None):
+        """Normalize filters so equivalent queries share one cache entry."""
+        facet_key = ()
+        if facets:
+            facet_key = tuple(sorted(
+                (facet, tuple(sorted(value_key(facet, v) for v in values)))
+                for facet, values in facets.items() if values
+            ))
+        return (
+            normalize_location(location) if location else None,
+            self.price_bucket(max_price),
+            canonical_bhk(bhk) if bhk else None,
+            property_type.lower().strip() if property_type else None,
+            facet_key,
+        )
+
+    def row_key(self, row):
+        """(price, id) sort key of a row - what a pagination cursor records."""
+        return float(self._prices[row]), self._ids[row]
+
+    def row_after(self, price, property_id):
+        """First row whose (price, id) key sorts after the given key."""
+        lo = int(np.searchsorted(self._prices, price, side="left"))
+        hi = int(np.searchsorted(self._prices, price, side="right"))
+        return bisect_right(self._ids, property_id, lo, hi)
+
+    def keyword_search(self, query, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """BM25 top-k over descriptions, amenities and landmarks, pre-filtered by the structured and facet filters."""
+        hits = self.keyword_hits(query, location, max_price, bhk, property_type, k, facets)
+        print(f"📚 Keyword search: '{query}' → {len(hits)} properties")
+        return [prop for prop, _score in hits]
+
+    def keyword_hits(self, query, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """[(record, BM25 score)] best-first; only listings containing a query term."""
+        mask = None
+        if location or max_price or bhk or property_type or facets or self._alive is not None:
+            mask = self._base_mask(*self._filter_rows(location, max_price, bhk, property_type))
+            if facets:
+                mask, _ = self.facets.filter(mask, facets)
+        return [(self.properties[r], score) for r, score in self.keywords.top_k(query, mask, k)]
+
+    def semantic_search(self, query, embedder, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """Cosine top-k over property text, pre-filtered by the structured and facet filters."""
+        embed_fn, model = embedder
+        if not self.semantic_ready(model):
+            return []  # not built yet: don't spend an embeddings call on the query
+        hits = self.semantic_hits(embed_fn([query])[0], embedder, location, max_price, bhk, property_type, k, facets)
+        print(f"🧠 Semantic search: '{query}' → {len(hits)} properties")
+        return [prop for prop, _score in hits]
+
+    def semantic_ready(self, model) -> bool:
+        """Whether the semantic index is built for this embedding model."""
+        return self.semantic is not None and self.semantic.model == model
+
+    def semantic_hits(self, query_vector, embedder, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """[(record, cosine score)] best-first for an already embedded query.
+
+        Empty until the semantic index for this catalog and embedder is built;
+        PropertyIndex builds it in the background when a snapshot is published.
+        """
+        _embed_fn, model = embedder
+        if not self.semantic_ready(model):
+            print(f"🧠 Semantic index for {model} not built yet - no semantic results")
+            return []
+
+        matched, cutoff = self._filter_rows(location, max_price, bhk, property_type)
+        if facets:
+            mask, _ = self.facets.filter(self._base_mask(matched, cutoff), facets)
+            rows = np.flatnonzero(mask)
+        elif matched is None and self._alive is None:
+            rows = None if cutoff == len(self.properties) else range(cutoff)
+        else:
+            rows = self._sorted_rows(matched, cutoff)
+
+        return [(self.properties[r], score) for r, score in self.semantic.top_k(query_vector, rows, k)]
+
+    def price_bucket(self, max_price):
+        """Number of listings within max_price.
+
+        Two budgets with the same bucket select exactly the same listings,
+        which makes this a lossless cache key for the price filter.
+        """
+        if not max_price:
+            return None
+        return int(np.searchsorted(self._prices, max_price, side="right"))
+
+    def get_by_id(self, property_id):
+        """Get a single property by ID."""
+        row = self._by_id.get(property_id)
+        return self.properties[row] if row is not None and row not in self._dead else None
+
+    def similar_properties(self, property_id, limit=TOP_K):
+        """[(record, similarity)] of the precomputed nearest listings, best first."""
+        if property_id in self._by_id and self._by_id[property_id] in self._dead:
+            return []
+        # Over-fetch by the tombstone count so hidden neighbors don't shorten the list
+        neighbors = self.similar.similar(property_id, limit + len(self._dead) if limit else limit)
+        found = [(self.get_by_id(neighbor_id), score) for neighbor_id, score in neighbors]
+        return [(prop, score) for prop, score in found if prop is not None][:limit]
+
+    def get_locations(self):
+        """Get list of unique locations."""
+        return list(self._locations)
+
+
+def _file_signature(path: str):
+    """(inode, mtime, size) - changes whenever the file is edited or replaced."""
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
 
 class PropertyIndex:
     def __new__(cls):
@@ -33,82 +675,279 @@ class PropertyIndex:
         # app/rag/index.py → go up to app/
         app_dir = os.path.dirname(os.path.dirname(__file__))
 
-        data_path = os.path.join(
+        self.data_path = os.path.join(
             app_dir,
             "data",
             "properties.json"
         )
+        self._embedder = get_embedder()
+        # Serializes writers only - readers never take a lock
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._signature = None
+        self._snapshot = None
+
+        # Uncompacted upserts/deletes (app/rag/delta.py) on top of the properties.json snapshot
+        self._source = None
+        self._changes = {}
+        self._journal = DeltaJournal(journal_path(self.data_path))
+        self._journal_offset = 0
 
-        with open(data_path, "r", encoding="utf-8") as f:
-            self.properties = json.load(f)
+        # Background embedding of catalog parts published without a semantic index
+        self._semantic_lock = threading.Lock()
+        self._semantic_thread = None
+        self._semantic_pending = False
 
-        print(f"📦 PropertyIndex loaded {len(self.properties)} properties")
+        self.reload()
         self._initialized = True
 
-    def search(self, location=None, max_price=None, bhk=None, property_type=None):
-        """Search properties with multiple filters."""
-        results = self.properties
+    @property
+    def snapshot(self):
+        """Current catalog snapshot. Grab it once per request for a consistent view."""
+        return self._snapshot
 
-        # Filter by location (matches location field or nearby landmarks)
-        if location:
-            location_lower = location.lower().strip()
-            # Normalize location using aliases (handle misspellings)
-            normalized_location = LOCATION_ALIASES.get(location_lower, location_lower)
-
-            results = [
-                p for p in results
-                if normalized_location in p.get("location", "").lower()
-                or normalized_location in p.get("city", "").lower()
-                or location_lower in p.get("location", "").lower()  # Also try original
-                or location_lower in p.get("city", "").lower()
-                or any(normalized_location in landmark.lower() for landmark in p.get("nearby_landmarks", []))
-                or normalized_location in p.get("nearby_metro", "").lower()
-            ]
-            print(f"🔍 Property search: location='{location}' (normalized: '{normalized_location}'), found {len(results)} properties")
+    @property
+    def version(self):
+        return self._snapshot.version
 
-        # Filter by max price
-        if max_price:
-            results = [
-                p for p in results
-                if p["price"] <= max_price
-            ]
+    @property
+    def properties(self):
+        return self._snapshot.properties
 
-        # Filter by BHK
-        if bhk:
-            bhk_str = str(bhk).upper()
-            if "BHK" not in bhk_str:
-                bhk_str = f"{bhk} BHK"
-            results = [
-                p for p in results
-                if bhk_str in p.get("bhk", "").upper()
-            ]
+    def reload(self, force: bool = True) -> CatalogSnapshot:
+        """Rebuild the index from disk off to the side and publish it atomically.
 
-        # Filter by property type (Apartment, Villa, Plot)
-        if property_type:
-            type_lower = property_type.lower()
-            results = [
-                p for p in results
-                if type_lower in p.get("type", "").lower()
-            ]
+        With force=False the file is only re-read if its inode/mtime/size changed;
+        otherwise only delta journal entries appended since the last check are
+        applied. On failure the current snapshot stays in place and the error propagates.
+        """
+        with self._reload_lock:
+            signature = _file_signature(self.data_path)
+            if not force and signature == self._signature:
+                entries, offset = self._journal.read(self._journal_offset)
+                if entries is not None:
+                    if entries:
+                        self._publish_changes(entries, offset)
+                    return self._snapshot
+                # Journal shrank: another worker compacted it into properties.json
+                signature = _file_signature(self.data_path)
+            return self._load(signature)
+
+    def _load(self, signature) -> CatalogSnapshot:
+        """Build from properties.json, replay the delta journal and publish (reload lock held)."""
+        start = time.time()
+        if USE_SHARDED_CATALOG:
+            # Imported here: shards builds on CatalogSnapshot
+            from app.rag.shards import open_sharded
+
+            # PERFORMANCE: boot reads only the shard manifest; cities load on first query
+            source = open_sharded(self.data_path, embedder=self._embedder)
+        else:
+            with open(self.data_path, "rb") as f:
+                raw = f.read()
+            if USE_COMPILED_CATALOG:
+                # PERFORMANCE: mmap the columnar snapshot instead of json.load-ing every record
+                catalog = open_compiled(self.data_path, raw)
+            else:
+                catalog = InMemoryCatalog(json.loads(raw))
+            source = CatalogSnapshot(
+                catalog,
+                self.data_path,
+                embedding_model=self._embedder[1],
+                fingerprint=source_fingerprint(raw),
+            )
+
+        entries, offset = self._journal.read(0)
+        self._source = source
+        self._changes = {}
+        self._journal_offset = 0
+        self._signature = signature
+        previous = self._snapshot
+        if entries:
+            snapshot = self._publish_changes(entries, offset)
+        else:
+            snapshot = self._snapshot = source
+
+        self._schedule_semantic_build()
+        if previous is None:
+            print(f"📦 PropertyIndex loaded {len(snapshot)} properties (catalog v{snapshot.version})")
+        else:
+            print(f"📦 PropertyIndex reloaded {len(snapshot)} properties in {(time.time() - start)*1000:.0f}ms "
+                  f"(catalog v{previous.version} → v{snapshot.version})")
+        return snapshot
+
+    def _publish_changes(self, entries, offset):
+        """Fold journal entries into the overlay and swap in a new LiveCatalog (reload lock held)."""
+        # Imported here: delta builds on CatalogSnapshot
+        from app.rag.delta import LiveCatalog
+
+        changes = fold(dict(self._changes), entries)
+        snapshot = LiveCatalog(self._source, changes, embedding_model=self._embedder[1])
+
+        # Single reference swap - in-flight searches keep the old snapshot
+        self._snapshot = snapshot
+        self._changes = changes
+        self._journal_offset = offset
+        if snapshot.overlay is not None:
+            self._schedule_semantic_build()
+        return snapshot
+
+    def _schedule_semantic_build(self):
+        """Embed catalog parts published without a current semantic index, in a background thread."""
+        with self._semantic_lock:
+            self._semantic_pending = True
+            if self._semantic_thread is not None:
+                return  # the running build picks the request up
+            self._semantic_thread = threading.Thread(target=self._semantic_worker, name="semantic-build", daemon=True)
+            self._semantic_thread.start()
+
+    def _semantic_worker(self):
+        while True:
+            with self._semantic_lock:
+                if not self._semantic_pending:
+                    self._semantic_thread = None
+                    return
+                self._semantic_pending = False
+            try:
+                self._build_semantic()
+            except Exception as e:
+                print(f"⚠️ Semantic index build failed, semantic search unavailable: {e}")
+
+    def _build_semantic(self):
+        """Build and persist missing semantic matrices, then republish the catalog with them.
+
+        Snapshots are never mutated: the source gets a with_semantic() copy and
+        a LiveCatalog is rebuilt, its overlay loading the matrix just saved.
+        """
+        embed_fn, model = self._embedder
+        snapshot = self._snapshot
+        parts = [self._source, getattr(snapshot, "overlay", None)]
+        built = {}
+        for part in parts:
+            # Sharded catalogs embed each city as it loads (app/rag/shards.py)
+            if isinstance(part, CatalogSnapshot) and not part.semantic_ready(model):
+                built[id(part)] = SemanticIndex.build(part.properties, part.embeddings_path, embed_fn, model, part.fingerprint)
+        if not built:
+            return
+
+        with self._reload_lock:
+            if self._snapshot is not snapshot:
+                return  # republished meanwhile; that publish scheduled its own build
+            source = self._source
+            if id(source) in built:
+                source = self._source = source.with_semantic(built[id(source)])
+            if self._changes:
+                from app.rag.delta import LiveCatalog
+
+                self._snapshot = LiveCatalog(source, self._changes, embedding_model=model)
+            else:
+                self._snapshot = source
+        print(f"🧠 Semantic index ready for {model} (catalog v{self._snapshot.version})")
+
+    def apply_delta(self, upserts=(), deletes=()) -> dict:
+        """Upsert validated records and delete ids without rebuilding the base index.
+
+        The change is journaled first (so other workers and restarts replay it),
+        then only the small overlay index is rebuilt. Returns the delta counts.
+        """
+        from app.rag.delta import COMPACT_AFTER, compact
 
-        # Sort by price (ascending)
-        results.sort(key=lambda x: x["price"])
+        entries = [{"op": "upsert", "property": dict(record)} for record in upserts]
+        entries += [{"op": "delete", "id": str(property_id)} for property_id in deletes]
+        if not entries:
+            return {"upserts": 0, "deletes": 0, "catalog_version": self.version}
 
-        return results[:5]
+        with self._reload_lock:
+            start = time.time()
+            previous = self._snapshot
+            self._journal.append(entries)
+            new_entries, offset = self._journal.read(self._journal_offset)
+            if new_entries is None:
+                # Compacted by another worker meanwhile: our entries are in the fresh journal
+                snapshot = self._load(_file_signature(self.data_path))
+            else:
+                snapshot = self._publish_changes(new_entries, offset)
+
+            if len(self._changes) >= COMPACT_AFTER:
+                with self._journal.locked() as f:
+                    # Entries appended by other workers since our last read are folded in too
+                    new_entries, offset = self._journal.read(self._journal_offset)
+                    if new_entries is not None:
+                        changes = fold(dict(self._changes), new_entries)
+                        count = compact(self._source, changes, self.data_path)
+                        self._journal.reset(f)
+                        print(f"🗜️ Compacted {len(changes)} catalog changes into {self.data_path} ({count} properties)")
+                snapshot = self._load(_file_signature(self.data_path))
+
+        print(f"✏️ Catalog delta: {len(upserts)} upserts, {len(deletes)} deletes in {(time.time() - start)*1000:.0f}ms "
+              f"(catalog v{previous.version} → v{snapshot.version})")
+        return {"upserts": len(upserts), "deletes": len(deletes), "catalog_version": snapshot.version}
+
+    def start_watcher(self, interval: float = 5.0):
+        """Poll properties.json and the delta journal in a daemon thread and apply changes."""
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload(force=False)
+                except Exception as e:
+                    print(f"⚠️ Catalog reload failed, keeping v{self.version}: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="catalog-watcher", daemon=True)
+        self._watcher.start()
+        print(f"👀 Watching {self.data_path} for catalog changes every {interval}s")
+
+    def search(self, location=None, max_price=None, bhk=None, property_type=None, weights=None):
+        """Search properties with multiple filters, best matches first."""
+        return self._snapshot.search(location, max_price, bhk, property_type, weights)
+
+    def faceted_search(self, location=None, max_price=None, bhk=None, property_type=None, facets=None, limit=TOP_K):
+        return self._snapshot.faceted_search(location, max_price, bhk, property_type, facets, limit)
+
+    def batch_search(self, queries, limit=TOP_K):
+        return self._snapshot.batch_search(queries, limit)
+
+    def set_embedder(self, embed_fn, model: str):
+        """Swap the embedding function (e.g. a local embedder for tests/benchmarks)."""
+        self._embedder = (embed_fn, model)
+        if USE_SHARDED_CATALOG:
+            self.reload()  # shards take the embedder when the catalog is opened
+        else:
+            self._schedule_semantic_build()
+
+    def wait_for_semantic(self, timeout: float = None):
+        """Block until background semantic index builds are done (offline tools and tests)."""
+        thread = self._semantic_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def keyword_search(self, query, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """BM25 keyword top-k, pre-filtered by the structured and facet filters (no embeddings call)."""
+        return self._snapshot.keyword_search(query, location, max_price, bhk, property_type, k, facets)
+
+    def semantic_search(self, query, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """Cosine top-k over property text, pre-filtered by the structured and facet filters."""
+        return self._snapshot.semantic_search(query, self._embedder, location, max_price, bhk, property_type, k, facets)
+
+    def price_bucket(self, max_price):
+        return self._snapshot.price_bucket(max_price)
 
     def get_by_id(self, property_id):
         """Get a single property by ID."""
-        for prop in self.properties:
-            if prop["id"] == property_id:
-                return prop
-        return None
+        return self._snapshot.get_by_id(property_id)
+
+    def resolve_location(self, query, limit=5, min_score=MIN_SIMILARITY):
+        return self._snapshot.resolve_location(query, limit, min_score)
+
+    def similar_properties(self, property_id, limit=TOP_K):
+        return self._snapshot.similar_properties(property_id, limit)
+
+    def relaxed_search(self, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        return self._snapshot.relaxed_search(location, max_price, bhk, property_type, k, facets)
 
     def get_locations(self):
         """Get list of unique locations."""
-        locations = set()
-        for prop in self.properties:
-            # Extract area name from location
-            loc = prop.get("location", "").split(",")[0].strip()
-            if loc:
-                locations.add(loc)
-        return sorted(locations)
+        return self._snapshot.get_locations()
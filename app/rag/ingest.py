@@ -0,0 +1,229 @@
+"""
+Streaming catalog ingestion: NDJSON / CSV feeds applied as catalog deltas.
+
+Feeds are read one line at a time and every record is validated before it
+reaches the index, so a feed of any size runs in constant memory and a bad
+row is reported with its line number instead of failing the whole feed.
+Valid rows are applied in batches of INGEST_BATCH_SIZE through
+PropertyIndex.apply_delta (see app/rag/delta.py) - no full rebuild.
+
+A row is an upsert unless it asks for a delete: "_op": "delete" in NDJSON,
+an _op column set to "delete" in CSV (only "id" is needed then). CSV list
+columns (amenities, nearby_landmarks, images, highlights) are "|" separated.
+
+    python -m app.rag.ingest feed.ndjson
+    python -m app.rag.ingest feed.csv --dry-run
+"""
+
+import csv
+import io
+import json
+import re
+import sys
+import time
+
+INGEST_BATCH_SIZE = 500
+
+REQUIRED_FIELDS = ("id", "name", "location", "city", "type")
+INTEGER_FIELDS = ("price",)
+NUMBER_FIELDS = ("area_sqft", "price_per_sqft")
+LIST_FIELDS = ("amenities", "nearby_landmarks", "images", "highlights", "strategic_advantages")
+STRING_FIELDS = (
+    "bhk", "possession", "builder", "facing", "floor", "description", "rera_id",
+    "nearby_metro", "nearby_mall", "property_url", "virtual_tour_url", "brochure_url", "contact_number",
+)
+
+_LIST_SEP = "|"
+_BHK_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(?:bhk)?\s*$", re.IGNORECASE)
+
+
+class InvalidRecord(ValueError):
+    """Raised when a feed row does not match the property schema."""
+    pass
+
+
+def _number(field, value, integer=False):
+    if isinstance(value, bool):
+        raise InvalidRecord(f"{field}: expected a number, got {value!r}")
+    if isinstance(value, str):
+        text = value.replace(",", "").strip()
+        try:
+            value = float(text)
+        except ValueError:
+            raise InvalidRecord(f"{field}: expected a number, got {value!r}")
+    if not isinstance(value, (int, float)) or value != value or value < 0:
+        raise InvalidRecord(f"{field}: expected a non-negative number, got {value!r}")
+    if integer or float(value).is_integer():
+        return int(value)
+    return float(value)
+
+
+def validate_property(record: dict) -> dict:
+    """Clean copy of one property record, or InvalidRecord.
+
+    Required text fields must be non-empty, numbers are coerced ("1,15,00,000"
+    and "635" are fine), "2" becomes "2 BHK", missing price_per_sqft is derived
+    from price and area. Unknown fields are kept as they are.
+    """
+    if not isinstance(record, dict):
+        raise InvalidRecord(f"expected an object, got {type(record).__name__}")
+
+    clean = {key: value for key, value in record.items() if not key.startswith("_") and value not in (None, "")}
+    for field in REQUIRED_FIELDS:
+        value = clean.get(field)
+        if isinstance(value, (int, float)) and field == "id" and not isinstance(value, bool):
+            value = str(value)
+        if not isinstance(value, str) or not value.strip():
+            raise InvalidRecord(f"{field}: required")
+        clean[field] = value.strip()
+
+    for field in INTEGER_FIELDS:
+        if field in clean:
+            clean[field] = _number(field, clean[field], integer=True)
+    for field in NUMBER_FIELDS:
+        if field in clean:
+            clean[field] = _number(field, clean[field])
+
+    for field in LIST_FIELDS:
+        if field in clean:
+            value = clean[field]
+            if isinstance(value, str):
+                value = value.split(_LIST_SEP)
+            if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                raise InvalidRecord(f"{field}: expected a list of strings")
+            clean[field] = [v.strip() for v in value if v.strip()]
+
+    for field in STRING_FIELDS:
+        if field in clean:
+            if not isinstance(clean[field], (str, int, float)) or isinstance(clean[field], bool):
+                raise InvalidRecord(f"{field}: expected text")
+            clean[field] = str(clean[field]).strip()
+
+    if "bhk" in clean:
+        match = _BHK_RE.match(clean["bhk"])
+        if match:
+            clean["bhk"] = f"{match.group(1)} BHK"
+
+    if "price_per_sqft" not in clean and clean.get("price") and clean.get("area_sqft"):
+        clean["price_per_sqft"] = round(clean["price"] / clean["area_sqft"])
+
+    return clean
+
+
+def parse_row(row: dict):
+    """("upsert", clean record) or ("delete", id) for one feed row."""
+    if not isinstance(row, dict):
+        raise InvalidRecord(f"expected an object, got {type(row).__name__}")
+    op = str(row.get("_op") or "upsert").strip().lower()
+    if op == "delete":
+        property_id = row.get("id")
+        if property_id in (None, ""):
+            raise InvalidRecord("id: required")
+        return "delete", str(property_id).strip()
+    if op != "upsert":
+        raise InvalidRecord(f"_op: expected upsert or delete, got {op!r}")
+    return "upsert", validate_property(row)
+
+
+def iter_ndjson(lines):
+    """(line number, row dict or InvalidRecord) for each non-blank line."""
+    for line_no, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, InvalidRecord(f"invalid JSON: {e.msg}")
+
+
+def iter_csv(lines):
+    """(line number, row dict) for each CSV data row; the first row is the header."""
+    if not isinstance(lines, io.TextIOBase):
+        lines = (line.decode("utf-8") if isinstance(line, bytes) else line for line in lines)
+    reader = csv.DictReader(lines)
+    for row in reader:
+        if any(value for value in row.values() if isinstance(value, str)):
+            yield reader.line_num, row
+
+
+def iter_feed(lines, fmt: str = "ndjson"):
+    """(line number, ("upsert", record) / ("delete", id) / InvalidRecord) per feed row."""
+    rows = iter_csv(lines) if fmt == "csv" else iter_ndjson(lines)
+    for line_no, row in rows:
+        if isinstance(row, InvalidRecord):
+            yield line_no, row
+            continue
+        try:
+            yield line_no, parse_row(row)
+        except InvalidRecord as e:
+            yield line_no, e
+
+
+def ingest(lines, fmt: str = "ndjson", apply=None, batch_size: int = INGEST_BATCH_SIZE, max_errors: int = 100):
+    """Validate a feed and hand valid rows to apply(upserts, deletes) in batches.
+
+    Returns {"upserts", "deletes", "invalid", "errors": [{"line", "error"}], "seconds"}.
+    apply=None validates only (dry run).
+    """
+    start = time.time()
+    report = {"upserts": 0, "deletes": 0, "invalid": 0, "errors": []}
+    upserts, deletes = [], []
+
+    def flush():
+        if apply is not None and (upserts or deletes):
+            apply(upserts, deletes)
+        report["upserts"] += len(upserts)
+        report["deletes"] += len(deletes)
+        upserts.clear()
+        deletes.clear()
+
+    for line_no, parsed in iter_feed(lines, fmt):
+        if isinstance(parsed, InvalidRecord):
+            report["invalid"] += 1
+            if len(report["errors"]) < max_errors:
+                report["errors"].append({"line": line_no, "error": str(parsed)})
+            continue
+        op, value = parsed
+        (upserts if op == "upsert" else deletes).append(value)
+        if len(upserts) + len(deletes) >= batch_size:
+            flush()
+    flush()
+
+    report["seconds"] = round(time.time() - start, 3)
+    return report
+
+
+def feed_format(name: str, content_type: str = None) -> str:
+    """"csv" or "ndjson" from a content type or file name."""
+    if content_type and "csv" in content_type.lower():
+        return "csv"
+    if name and name.lower().endswith(".csv"):
+        return "csv"
+    return "ndjson"
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0].startswith("--"):
+        print("Usage: python -m app.rag.ingest <feed.ndjson|feed.csv> [--format csv|ndjson] [--dry-run]")
+        sys.exit(1)
+
+    path = args[0]
+    fmt = args[args.index("--format") + 1] if "--format" in args else feed_format(path)
+    apply = None
+    if "--dry-run" not in args:
+        from app.rag.index import PropertyIndex
+
+        apply = PropertyIndex().apply_delta
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        report = ingest(f, fmt, apply)
+
+    mode = "Validated" if apply is None else "Ingested"
+    print(f"📥 {mode} {path}: {report['upserts']} upserts, {report['deletes']} deletes, "
+          f"{report['invalid']} invalid rows in {report['seconds']}s")
+    for error in report["errors"]:
+        print(f"   line {error['line']}: {error['error']}")
+    sys.exit(1 if report["invalid"] else 0)
@@ -0,0 +1,100 @@
+"""
+Delta journal: append-only log of catalog changes next to properties.json.
+
+One JSON entry per line in properties.delta.ndjson:
+
+    {"op": "upsert", "property": {...}, "ts": 1760000000.0}
+    {"op": "delete", "id": "p21", "ts": 1760000000.0}
+
+Every worker appends through a file lock and replays entries it has not seen
+yet (see PropertyIndex.reload), so all workers converge on the same catalog.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev servers only
+    fcntl = None
+
+
+def journal_path(data_path: str) -> str:
+    return f"{os.path.splitext(data_path)[0]}.delta.ndjson"
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive cross-process lock on path (created if missing); yields the open handle."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def fold(changes: dict, entries) -> dict:
+    """Apply journal entries to {id: record or None (deleted)}; later entries win."""
+    for entry in entries:
+        if entry["op"] == "upsert":
+            changes[str(entry["property"]["id"])] = entry["property"]
+        elif entry["op"] == "delete":
+            changes[str(entry["id"])] = None
+    return changes
+
+
+class DeltaJournal:
+    """Append-only NDJSON log of catalog changes, shared by every worker."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def locked(self):
+        """Exclusive lock on the journal (appends and compaction)."""
+        return file_lock(self.path)
+
+    def append(self, entries):
+        """Durably append entries (one write + fsync for the whole batch)."""
+        now = time.time()
+        data = b"".join(
+            json.dumps({**entry, "ts": now}, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            for entry in entries
+        )
+        with self.locked() as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self, offset: int = 0):
+        """(entries, new offset) for complete lines after offset.
+
+        Returns (None, 0) if the journal shrank below offset, i.e. another
+        worker compacted it and the caller must reload from properties.json.
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return ([], 0) if offset == 0 else (None, 0)
+        if size < offset:
+            return None, 0
+        if size == offset:
+            return [], offset
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        # A line still being written by another process is picked up next time
+        end = data.rfind(b"\n") + 1
+        entries = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        return entries, offset + end
+
+    def reset(self, f):
+        """Empty the journal; f is the handle from locked()."""
+        f.truncate(0)
+        f.flush()
+        os.fsync(f.fileno())
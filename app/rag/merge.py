@@ -0,0 +1,101 @@
+"""
+Combine search results from several catalog parts.
+
+Used wherever one query is answered by more than one CatalogSnapshot: the
+per-city shards of a ShardedCatalog, and the base catalog plus the delta
+overlay of a LiveCatalog. Every merge keeps the single-snapshot ordering:
+ranked results by (score desc, price, id), browse results by (price, id).
+"""
+
+import heapq
+
+from app.rag.catalog import price_key
+from app.rag.facets import FACETS, value_key
+
+
+def record_key(prop):
+    """(price, id) - browse order."""
+    return price_key(prop), str(prop["id"])
+
+
+def hit_key(hit):
+    """Best score first, then cheapest - the CatalogSnapshot ranking order."""
+    prop, score = hit
+    return -score, price_key(prop), str(prop["id"])
+
+
+def merge_hits(hit_lists, k):
+    """Best k (record, score) pairs over several ranked lists."""
+    return heapq.nsmallest(k, [hit for hits in hit_lists for hit in hits], key=hit_key)
+
+
+def merge_faceted(found, limit):
+    """Sum totals and facet counts of faceted_search results; keep the cheapest results."""
+    results, total = [], 0
+    counts = {facet: {} for facet in FACETS}  # facet -> value key -> [display, count]
+    for part in found:
+        results = heapq.nsmallest(limit, results + list(part["results"]), key=record_key)
+        total += part["total"]
+        for facet, values in part["facets"].items():
+            for value, count in values.items():
+                # Parts may spell the same value differently ("Kids Play Area"/"Kids play area")
+                counts[facet].setdefault(value_key(facet, value), [value, 0])[1] += count
+    return {
+        "results": results,
+        "total": total,
+        "facets": {
+            facet: dict(sorted(values.values(), key=lambda item: -item[1]))
+            for facet, values in counts.items()
+        },
+    }
+
+
+def merge_pages(pages, page_size):
+    """Merge search_page results that all started after the same cursor key."""
+    results = [prop for page in pages for prop in page["results"]]
+    return {
+        "results": heapq.nsmallest(page_size, results, key=record_key),
+        "total": sum(page["total"] for page in pages),
+        "has_more": any(page["has_more"] for page in pages) or len(results) > page_size,
+    }
+
+
+def merge_batch(found, limit):
+    """Merge batch_search results for one query coming from several parts."""
+    best = merge_hits([zip(part["results"], part["scores"]) for part in found], limit)
+    return {
+        "results": [prop for prop, _score in best],
+        "scores": [score for _prop, score in best],
+        "total": sum(part["total"] for part in found),
+    }
+
+
+def empty_relaxed():
+    return {"results": [], "scores": [], "total": 0, "relaxation": None, "level": None, "filters": None}
+
+
+def merge_relaxed(found, k):
+    """Merge relaxed_search results, keeping only the parts that reached the least relaxed step."""
+    found = [f for f in found if f["results"]]
+    if not found:
+        return empty_relaxed()
+
+    level = min(f["level"] for f in found)
+    found = [f for f in found if f["level"] == level]
+    best = merge_hits([zip(f["results"], f["scores"]) for f in found], k)
+    filters = dict(found[0]["filters"])
+    if len({f["filters"]["location"] for f in found}) > 1:
+        filters["location"] = None
+    return {
+        "results": [prop for prop, _score in best],
+        "scores": [score for _prop, score in best],
+        "total": sum(f["total"] for f in found),
+        "relaxation": found[0]["relaxation"],
+        "level": level,
+        "filters": filters,
+    }
+
+
+def merge_scored(hit_lists, k):
+    """Best k (record, score) pairs by score alone (cosine, BM25), highest first."""
+    return heapq.nlargest(k, [hit for hits in hit_lists for hit in hits], key=lambda hit: hit[1])
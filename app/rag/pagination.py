@@ -0,0 +1,70 @@
+"""
+Opaque keyset cursors for paging through price-ordered search results.
+
+A cursor records the (price, id) of the last listing served. Because rows
+are ordered by (price, id), the next page starts right after that key even if
+the catalog was reloaded in between - or the request lands on another worker,
+whose catalog version numbers differ - so no version is stored.
+
+A first page that was ranked by relevance rather than price is followed by
+a cursor with no key (start from the cheapest listing) and the ids that page
+showed, which every later page leaves out.
+"""
+
+import base64
+import json
+import math
+
+
+# Most ids a cursor may carry to leave out (one ranked first page)
+MAX_SKIP = 50
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor string cannot be decoded."""
+    pass
+
+
+def encode_cursor(price, property_id, skip=()) -> str:
+    """Cursor continuing after (price, id); property_id None = from the start. skip: ids to leave out."""
+    # Unpriced listings sort last with an infinite price, which JSON can't hold
+    price = None if price == float("inf") else price
+    fields = [price, property_id, list(skip)] if skip else [price, property_id]
+    raw = json.dumps(fields, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _valid_id(value) -> bool:
+    return not isinstance(value, bool) and isinstance(value, (str, int))
+
+
+def decode_cursor(cursor: str):
+    """Return (after, skip) from a cursor produced by encode_cursor.
+
+    after is the (price, id) key to continue after, or None to start from the
+    first listing; skip is the frozenset of ids to leave out.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        fields = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+    if not isinstance(fields, list) or len(fields) not in (2, 3):
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+    price, property_id = fields[:2]
+    if price is not None and (isinstance(price, bool) or not isinstance(price, (int, float)) or not math.isfinite(price)):
+        raise InvalidCursor(f"Invalid cursor price: {price!r}")
+    if property_id is not None and not _valid_id(property_id):
+        raise InvalidCursor(f"Invalid cursor id: {property_id!r}")
+
+    skip = frozenset()
+    # Cursors issued before the version was dropped carry it as an int third item (ignored)
+    if len(fields) == 3 and not isinstance(fields[2], int):
+        if not isinstance(fields[2], list) or len(fields[2]) > MAX_SKIP or not all(_valid_id(i) for i in fields[2]):
+            raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+        skip = frozenset(str(i) for i in fields[2])
+    if property_id is None:
+        if price is not None:
+            raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+        return None, skip
+    return ((float("inf") if price is None else price), str(property_id)), skip
@@ -0,0 +1,168 @@
+"""
+Relevance ranking for property search results.
+
+Every candidate is scored in one NumPy pass from feature columns computed
+once per catalog snapshot:
+
+    budget      price close to (not far below) the caller's budget
+    bhk         BHK count close to the requested one
+    possession  ready to move > possession date soon > under construction
+    metro       distance to the nearest (operational) metro
+    value       cheap price per sqft relative to the rest of the catalog
+    builder     listing from a preferred builder (PREFERRED_BUILDERS)
+
+Each feature is in [0, 1]; the score is their weighted sum. Weights come from
+RANKING_WEIGHTS ("budget=3,bhk=2,...") and can be overridden per call.
+With every weight at 0 the order falls back to cheapest first.
+"""
+
+import math
+import os
+import re
+import time
+
+import numpy as np
+
+DEFAULT_WEIGHTS = {
+    "budget": 3.0,
+    "bhk": 2.0,
+    "possession": 1.5,
+    "metro": 1.0,
+    "value": 1.0,
+    "builder": 0.5,
+}
+
+# Budget at which the budget-fit score reaches 0 (as a fraction of the budget)
+BUDGET_FLOOR = 0.5
+
+# Possession dates further away than this score 0, like "Under Construction"
+POSSESSION_HORIZON_MONTHS = 36
+
+# Metro distance scale: a station this far away scores 1/e
+METRO_SCALE_KM = 3.0
+
+_MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1)}
+_POSSESSION_DATE_RE = re.compile(r"([a-z]{3})[a-z]*\.?\s*(\d{4})")
+_KM_RE = re.compile(r"(\d+(?:\.\d+)?)\s*km")
+_BHK_RE = re.compile(r"(\d+(?:\.\d+)?)")
+_NOT_OPERATIONAL = ("upcoming", "planned", "proposed", "under construction")
+
+
+def parse_weights(spec: str) -> dict:
+    """Parse "budget=3,bhk=2" into a weights dict on top of DEFAULT_WEIGHTS."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (spec or "").split(","):
+        name, _, value = part.partition("=")
+        name = name.strip().lower()
+        if name in weights and value.strip():
+            try:
+                weights[name] = float(value)
+            except ValueError:
+                print(f"⚠️ Ignoring invalid ranking weight: {part!r}")
+    return weights
+
+
+RANKING_WEIGHTS = parse_weights(os.getenv("RANKING_WEIGHTS", ""))
+
+PREFERRED_BUILDERS = tuple(
+    b.strip().lower() for b in os.getenv("PREFERRED_BUILDERS", "raymond").split(",") if b.strip()
+)
+
+
+def bhk_number(bhk) -> float:
+    """2 for "2 BHK" / "2" / 2; NaN when there is no number."""
+    match = _BHK_RE.search(str(bhk or ""))
+    return float(match.group(1)) if match else math.nan
+
+
+def possession_score(possession: str, now=None) -> float:
+    """1 for ready to move, decaying to 0 over POSSESSION_HORIZON_MONTHS for dated possession."""
+    text = (possession or "").lower()
+    if "ready" in text:
+        return 1.0
+    match = _POSSESSION_DATE_RE.search(text)
+    if not match or match.group(1) not in _MONTHS:
+        return 0.0
+    now = time.localtime(now)
+    months = (int(match.group(2)) - now.tm_year) * 12 + _MONTHS[match.group(1)] - now.tm_mon
+    return float(min(1.0, max(0.0, 1.0 - months / POSSESSION_HORIZON_MONTHS)))
+
+
+def metro_score(metro: str) -> float:
+    """exp(-km / METRO_SCALE_KM), halved for stations that are not running yet."""
+    text = (metro or "").lower()
+    if not text:
+        return 0.0
+    match = _KM_RE.search(text)
+    score = math.exp(-float(match.group(1)) / METRO_SCALE_KM) if match else 0.3
+    if any(word in text for word in _NOT_OPERATIONAL):
+        score *= 0.5
+    return score
+
+
+class RankingFeatures:
+    """Query-independent feature columns for one catalog snapshot (float32, one entry per row)."""
+
+    def __init__(self, catalog, prices):
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.bhk = np.array([bhk_number(b) for b in catalog.strings("bhk")], dtype=np.float32)
+        self.possession = np.array([possession_score(p) for p in catalog.strings("possession")], dtype=np.float32)
+        self.metro = np.array([metro_score(m) for m in catalog.strings("nearby_metro")], dtype=np.float32)
+        self.builder = np.array(
+            [any(b in builder.lower() for b in PREFERRED_BUILDERS) for builder in catalog.strings("builder")],
+            dtype=np.float32,
+        )
+
+        # Price-per-sqft percentile: cheapest per sqft scores 1, unknown scores 0.5
+        ppsf = np.asarray(catalog.numbers("price_per_sqft"), dtype=np.float64)
+        known = np.isfinite(ppsf) & (ppsf > 0)
+        self.value = np.full(len(ppsf), 0.5, dtype=np.float32)
+        if known.sum() > 1:
+            order = np.argsort(ppsf[known], kind="stable")
+            ranks = np.empty(order.size, dtype=np.float32)
+            ranks[order] = np.arange(order.size, dtype=np.float32)
+            self.value[known] = 1.0 - ranks / (order.size - 1)
+
+    def scores(self, rows, max_price=None, bhk=None, weights=None) -> np.ndarray:
+        """Weighted relevance of each row in rows for one query."""
+        weights = weights or RANKING_WEIGHTS
+        rows = np.asarray(rows, dtype=np.int64)
+        score = np.zeros(rows.size, dtype=np.float32)
+
+        if weights["budget"] and max_price:
+            # 1 at the budget, falling linearly to 0 at BUDGET_FLOOR x budget
+            ratio = self.prices[rows] / float(max_price)
+            fit = np.clip((ratio - BUDGET_FLOOR) / (1.0 - BUDGET_FLOOR), 0.0, 1.0)
+            fit[~np.isfinite(ratio) | (ratio > 1.0)] = 0.0
+            score += weights["budget"] * fit.astype(np.float32)
+
+        wanted = bhk_number(bhk) if bhk else math.nan
+        if weights["bhk"] and not math.isnan(wanted):
+            # 1 for the exact BHK, 0.5 one bedroom off, 0 further away or unknown
+            diff = np.abs(self.bhk[rows] - wanted)
+            score += weights["bhk"] * np.nan_to_num(np.clip(1.0 - diff / 2.0, 0.0, 1.0), nan=0.0)
+
+        for name in ("possession", "metro", "value", "builder"):
+            if weights[name]:
+                score += weights[name] * getattr(self, name)[rows]
+        return score
+
+    def top_k(self, rows, k, max_price=None, bhk=None, weights=None) -> list:
+        """[(row, score)] for the k best rows, best first; ties go to the cheaper row."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0 or k <= 0:
+            return []
+        score = self.scores(rows, max_price, bhk, weights)
+
+        k = min(k, rows.size)
+        # PERFORMANCE: partition is O(n); only the k winners get sorted.
+        # Rows tied with the k-th score are admitted cheapest first, so equal
+        # scores (e.g. all weights 0) keep the old price order.
+        kth = np.partition(score, rows.size - k)[rows.size - k]
+        above = np.flatnonzero(score > kth)
+        tied = np.flatnonzero(score == kth)
+        tied = tied[np.argsort(rows[tied], kind="stable")][:k - above.size]
+        top = np.concatenate([above, tied])
+        top = top[np.lexsort((rows[top], -score[top]))]
+        return [(int(rows[i]), float(score[i])) for i in top]
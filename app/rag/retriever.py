@@ -1,16 +1,184 @@
-from app.rag.index import PropertyIndex
+import os
+
+from app.rag.bm25 import terms
+from app.rag.cache import QueryCache
+from app.rag.catalog import freeze, price_key
+from app.rag.fuzzy import MIN_SIMILARITY
+from app.rag.index import TOP_K, PropertyIndex
+from app.rag.pagination import decode_cursor, encode_cursor
 
 property_index = PropertyIndex()
 
+# relaxation reported when the query matched once its facets were dropped
+FACETS_DROPPED = "facets_dropped"
+
+# PERFORMANCE: The same few (city, bhk, budget) combinations are searched over and over
+query_cache = QueryCache(max_size=int(os.getenv("PROPERTY_CACHE_SIZE", "1024")))
+
 
 def retrieve_properties(location: str = None, max_price: int = None, bhk: str = None, property_type: str = None):
-    """Retrieve properties matching the given criteria."""
-    return property_index.search(
+    """Retrieve properties matching the given criteria.
+
+    Returns a tuple of read-only property records shared with the cache.
+    """
+    # One snapshot per call so a concurrent reload can't mix catalog versions
+    snapshot = property_index.snapshot
+    version = snapshot.version
+    key = snapshot.query_key(location, max_price, bhk, property_type)
+
+    results = query_cache.get(key, version)
+    if results is None:
+        results = tuple(snapshot.search(
+            location=location,
+            max_price=max_price,
+            bhk=bhk,
+            property_type=property_type
+        ))
+        query_cache.put(key, results, version)
+
+    return results
+
+
+def faceted_search_properties(location: str = None, max_price: int = None, bhk: str = None, property_type: str = None, facets: dict = None):
+    """Search with facet filters ({"possession": ["Ready to Move"], "amenities": [...]}).
+
+    Returns a read-only {"results", "total", "facets"} mapping; facet counts
+    cover the whole match set, not just the returned page.
+    """
+    snapshot = property_index.snapshot
+    version = snapshot.version
+    key = ("faceted", snapshot.query_key(location, max_price, bhk, property_type, facets))
+
+    result = query_cache.get(key, version)
+    if result is None:
+        result = freeze(snapshot.faceted_search(
+            location=location,
+            max_price=max_price,
+            bhk=bhk,
+            property_type=property_type,
+            facets=facets
+        ))
+        query_cache.put(key, result, version)
+
+    return result
+
+
+def search_properties_page(location: str = None, max_price: int = None, bhk: str = None, property_type: str = None,
+                           facets: dict = None, cursor: str = None, page_size: int = TOP_K):
+    """One page of price-ordered results plus an opaque cursor for the next page.
+
+    The next page starts right after the cursor's (price, id) key, so it costs
+    O(page size) and stays valid across catalog reloads. Ids the cursor says
+    to skip (a ranked first page, see cursor_skipping) are left out. Raises
+    InvalidCursor.
+    """
+    snapshot = property_index.snapshot
+
+    after, skip = None, frozenset()
+    if cursor:
+        after, skip = decode_cursor(cursor)
+
+    # Skipped ids take at most len(skip) rows of the window, so it still fills the page
+    page = snapshot.search_page(location, max_price, bhk, property_type, facets, after, page_size + len(skip))
+    found = [p for p in page["results"] if str(p["id"]) not in skip]
+    results = tuple(found[:page_size])
+    has_more = len(found) > page_size or page["has_more"]
+
+    next_cursor = None
+    if has_more and results:
+        next_cursor = encode_cursor(price_key(results[-1]), str(results[-1]["id"]), sorted(skip))
+
+    return {
+        "results": results,
+        "next_cursor": next_cursor,
+        "total": page["total"],
+    }
+
+
+def cursor_skipping(shown) -> str:
+    """Cursor for the pages after a ranked first page: every match in (price, id) order except shown."""
+    return encode_cursor(None, None, [str(p["id"]) for p in shown])
+
+
+def relaxed_search_properties(location: str = None, max_price: int = None, bhk: str = None,
+                              property_type: str = None, facets: dict = None, k: int = TOP_K):
+    """Best matches for a query, relaxing it step by step (budget, BHK, locality, city) until something matches.
+
+    Facets are kept on every step short of top picks; if only top picks match
+    with them, the ladder is rerun without facets instead. Returns {"results",
+    "total", "relaxation", "filters", "dropped_facets"}; relaxation is None for
+    an exact match, FACETS_DROPPED if only the facets were given up, otherwise
+    the name of the RELAXATIONS step applied. dropped_facets names the facets
+    that had to be given up ([] if none).
+    """
+    snapshot = property_index.snapshot
+    version = snapshot.version
+    key = ("relaxed", snapshot.query_key(location, max_price, bhk, property_type, facets), k)
+
+    result = query_cache.get(key, version)
+    if result is None:
+        found = snapshot.relaxed_search(location, max_price, bhk, property_type, k, facets)
+        dropped = []
+        if found["relaxation"] == "top_picks" and facets:
+            dropped = [facet for facet, values in facets.items() if values]
+            unfaceted = snapshot.relaxed_search(location, max_price, bhk, property_type, k)
+            if unfaceted["relaxation"] != "top_picks":
+                found = dict(unfaceted, relaxation=unfaceted["relaxation"] or FACETS_DROPPED)
+        result = freeze({
+            **{field: found[field] for field in ("results", "total", "relaxation", "filters")},
+            "dropped_facets": dropped,
+        })
+        query_cache.put(key, result, version)
+    return result
+
+
+def batch_search_properties(queries, limit: int = TOP_K):
+    """Run many filter sets against one catalog snapshot in a single vectorized pass.
+
+    queries: [{"location", "max_price", "bhk", "property_type"}] (keys optional).
+    Returns [{"results": (...), "total": n}] in query order.
+    """
+    snapshot = property_index.snapshot
+    return [
+        {"results": tuple(found["results"]), "total": found["total"]}
+        for found in snapshot.batch_search(queries, limit)
+    ]
+
+
+def keyword_search_properties(query: str, location: str = None, max_price: int = None, bhk: str = None, property_type: str = None, facets: dict = None):
+    """Keyword search ("clubhouse", "sky garden", "near Upvan Lake") within the given filters.
+
+    BM25 over descriptions, amenities and landmarks - no embeddings API call.
+    Returns a tuple of records best first (empty if no listing has a query term).
+    """
+    snapshot = property_index.snapshot
+    version = snapshot.version
+    key = ("keyword", " ".join(sorted(set(terms(query)))), snapshot.query_key(location, max_price, bhk, property_type, facets))
+
+    results = query_cache.get(key, version)
+    if results is None:
+        results = tuple(snapshot.keyword_search(
+            query,
+            location=location,
+            max_price=max_price,
+            bhk=bhk,
+            property_type=property_type,
+            facets=facets
+        ))
+        query_cache.put(key, results, version)
+    return results
+
+
+def semantic_search_properties(query: str, location: str = None, max_price: int = None, bhk: str = None, property_type: str = None, facets: dict = None):
+    """Free-text search ("quiet place near a lake with a pool") within the given filters."""
+    return tuple(property_index.semantic_search(
+        query,
         location=location,
         max_price=max_price,
         bhk=bhk,
-        property_type=property_type
-    )
+        property_type=property_type,
+        facets=facets
+    ))
 
 
 def get_property_by_id(property_id: str):
@@ -18,6 +186,65 @@ def get_property_by_id(property_id: str):
     return property_index.get_by_id(property_id)
 
 
+def get_similar_properties(property_id: str, limit: int = TOP_K):
+    """Precomputed nearest listings to a property: ((record, similarity), ...) best first."""
+    return tuple(property_index.similar_properties(property_id, limit))
+
+
 def get_available_locations():
     """Get list of available locations."""
     return property_index.get_locations()
+
+
+def resolve_location(query: str, limit: int = 5, min_score: float = MIN_SIMILARITY):
+    """Rank known place names by trigram similarity to a (possibly misspelled) query.
+
+    Only names scoring at least min_score are returned (empty for an unknown place).
+    """
+    return property_index.resolve_location(query, limit, min_score)
+
+
+def get_catalog_version():
+    """Version number of the catalog currently being served."""
+    return property_index.version
+
+
+def get_catalog_tag():
+    """Content fingerprint + version of the catalog being served (HTTP validators).
+
+    The fingerprint alone is the same in every worker; the process-local
+    version is added because responses echo it as catalog_version.
+    """
+    snapshot = property_index.snapshot
+    return f"{snapshot.fingerprint}:{snapshot.version}"
+
+
+def reload_catalog(force: bool = True):
+    """Re-read properties.json and swap in the new index. Returns catalog info."""
+    property_index.reload(force=force)
+    return get_catalog_info()
+
+
+def apply_catalog_delta(upserts=(), deletes=()):
+    """Upsert validated property records / delete ids in the live index (see app/rag/delta.py)."""
+    return property_index.apply_delta(upserts, deletes)
+
+
+def get_catalog_info():
+    snapshot = property_index.snapshot
+    return {
+        "catalog_version": snapshot.version,
+        "fingerprint": snapshot.fingerprint,
+        "count": len(snapshot),
+        "loaded_at": snapshot.loaded_at,
+        "source": snapshot.data_path,
+        # Per-city shard cache (only when CATALOG_SHARDED=true)
+        "shards": snapshot.shard_stats() if hasattr(snapshot, "shard_stats") else None,
+        # Upserts/deletes not yet compacted into properties.json
+        "delta": snapshot.delta_stats() if hasattr(snapshot, "delta_stats") else None,
+    }
+
+
+def get_cache_stats():
+    """Hit/miss/eviction counters for the property query cache."""
+    return query_cache.stats()
@@ -0,0 +1,201 @@
+"""
+Vector index over property descriptions, amenities and landmarks.
+
+Vectors live in a contiguous float32 matrix saved as an .npy file next to
+properties.json and memory-mapped at startup. Builds write new files and
+swap them in with os.replace, and only one process builds at a time. Rows are L2-normalized, so a
+cosine top-k is a single matrix-vector product. Builds go through the
+content-hashed EmbeddingStore, so only new or edited listings are embedded.
+
+Build offline:  python -m app.rag.semantic build [--embedder local]
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from app.rag.embedding_store import EmbeddingBuilder, EmbeddingStore
+from app.rag.journal import file_lock
+
+
+def property_text(prop) -> str:
+    """Text embedded for a property."""
+    parts = [
+        prop.get("name") or "",
+        prop.get("description") or "",
+        "Amenities: " + ", ".join(prop.get("amenities") or []),
+        "Nearby: " + ", ".join(prop.get("nearby_landmarks") or []),
+    ]
+    return ". ".join(parts)
+
+
+def embedding_meta_path(data_path: str) -> str:
+    """Metadata stored next to the catalog file; it names the current matrix."""
+    return f"{os.path.splitext(data_path)[0]}.embeddings.json"
+
+
+def embedding_matrix_path(data_path: str, fingerprint: str) -> str:
+    """Matrix named after the texts it embeds, so a new build never overwrites
+    a file another worker has memory-mapped."""
+    return f"{os.path.splitext(data_path)[0]}.embeddings.{fingerprint[:16]}.npy"
+
+
+def embedding_store_path(data_path: str) -> str:
+    return f"{os.path.splitext(data_path)[0]}.embeddings.sqlite"
+
+
+def embedding_lock_path(data_path: str) -> str:
+    return f"{os.path.splitext(data_path)[0]}.embeddings.lock"
+
+
+def texts_fingerprint(texts) -> str:
+    h = hashlib.sha256()
+    for text in texts:
+        h.update(text.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SemanticIndex:
+    """Normalized embedding matrix aligned with the PropertyIndex rows."""
+
+    def __init__(self, matrix: np.ndarray, model: str):
+        self.matrix = matrix
+        self.model = model
+
+    @classmethod
+    def build(cls, properties, data_path: str, embed_fn, model: str, catalog_fingerprint: str = None):
+        """Embed every property and save the matrix next to the catalog.
+
+        One process builds at a time (file lock); a worker that waited for the
+        lock loads the matrix just saved instead of calling the embedder again.
+        """
+        with file_lock(embedding_lock_path(data_path)):
+            existing = cls.load(properties, data_path, model, catalog_fingerprint)
+            if existing is not None:
+                return existing
+            return cls._build(properties, data_path, embed_fn, model, catalog_fingerprint)
+
+    @classmethod
+    def _build(cls, properties, data_path, embed_fn, model, catalog_fingerprint):
+        texts = [property_text(p) for p in properties]
+
+        store = EmbeddingStore(embedding_store_path(data_path))
+        try:
+            matrix, report = EmbeddingBuilder(store, embed_fn, model).build(texts)
+        finally:
+            store.close()
+        matrix = normalize_rows(matrix)
+
+        fingerprint = texts_fingerprint(texts)
+        npy_path, meta_path = embedding_matrix_path(data_path, fingerprint), embedding_meta_path(data_path)
+        tmp_path = f"{npy_path}.tmp-{os.getpid()}.npy"
+        np.save(tmp_path, matrix)
+        os.replace(tmp_path, npy_path)
+
+        # Metadata last: readers see either the old (meta, matrix) pair or the new one
+        tmp_meta = f"{meta_path}.tmp-{os.getpid()}"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({
+                "model": model,
+                "count": len(texts),
+                "dim": int(matrix.shape[1]),
+                "matrix": os.path.basename(npy_path),
+                "fingerprint": fingerprint,
+                "catalog_fingerprint": catalog_fingerprint,
+            }, f, indent=2)
+        os.replace(tmp_meta, meta_path)
+
+        # Workers still mapping an older matrix keep their pages until they reload
+        prefix = os.path.basename(os.path.splitext(data_path)[0]) + ".embeddings."
+        directory = os.path.dirname(npy_path)
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith(".npy") and name != os.path.basename(npy_path):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+        print(f"🧠 Embedded {report['total']} properties with {model} → {npy_path} "
+              f"(reused {report['reused']}, computed {report['computed']} in {report['batches']} batches, {report['seconds']}s)")
+        return cls.load(properties, data_path, model, catalog_fingerprint)
+
+    @classmethod
+    def load(cls, properties, data_path: str, model: str = None, catalog_fingerprint: str = None):
+        """Memory-map a saved matrix; None if missing or built from different texts/model.
+
+        When the catalog fingerprint is known it is compared instead of re-deriving
+        every property text, so startup does not decode the whole catalog.
+        """
+        meta_path = embedding_meta_path(data_path)
+        if not os.path.exists(meta_path):
+            return None
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if not meta.get("matrix") or (model and meta.get("model") != model):
+            return None
+        if catalog_fingerprint and meta.get("catalog_fingerprint"):
+            if meta["catalog_fingerprint"] != catalog_fingerprint:
+                return None
+        elif meta.get("fingerprint") != texts_fingerprint(property_text(p) for p in properties):
+            return None
+
+        # PERFORMANCE: mmap - workers share the pages through the OS cache
+        try:
+            matrix = np.load(os.path.join(os.path.dirname(meta_path), meta["matrix"]), mmap_mode="r")
+        except FileNotFoundError:
+            return None  # superseded by a newer build meanwhile
+        return cls(matrix, meta["model"])
+
+    def top_k(self, query_vector, rows=None, k: int = 5):
+        """Return [(row, cosine score)] best-first, optionally restricted to rows."""
+        q = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm:
+            q = q / norm
+
+        if rows is None:
+            candidates = None
+            scores = self.matrix @ q
+        else:
+            candidates = np.asarray(rows, dtype=np.int64)
+            if candidates.size == 0:
+                return []
+            scores = self.matrix[candidates] @ q
+
+        k = min(k, scores.shape[0])
+        # PERFORMANCE: argpartition is O(n); only the k winners get sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        if candidates is not None:
+            return [(int(candidates[i]), float(scores[i])) for i in top]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+if __name__ == "__main__":
+    from app.rag.embedder import get_embedder
+    from app.rag.index import PropertyIndex
+
+    args = sys.argv[1:]
+    if not args or args[0] != "build":
+        print("Usage: python -m app.rag.semantic build [--embedder openai|local]")
+        sys.exit(1)
+
+    embedder_name = args[args.index("--embedder") + 1] if "--embedder" in args else None
+    embed_fn, model = get_embedder(embedder_name)
+
+    snapshot = PropertyIndex().snapshot
+    SemanticIndex.build(snapshot.properties, snapshot.data_path, embed_fn, model, snapshot.fingerprint)
@@ -0,0 +1,566 @@
+"""
+Per-city catalog shards, loaded lazily under a memory budget.
+
+The catalog is compiled into one columnar catalog per city plus a small
+manifest (counts, price range, BHK/type values, place tokens and names per
+city). Startup only stats properties.json and reads the manifest; a city's
+shard is opened and indexed the first time a query routes to it, and the
+least recently used shards are dropped once CATALOG_SHARD_BUDGET_MB is
+exceeded. Queries without a location (or matching several cities) fan out to
+every candidate shard and the per-shard results are merged in (price, id)
+order, so callers see the same interface as an unsharded CatalogSnapshot.
+
+Enable with CATALOG_SHARDED=true.
+"""
+
+import copy
+import heapq
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+
+from app.rag.catalog import ColumnarCatalog, compile_catalog, price_key, row_order, source_fingerprint
+from app.rag.fuzzy import MIN_SIMILARITY, TrigramIndex
+from app.rag.semantic import SemanticIndex
+from app.rag.merge import (
+    merge_batch,
+    merge_faceted,
+    merge_hits,
+    merge_pages,
+    merge_relaxed,
+    merge_scored,
+    record_key,
+)
+from app.rag.index import (
+    ANY_CITY_LEVEL,
+    TOP_K,
+    CatalogSnapshot,
+    _catalog_versions,
+    canonical_bhk,
+    normalize_location,
+    tokenize,
+)
+
+SHARD_FORMAT_VERSION = 1
+
+# Estimated memory allowed for loaded shards before the least recently used is dropped
+SHARD_BUDGET_MB = float(os.getenv("CATALOG_SHARD_BUDGET_MB", "256"))
+
+# Rough per-listing cost of the in-memory posting lists, trigram and facet indexes
+_ROW_OVERHEAD_BYTES = 2048
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def city_slug(city) -> str:
+    """Directory-safe shard name for a city ("" → "unknown")."""
+    return _SLUG_RE.sub("-", (city or "").lower()).strip("-") or "unknown"
+
+
+def shards_root(data_path: str) -> str:
+    """Directory holding sharded snapshots, one subdirectory per source fingerprint."""
+    return f"{os.path.splitext(data_path)[0]}.shards"
+
+
+def _directory_bytes(directory: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(base, name))
+        for base, _dirs, files in os.walk(directory)
+        for name in files
+    )
+
+
+def _summarize(rows) -> dict:
+    """Manifest entry for one city: enough to route queries without opening the shard."""
+    tokens, names, locations = set(), defaultdict(int), set()
+    for prop in rows:
+        location = prop.get("location") or ""
+        city = prop.get("city") or ""
+        metro = prop.get("nearby_metro") or ""
+        landmarks = prop.get("nearby_landmarks") or []
+        tokens.update(tokenize(" ".join([location, city, metro, *landmarks])))
+        for name in {n.strip() for n in [*location.split(","), city, metro.split("(")[0], *landmarks]}:
+            if name:
+                names[name] += 1
+        if location.split(",")[0].strip():
+            locations.add(location.split(",")[0].strip())
+
+    prices = [price_key(p) for p in rows if price_key(p) != float("inf")]
+    return {
+        "city": rows[0].get("city") or "",
+        "count": len(rows),
+        "min_price": min(prices) if prices else None,
+        "max_price": max(prices) if prices else None,
+        "bhk": sorted({(p.get("bhk") or "").upper() for p in rows}),
+        "types": sorted({(p.get("type") or "").lower() for p in rows}),
+        "tokens": sorted(tokens),
+        "names": dict(sorted(names.items())),
+        "locations": sorted(locations),
+    }
+
+
+def compile_shards(properties, out_dir: str, fingerprint: str):
+    """Write one columnar catalog per city plus manifest.json and ids.json (atomically)."""
+    by_city = defaultdict(list)
+    for prop in row_order(properties):
+        by_city[city_slug(prop.get("city"))].append(prop)
+
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_dir, "cities"))
+
+    shards, ids = {}, {}
+    for slug, rows in sorted(by_city.items()):
+        shard_dir = os.path.join(tmp_dir, "cities", slug)
+        compile_catalog(rows, shard_dir, fingerprint)
+        shards[slug] = _summarize(rows)
+        shards[slug]["bytes"] = _directory_bytes(shard_dir)
+        for prop in rows:
+            ids.setdefault(str(prop["id"]), slug)
+
+    with open(os.path.join(tmp_dir, "ids.json"), "w", encoding="utf-8") as f:
+        json.dump(ids, f, separators=(",", ":"))
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "format_version": SHARD_FORMAT_VERSION,
+            "source_fingerprint": fingerprint,
+            "count": sum(s["count"] for s in shards.values()),
+            "compiled_at": time.time(),
+            "shards": shards,
+        }, f, indent=2)
+
+    try:
+        os.rename(tmp_dir, out_dir)
+    except OSError:
+        # Another worker compiled the same fingerprint first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def open_sharded(data_path: str, embedder=None):
+    """Open (compiling first if needed) the sharded snapshot of data_path.
+
+    A pointer file records which fingerprint the current (inode, mtime, size)
+    of properties.json compiled to, so an unchanged catalog boots from a stat
+    and one manifest read instead of hashing and parsing the whole file.
+    """
+    root = shards_root(data_path)
+    pointer_path = os.path.join(root, "current.json")
+    st = os.stat(data_path)
+    signature = [st.st_ino, st.st_mtime_ns, st.st_size]
+
+    fingerprint = None
+    if os.path.exists(pointer_path):
+        with open(pointer_path, "r", encoding="utf-8") as f:
+            pointer = json.load(f)
+        if pointer.get("signature") == signature and pointer.get("format_version") == SHARD_FORMAT_VERSION:
+            fingerprint = pointer["fingerprint"]
+            if not os.path.exists(os.path.join(root, fingerprint, "manifest.json")):
+                fingerprint = None
+
+    if fingerprint is None:
+        with open(data_path, "rb") as f:
+            raw = f.read()
+        fingerprint = source_fingerprint(raw)
+        out_dir = os.path.join(root, fingerprint)
+        if not os.path.exists(os.path.join(out_dir, "manifest.json")):
+            os.makedirs(root, exist_ok=True)
+            start = time.time()
+            compile_shards(json.loads(raw), out_dir, fingerprint)
+            print(f"🗜️ Compiled sharded catalog {fingerprint} in {(time.time() - start)*1000:.0f}ms → {out_dir}")
+            for name in os.listdir(root):
+                if name not in (fingerprint, "current.json", "similar", "embeddings") and ".tmp-" not in name:
+                    shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+        tmp_pointer = f"{pointer_path}.tmp-{os.getpid()}"
+        with open(tmp_pointer, "w", encoding="utf-8") as f:
+            json.dump({"format_version": SHARD_FORMAT_VERSION, "signature": signature, "fingerprint": fingerprint}, f)
+        os.replace(tmp_pointer, pointer_path)
+
+    return ShardedCatalog(os.path.join(root, fingerprint), data_path, embedder)
+
+
+class ShardedCatalog:
+    """CatalogSnapshot-compatible view over lazily loaded per-city shards.
+
+    Immutable like CatalogSnapshot apart from the shard cache, which is
+    guarded by a lock; PropertyIndex swaps the whole object on reload.
+    """
+
+    def __init__(self, directory: str, data_path: str, embedder=None, budget_mb: float = SHARD_BUDGET_MB):
+        with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.directory = directory
+        self.data_path = data_path
+        self.fingerprint = manifest["source_fingerprint"]
+        self.loaded_at = time.time()
+        self._count = manifest["count"]
+        self._shards = manifest["shards"]
+        # (embed_fn, model) cities are embedded with as they load; None = no semantic search
+        self._embedder = embedder
+
+        # slug -> CatalogSnapshot, least recently used first
+        self._loaded = OrderedDict()
+        self._loaded_bytes = 0
+        self._budget_bytes = int(budget_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._slug_locks = defaultdict(threading.Lock)  # one cold load per city at a time
+        self._id_shards = None
+        self._embedding = set()  # slugs whose semantic index is being built in the background
+
+        # Ids hidden by without(), applied to each shard as it is used. Shared by
+        # every copy and evicted with the shard: slug -> (loaded shard, tombstones, tombstoned copy)
+        self._tombstones = frozenset()
+        self._masked = {}
+
+        # Routing tables: place token / place name -> cities containing it
+        self._token_cities = defaultdict(set)
+        self._name_counts = defaultdict(dict)
+        for slug, shard in self._shards.items():
+            for token in shard["tokens"]:
+                self._token_cities[token].add(slug)
+            for name, count in shard["names"].items():
+                self._name_counts[name][slug] = count
+        self._token_vocab = sorted(self._token_cities)
+        self._token_fuzzy = TrigramIndex(t for t in self._token_vocab if len(t) >= 3 and not t.isdigit())
+        self._name_fuzzy = TrigramIndex(sorted(self._name_counts))
+
+        self.version = next(_catalog_versions)
+
+    def __len__(self):
+        return self._count
+
+    def without(self, ids):
+        """Copy with the listings in ids hidden; shares the shard cache with this catalog."""
+        tombstones = self._tombstones | frozenset(ids)
+        if tombstones == self._tombstones:
+            return self
+        catalog = copy.copy(self)
+        catalog._tombstones = tombstones
+        catalog.version = next(_catalog_versions)
+        return catalog
+
+    @property
+    def properties(self):
+        """Every record in (price, id) order. Loads every shard - offline tools only."""
+        return list(heapq.merge(*(self._shard(slug).properties for slug in self._shards), key=record_key))
+
+    # -- shard cache ---------------------------------------------------------
+
+    def _shard_cost(self, slug) -> int:
+        shard = self._shards[slug]
+        return shard["bytes"] + shard["count"] * _ROW_OVERHEAD_BYTES
+
+    def _shard(self, slug) -> CatalogSnapshot:
+        """Snapshot of one city with this catalog's tombstones applied."""
+        snapshot = self._load_shard(slug)
+        if not self._tombstones:
+            return snapshot
+        with self._lock:
+            masked = self._masked.get(slug)
+        if masked is None or masked[0] is not snapshot or masked[1] != self._tombstones:
+            masked = (snapshot, self._tombstones, snapshot.without(self._tombstones))
+            with self._lock:
+                # Only cache while the shard is still loaded, so eviction frees it
+                if self._loaded.get(slug) is snapshot:
+                    self._masked[slug] = masked
+        return masked[2]
+
+    def _cached_shard(self, slug):
+        """Loaded snapshot of one city (marked recently used), or None. Caller holds _lock."""
+        snapshot = self._loaded.get(slug)
+        if snapshot is not None:
+            self._loaded.move_to_end(slug)
+        return snapshot
+
+    def _load_shard(self, slug) -> CatalogSnapshot:
+        """Loaded snapshot of one city, opening it (and evicting others) if needed."""
+        with self._lock:
+            snapshot = self._cached_shard(slug)
+            slug_lock = self._slug_locks[slug]
+        if snapshot is not None:
+            return snapshot
+
+        # PERFORMANCE: build outside the catalog lock so a cold city doesn't stall queries for the others
+        with slug_lock:
+            with self._lock:
+                snapshot = self._cached_shard(slug)  # loaded by another thread while we waited
+            if snapshot is not None:
+                return snapshot
+
+            start = time.time()
+            shard_dir = os.path.join(self.directory, "cities", slug)
+            # Neighbor lists and embeddings live outside the fingerprint directory, keyed by
+            # city, so recompiling after an edit only recomputes the listings that changed
+            root = os.path.dirname(self.directory)
+            similar_dir = os.path.join(root, "similar")
+            embeddings_dir = os.path.join(root, "embeddings")
+            os.makedirs(similar_dir, exist_ok=True)
+            os.makedirs(embeddings_dir, exist_ok=True)
+            snapshot = CatalogSnapshot(
+                ColumnarCatalog(shard_dir),
+                os.path.join(shard_dir, "properties.json"),
+                embedding_model=self._embedder[1] if self._embedder else None,
+                similar_path=os.path.join(similar_dir, f"{slug}.json"),
+                embeddings_path=os.path.join(embeddings_dir, f"{slug}.json"),
+            )
+
+            with self._lock:
+                self._loaded[slug] = snapshot
+                self._loaded_bytes += self._shard_cost(slug)
+
+                # PERFORMANCE: keep the working set of cities within the memory budget
+                while self._loaded_bytes > self._budget_bytes and len(self._loaded) > 1:
+                    evicted, _ = self._loaded.popitem(last=False)
+                    self._masked.pop(evicted, None)
+                    self._loaded_bytes -= self._shard_cost(evicted)
+                    print(f"🏙️ Evicted shard '{evicted}' (memory budget {self._budget_bytes // (1024 * 1024)}MB)")
+
+            print(f"🏙️ Loaded shard '{slug}' ({self._shards[slug]['count']} properties) in {(time.time() - start)*1000:.0f}ms")
+            if self._embedder and not snapshot.semantic_ready(self._embedder[1]):
+                self._embed_in_background(slug, self._embedder)
+            return snapshot
+
+    def shard_stats(self) -> dict:
+        with self._lock:
+            return {
+                "shards": len(self._shards),
+                "loaded": list(self._loaded),
+                "loaded_mb": round(self._loaded_bytes / (1024 * 1024), 2),
+                "budget_mb": round(self._budget_bytes / (1024 * 1024), 2),
+            }
+
+    # -- routing -------------------------------------------------------------
+
+    def _place_cities(self, text):
+        """Cities with a listing token matching every token of text (None = no filter)."""
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+
+        cities = None
+        for token in set(tokens):
+            token_cities = set()
+            i = bisect_left(self._token_vocab, token)
+            while i < len(self._token_vocab) and self._token_vocab[i].startswith(token):
+                token_cities |= self._token_cities[self._token_vocab[i]]
+                i += 1
+            if not token_cities and len(token) >= 3:
+                matches = self._token_fuzzy.search(token, limit=3, min_score=MIN_SIMILARITY)
+                for match, score in matches:
+                    if score < matches[0][1]:
+                        break
+                    token_cities |= self._token_cities[match]
+            cities = token_cities if cities is None else cities & token_cities
+            if not cities:
+                break
+        return cities
+
+    def _location_cities(self, location):
+        normalized = normalize_location(location)
+        cities = self._place_cities(normalized)
+        if normalized != location.lower().strip():
+            original = self._place_cities(location.lower().strip())
+            cities = None if cities is None or original is None else cities | original
+        if cities == set():
+            best = self._name_fuzzy.search(normalized, limit=1, min_score=MIN_SIMILARITY)
+            if best:
+                cities = set(self._name_counts[best[0][0]])
+        return cities
+
+    def _route(self, location=None, max_price=None, bhk=None, property_type=None):
+        """Cities that can hold a match, cheapest first."""
+        slugs = self._shards.keys()
+        if location:
+            cities = self._location_cities(location)
+            if cities is not None:
+                slugs = cities
+
+        candidates = []
+        for slug in slugs:
+            shard = self._shards[slug]
+            if max_price and (shard["min_price"] is None or shard["min_price"] > max_price):
+                continue
+            if bhk and not any(canonical_bhk(bhk) in key for key in shard["bhk"]):
+                continue
+            if property_type and not any(property_type.lower() in key for key in shard["types"]):
+                continue
+            candidates.append(slug)
+
+        inf = float("inf")
+        candidates.sort(key=lambda s: (inf if self._shards[s]["min_price"] is None else self._shards[s]["min_price"], s))
+        return candidates
+
+    # -- CatalogSnapshot interface ---------------------------------------------
+
+    def search(self, location=None, max_price=None, bhk=None, property_type=None, weights=None):
+        """Search properties with multiple filters, fanning out to the matching cities."""
+        return [prop for prop, _score in self.search_hits(location, max_price, bhk, property_type, weights)]
+
+    def search_hits(self, location=None, max_price=None, bhk=None, property_type=None, weights=None, k=TOP_K):
+        """Best k (record, score) pairs over every matching city.
+
+        Price-per-sqft "value" is ranked within each city, so scores from
+        different cities are comparable but not identical to an unsharded run.
+        """
+        return merge_hits([
+            self._shard(slug).search_hits(location, max_price, bhk, property_type, weights, k)
+            for slug in self._route(location, max_price, bhk, property_type)
+        ], k)
+
+    def faceted_search(self, location=None, max_price=None, bhk=None, property_type=None, facets=None, limit=TOP_K):
+        """Search with facet filters; totals and facet counts are summed over cities."""
+        return merge_faceted([
+            self._shard(slug).faceted_search(location, max_price, bhk, property_type, facets, limit)
+            for slug in self._route(location, max_price, bhk, property_type)
+        ], limit)
+
+    def search_page(self, location=None, max_price=None, bhk=None, property_type=None, facets=None, after=None, page_size=TOP_K):
+        """One page of price-ordered results merged across cities."""
+        return merge_pages([
+            self._shard(slug).search_page(location, max_price, bhk, property_type, facets, after, page_size)
+            for slug in self._route(location, max_price, bhk, property_type)
+        ], page_size)
+
+    def batch_search(self, queries, limit=TOP_K):
+        """Route every query, run one batch per city, and merge per query."""
+        by_city = defaultdict(list)  # slug -> [query positions]
+        for i, q in enumerate(queries):
+            for slug in self._route(q.get("location"), q.get("max_price"), q.get("bhk"), q.get("property_type")):
+                by_city[slug].append(i)
+
+        found = [[] for _ in queries]
+        for slug, positions in by_city.items():
+            for i, shard_result in zip(positions, self._shard(slug).batch_search([queries[i] for i in positions], limit)):
+                found[i].append(shard_result)
+        return [merge_batch(parts, limit) for parts in found]
+
+    def relaxed_search(self, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """Relaxation ladder: up to "nearby locality" in the cities the location routes to, then every city."""
+        start = 0
+        if location:
+            cities = self._location_cities(location)
+            routed = sorted(self._shards) if cities is None else sorted(cities)
+            best = merge_relaxed([
+                self._shard(slug).relaxed_search(location, max_price, bhk, property_type, k, facets, stop=ANY_CITY_LEVEL)
+                for slug in routed
+            ], k)
+            if best["results"]:
+                return best
+            start = ANY_CITY_LEVEL
+
+        return merge_relaxed([
+            self._shard(slug).relaxed_search(None, max_price, bhk, property_type, k, facets, start=start)
+            for slug in self._shards
+        ], k)
+
+    query_key = CatalogSnapshot.query_key
+
+    def keyword_search(self, query, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """BM25 top-k over the matching cities, merged by score."""
+        hits = self.keyword_hits(query, location, max_price, bhk, property_type, k, facets)
+        print(f"📚 Keyword search: '{query}' → {len(hits)} properties")
+        return [prop for prop, _score in hits]
+
+    def keyword_hits(self, query, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        # IDF is per city, so scores are comparable across shards but not identical to an unsharded run
+        return merge_scored([
+            self._shard(slug).keyword_hits(query, location, max_price, bhk, property_type, k, facets)
+            for slug in self._route(location, max_price, bhk, property_type)
+        ], k)
+
+    def semantic_search(self, query, embedder, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        """Cosine top-k over the matching cities, merged by score."""
+        embed_fn, _model = embedder
+        shards = self._semantic_shards(embedder, location, max_price, bhk, property_type)
+        if not shards:
+            return []  # no matching city embedded yet: don't spend an embeddings call on the query
+        query_vector = embed_fn([query])[0]
+        hits = merge_scored([
+            shard.semantic_hits(query_vector, embedder, location, max_price, bhk, property_type, k, facets)
+            for shard in shards
+        ], k)
+        print(f"🧠 Semantic search: '{query}' → {len(hits)} properties")
+        return [prop for prop, _score in hits]
+
+    def semantic_ready(self, model) -> bool:
+        """Whether any loaded city has its semantic index for model (cities are embedded as they load)."""
+        with self._lock:
+            return any(shard.semantic_ready(model) for shard in self._loaded.values())
+
+    def semantic_hits(self, query_vector, embedder, location=None, max_price=None, bhk=None, property_type=None, k=TOP_K, facets=None):
+        return merge_scored([
+            shard.semantic_hits(query_vector, embedder, location, max_price, bhk, property_type, k, facets)
+            for shard in self._semantic_shards(embedder, location, max_price, bhk, property_type)
+        ], k)
+
+    def _semantic_shards(self, embedder, location=None, max_price=None, bhk=None, property_type=None):
+        """Embedded snapshots of the cities a query routes to; the rest start embedding in the background."""
+        shards = []
+        for slug in self._route(location, max_price, bhk, property_type):
+            shard = self._shard(slug)
+            if shard.semantic_ready(embedder[1]):
+                shards.append(shard)
+            else:
+                self._embed_in_background(slug, embedder)
+        return shards
+
+    def _embed_in_background(self, slug, embedder):
+        """Build one city's semantic index off the request path and swap in a copy that has it."""
+        with self._lock:
+            if slug in self._embedding:
+                return
+            self._embedding.add(slug)
+
+        def build():
+            embed_fn, model = embedder
+            try:
+                snapshot = self._load_shard(slug)
+                semantic = SemanticIndex.build(snapshot.properties, snapshot.embeddings_path, embed_fn, model, snapshot.fingerprint)
+                with self._lock:
+                    if self._loaded.get(slug) is snapshot:
+                        self._loaded[slug] = snapshot.with_semantic(semantic)
+            except Exception as e:
+                print(f"⚠️ Semantic index build for shard '{slug}' failed: {e}")
+            finally:
+                with self._lock:
+                    self._embedding.discard(slug)
+
+        threading.Thread(target=build, name=f"semantic-build-{slug}", daemon=True).start()
+
+    def price_bucket(self, max_price):
+        """Shards have separate price columns, so the budget itself is the cache key."""
+        return max_price or None
+
+    def get_by_id(self, property_id):
+        """Get a single property by ID, opening only the city that holds it."""
+        slug = self._shard_of(property_id)
+        return self._shard(slug).get_by_id(property_id) if slug else None
+
+    def _shard_of(self, property_id):
+        if self._id_shards is None:
+            with open(os.path.join(self.directory, "ids.json"), "r", encoding="utf-8") as f:
+                self._id_shards = json.load(f)
+        return self._id_shards.get(property_id)
+
+    def similar_properties(self, property_id, limit=TOP_K):
+        """Precomputed nearest listings (always within the same city, so one shard answers)."""
+        slug = self._shard_of(property_id)
+        return self._shard(slug).similar_properties(property_id, limit) if slug else []
+
+    def resolve_location(self, query, limit=5, min_score=MIN_SIMILARITY):
+        """Rank known place names by similarity to query (from the manifest, no shard loads)."""
+        matches = self._name_fuzzy.search(normalize_location(query), limit=limit, min_score=min_score)
+        return [
+            {"place": name, "score": score, "count": sum(self._name_counts[name].values())}
+            for name, score in matches
+        ]
+
+    def get_locations(self):
+        """Get list of unique locations."""
+        return sorted({loc for shard in self._shards.values() for loc in shard["locations"]})
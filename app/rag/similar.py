@@ -0,0 +1,313 @@
+"""
+Precomputed "similar properties" neighbor lists.
+
+Each listing gets a feature vector: log price, log area, BHK count, hashed
+city/locality one-hots, hashed amenities and (when the semantic index is
+built) its text embedding. Similarity is 1 / (1 + Euclidean distance), so
+"half the price" costs the same wherever the listing sits on the price scale.
+The k nearest listings in the same city are computed when a snapshot
+is built and saved next to properties.json; a lookup is one dict hit
+and one row of a (listings x k) array.
+
+The transforms use fixed scales rather than catalog statistics, so a vector
+only changes when its own listing changes. That makes rebuilds incremental:
+only changed or new listings are compared against their city, and untouched
+neighbor lists are patched with those scores instead of being recomputed.
+
+Rebuild offline:  python -m app.rag.similar build
+"""
+
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from app.rag.ranking import bhk_number
+
+SIMILAR_K = 10
+FEATURE_VERSION = 1
+
+# Rows scored against their city per matrix product during a build
+_CHUNK_ROWS = 1024
+
+# Hashed one-hot sizes
+_PLACE_DIM = 32
+_AMENITY_DIM = 64
+
+# Block weights (before the final L2 normalization)
+_WEIGHTS = {
+    "price": 2.0,
+    "area": 1.0,
+    "bhk": 1.5,
+    "place": 1.5,
+    "amenities": 1.0,
+    "embedding": 1.0,
+}
+
+
+def similar_paths(data_path: str):
+    """(.npz neighbor arrays path, .json metadata path) stored next to the catalog file."""
+    base = os.path.splitext(data_path)[0]
+    return f"{base}.similar.npz", f"{base}.similar.json"
+
+
+def _bucket(text: str, dim: int) -> int:
+    return zlib.crc32(text.strip().lower().encode("utf-8")) % dim
+
+
+def feature_matrix(catalog, embeddings=None) -> np.ndarray:
+    """Weighted float32 feature vector per catalog row."""
+    n = len(catalog)
+    prices = np.asarray(catalog.numbers("price"), dtype=np.float64)
+    areas = np.asarray(catalog.numbers("area_sqft"), dtype=np.float64)
+
+    # One unit per doubling of price / area; unknown values sit at 0
+    price = np.where(np.isfinite(prices) & (prices > 0), np.log2(np.where(prices > 0, prices, 1)) - math.log2(1e7), 0.0)
+    area = np.where(np.isfinite(areas) & (areas > 0), np.log2(np.where(areas > 0, areas, 1)) - math.log2(1000), 0.0)
+    bhk = np.nan_to_num(np.array([bhk_number(b) for b in catalog.strings("bhk")]) - 2.0, nan=0.0)
+
+    place = np.zeros((n, _PLACE_DIM), dtype=np.float32)
+    for row, (city, location) in enumerate(zip(catalog.strings("city"), catalog.strings("location"))):
+        if city:
+            place[row, _bucket(city, _PLACE_DIM)] += 1.0
+        locality = location.split(",")[0]
+        if locality.strip():
+            place[row, _bucket(locality, _PLACE_DIM)] += 1.0
+
+    amenities = np.zeros((n, _AMENITY_DIM), dtype=np.float32)
+    for row, values in enumerate(catalog.lists("amenities")):
+        for value in values:
+            amenities[row, _bucket(value, _AMENITY_DIM)] = 1.0
+    norms = np.linalg.norm(amenities, axis=1, keepdims=True)
+    amenities /= np.where(norms == 0, 1.0, norms)
+
+    blocks = [
+        _WEIGHTS["price"] * price[:, None],
+        _WEIGHTS["area"] * area[:, None],
+        _WEIGHTS["bhk"] * bhk[:, None],
+        _WEIGHTS["place"] * place / math.sqrt(2),
+        _WEIGHTS["amenities"] * amenities,
+    ]
+    if embeddings is not None:
+        blocks.append(_WEIGHTS["embedding"] * np.asarray(embeddings, dtype=np.float32))
+
+    return np.hstack(blocks).astype(np.float32)
+
+
+def _vector_keys(matrix: np.ndarray) -> list:
+    """Content hash of each feature vector - unchanged key means unchanged vector."""
+    return [hashlib.sha1(row.tobytes()).hexdigest()[:16] for row in matrix]
+
+
+def _neg_sq_distances(a: np.ndarray, b: np.ndarray, b_sq: np.ndarray) -> np.ndarray:
+    """-|a_i - b_j|^2 for every pair, via one matrix product (higher = closer)."""
+    return 2.0 * (a @ b.T) - (a * a).sum(axis=1)[:, None] - b_sq[None, :]
+
+
+def _similarity(neg_sq: float) -> float:
+    return round(1.0 / (1.0 + math.sqrt(max(0.0, -neg_sq))), 4)
+
+
+def _top_k(scores: np.ndarray, k: int):
+    """(indexes, scores) of the k best columns of each row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64), np.zeros((scores.shape[0], 0), dtype=np.float32)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class SimilarIndex:
+    """k-nearest-neighbor list per property id, held as (rows x k) arrays."""
+
+    def __init__(self, ids, keys, neighbors: np.ndarray, scores: np.ndarray):
+        self.ids = list(ids)
+        self.keys = list(keys)            # feature-vector hash per id (for incremental rebuilds)
+        self.neighbors = neighbors        # int32 positions into ids, -1 padded
+        self.scores = scores              # float32 similarity, 1 / (1 + distance)
+        self.k = neighbors.shape[1]
+        self._position = {property_id: i for i, property_id in enumerate(self.ids)}
+
+    def similar(self, property_id, limit=None):
+        """[(id, score)] best first, [] for unknown ids."""
+        i = self._position.get(property_id)
+        if i is None:
+            return []
+        limit = min(limit or self.k, self.k)
+        return [
+            (self.ids[j], round(float(s), 4))
+            for j, s in zip(self.neighbors[i, :limit].tolist(), self.scores[i, :limit].tolist())
+            if j >= 0
+        ]
+
+    def lists(self) -> dict:
+        """{id: (vector key, [(neighbor id, score)])} - the input of an incremental build."""
+        return {property_id: (self.keys[i], self.similar(property_id)) for i, property_id in enumerate(self.ids)}
+
+    @classmethod
+    def from_lists(cls, neighbors: dict, keys: dict, k: int):
+        ids = list(neighbors)
+        position = {property_id: i for i, property_id in enumerate(ids)}
+        rows = np.full((len(ids), k), -1, dtype=np.int32)
+        scores = np.zeros((len(ids), k), dtype=np.float32)
+        for i, property_id in enumerate(ids):
+            for j, (neighbor_id, score) in enumerate(neighbors[property_id][:k]):
+                rows[i, j] = position[neighbor_id]
+                scores[i, j] = score
+        return cls(ids, [keys[i] for i in ids], rows, scores)
+
+    @classmethod
+    def build(cls, catalog, embeddings=None, k: int = SIMILAR_K, previous=None):
+        """Compute neighbor lists, reusing a previous build's lists where nothing relevant changed.
+
+        previous: {id: (vector key, [(neighbor id, score)])} from the last build.
+        Returns (index, stats).
+        """
+        start = time.time()
+        ids = list(catalog.strings("id"))
+        cities = [c.strip().lower() for c in catalog.strings("city")]
+        matrix = feature_matrix(catalog, embeddings)
+        keys = _vector_keys(matrix)
+        previous = previous or {}
+
+        by_city = defaultdict(list)
+        for row, city in enumerate(cities):
+            by_city[city].append(row)
+
+        neighbors, recomputed, patched = {}, 0, 0
+        for rows in by_city.values():
+            rows = np.array(rows, dtype=np.int64)
+            block = matrix[rows]
+            block_sq = (block * block).sum(axis=1)
+            block_ids = [ids[r] for r in rows]
+            block_keys = {ids[r]: keys[r] for r in rows}
+
+            # New or edited listings
+            dirty = {
+                i for i, property_id in enumerate(block_ids)
+                if property_id not in previous or previous[property_id][0] != block_keys[property_id]
+            }
+            changed_ids = {block_ids[i] for i in dirty}
+
+            # Untouched listings whose old list lost a neighbor (removed, edited or moved city)
+            want = min(k, len(rows) - 1)
+            stale = {
+                i for i, property_id in enumerate(block_ids)
+                if i not in dirty and (
+                    len(previous[property_id][1]) < want
+                    or any(n not in block_keys or n in changed_ids for n, _ in previous[property_id][1])
+                )
+            }
+
+            # Full rows for dirty + stale listings
+            full = sorted(dirty | stale)
+            for chunk_start in range(0, len(full), _CHUNK_ROWS):
+                # PERFORMANCE: bounded (chunk x city) score matrix instead of (city x city)
+                chunk = full[chunk_start:chunk_start + _CHUNK_ROWS]
+                scores = _neg_sq_distances(block[chunk], block, block_sq)
+                scores[np.arange(len(chunk)), chunk] = -np.inf  # never your own neighbor
+                top, top_scores = _top_k(scores, k)
+                for j, i in enumerate(chunk):
+                    neighbors[block_ids[i]] = [
+                        (block_ids[t], _similarity(s))
+                        for t, s in zip(top[j].tolist(), top_scores[j].tolist()) if s != -np.inf
+                    ]
+            recomputed += len(full)
+
+            # Everything else: old list merged with scores against the changed listings only
+            clean = [i for i in range(len(rows)) if i not in dirty and i not in stale]
+            if clean and dirty:
+                changed = sorted(dirty)
+                cross = _neg_sq_distances(block[clean], block[changed], block_sq[changed])
+                for j, i in enumerate(clean):
+                    merged = dict(previous[block_ids[i]][1])
+                    for c, s in zip(changed, cross[j].tolist()):
+                        merged[block_ids[c]] = _similarity(s)
+                    neighbors[block_ids[i]] = sorted(merged.items(), key=lambda item: -item[1])[:k]
+                patched += len(clean)
+            else:
+                for i in clean:
+                    neighbors[block_ids[i]] = list(previous[block_ids[i]][1])
+
+        stats = {
+            "total": len(ids),
+            "recomputed": recomputed,
+            "patched": patched,
+            "reused": len(ids) - recomputed - patched,
+            "seconds": round(time.time() - start, 3),
+        }
+        return cls.from_lists(neighbors, dict(zip(ids, keys)), k), stats
+
+    def save(self, path: str, meta: dict):
+        """Write the arrays (+ vector keys for the next incremental build) atomically."""
+        npz_path, meta_path = similar_paths(path)
+        tmp_path = f"{npz_path}.tmp-{os.getpid()}.npz"
+        np.savez(
+            tmp_path,
+            ids=np.array(self.ids, dtype=str),
+            keys=np.array(self.keys, dtype=str),
+            neighbors=self.neighbors,
+            scores=self.scores,
+        )
+        os.replace(tmp_path, npz_path)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({**meta, "k": self.k, "feature_version": FEATURE_VERSION, "count": len(self.ids)}, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str):
+        """(meta, index) from disk, or (None, None) if missing or from another feature version."""
+        npz_path, meta_path = similar_paths(path)
+        if not (os.path.exists(npz_path) and os.path.exists(meta_path)):
+            return None, None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("feature_version") != FEATURE_VERSION:
+            return None, None
+        with np.load(npz_path) as saved:
+            return meta, cls(saved["ids"].tolist(), saved["keys"].tolist(), saved["neighbors"], saved["scores"])
+
+    @classmethod
+    def load_or_build(cls, catalog, path: str, semantic=None, fingerprint: str = None, k: int = SIMILAR_K):
+        """Neighbor lists for catalog: straight from disk if built for this catalog, else rebuilt incrementally.
+
+        path is the catalog file the .similar.npz/.json sit next to.
+        """
+        model = semantic.model if semantic is not None else None
+        meta, saved = cls.load(path)
+        compatible = meta is not None and meta.get("embedding_model") == model and meta.get("k") == k
+        if compatible and fingerprint and meta.get("catalog_fingerprint") == fingerprint:
+            return saved
+
+        previous = saved.lists() if compatible else None
+        embeddings = semantic.matrix if semantic is not None else None
+        index, stats = cls.build(catalog, embeddings, k, previous)
+        index.save(path, {"catalog_fingerprint": fingerprint, "embedding_model": model})
+        print(f"🧭 Similar-property lists for {stats['total']} properties in {stats['seconds']}s "
+              f"(recomputed {stats['recomputed']}, patched {stats['patched']}, reused {stats['reused']})")
+        return index
+
+
+if __name__ == "__main__":
+    from app.rag.index import PropertyIndex
+
+    if sys.argv[1:2] != ["build"]:
+        print("Usage: python -m app.rag.similar build")
+        sys.exit(1)
+
+    # Full rebuild from scratch (the snapshot already keeps the lists current on reload)
+    snapshot = PropertyIndex().snapshot
+    semantic = snapshot.semantic
+    index, stats = SimilarIndex.build(snapshot.catalog, semantic.matrix if semantic is not None else None)
+    index.save(snapshot.data_path, {
+        "catalog_fingerprint": snapshot.fingerprint,
+        "embedding_model": semantic.model if semantic is not None else None,
+    })
+    print(f"🧭 Rebuilt similar-property lists: {stats}")
@@ -1,5 +1,30 @@
+"""
+Voice and chat formatting of property search results.
+
+PERFORMANCE: everything derived from a single listing - chat card, REST
+card, their JSON bytes, spoken price and sentence fragments - is rendered
+once and kept in an LRU keyed by the record object. Catalog snapshots hand
+out frozen records, and a reload or delta produces new record objects, so
+a cached rendering never outlives its catalog version. Responses are then
+assembled from the cached pieces; results arrive already filtered by the
+index, so nothing is filtered again here.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import NamedTuple
+
+# Rendered listings kept (a few catalog versions' worth of hot listings)
+RENDER_CACHE_SIZE = 4096
+
+
 def format_price(price):
     """Format price in lakhs or crores for voice."""
+    if price is None:
+        return "price on request"
     if price >= 10000000:  # 1 crore+
         crores = price / 10000000
         if crores == int(crores):
@@ -12,144 +37,228 @@ def format_price(price):
         return f"{lakhs:.0f} lakhs"
 
 
-def format_property_response(results, location=None, max_price=None, bhk=None):
-    """Format property results for natural voice conversation."""
-    if not results:
-        return "I couldn't find any properties matching what you're looking for. Would you like to try a different location or budget range?"
-
-    filtered = results
+class PropertyCard(dict):
+    """Chat card dict that also carries its pre-encoded JSON (card.json); treat as read-only."""
+    __slots__ = ("json",)
+
+
+class RenderedProperty(NamedTuple):
+    card: dict            # chat card (format_property_cards)
+    card_json: bytes
+    api_card_json: bytes  # REST card (/api/properties)
+    price: str            # spoken price, "1.2 crores"
+    first: str            # "First up is ..." sentences for the lead result
+    another: str          # "Another great option is ..." for the runner-up
+    possession: str       # possession sentence ("" if unknown)
+    summary: str          # one-line "<name>, a 2 BHK in ... at ..." for link responses
+    details: str          # format_single_property text
+
+
+def _plain(value):
+    # Frozen catalog values (MappingProxyType) encode as objects
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode(value) -> bytes:
+    # Same encoding as FastAPI's JSONResponse
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_plain).encode("utf-8")
+
+
+def _render(prop) -> RenderedProperty:
+    price_str = format_price(prop.get("price"))
+    bhk_info = prop.get("bhk", "")
+
+    card = {
+        "id": prop.get("id"),
+        "name": prop.get("name"),
+        "location": prop.get("location"),
+        "price": price_str,
+        "price_raw": prop.get("price"),
+        "bhk": prop.get("bhk"),
+        "area_sqft": prop.get("area_sqft"),
+        "type": prop.get("type"),
+        "possession": prop.get("possession"),
+        "builder": prop.get("builder"),
+        "amenities": list(prop.get("amenities", [])[:4]),
+        "nearby_metro": prop.get("nearby_metro"),
+        "nearby_mall": prop.get("nearby_mall"),
+        "property_url": prop.get("property_url"),
+        "virtual_tour_url": prop.get("virtual_tour_url"),
+        "brochure_url": prop.get("brochure_url"),
+        "images": list(prop.get("images", [])),
+        "contact_number": prop.get("contact_number")
+    }
+    api_card = {
+        "id": prop.get("id"),
+        "name": prop.get("name", ""),
+        "price": prop.get("price", 0),
+        "bhk": prop.get("bhk", ""),
+        "type": prop.get("type", "Apartment"),
+        "location": prop.get("location", ""),
+        "area_sqft": prop.get("area_sqft", 0),
+        "possession": prop.get("possession", ""),
+        "builder": prop.get("builder", ""),
+        "property_url": prop.get("property_url", ""),
+        "virtual_tour_url": prop.get("virtual_tour_url", ""),
+        "contact_number": prop.get("contact_number", "")
+    }
+
+    first = f"First up is {prop['name']}, a {bhk_info} in {prop['location']}. "
+    first += f"It's {prop.get('area_sqft', '')} square feet, priced at {price_str}. "
+    metro = prop.get("nearby_metro", "")
+    if metro:
+        first += f"The {metro.split('(')[0].strip()} is nearby. "
+
+    possession = prop.get("possession", "")
+    if possession and possession != "Ready to Move":
+        possession_text = f"Possession is expected by {possession}. "
+    elif possession == "Ready to Move":
+        possession_text = "And it's ready to move in! "
+    else:
+        possession_text = ""
+
+    summary = f"{prop['name']}, a {bhk_info} in {prop['location']} at {price_str}. "
+    if possession == "Ready to Move":
+        summary += "Ready to move. "
+
+    return RenderedProperty(
+        card=card,
+        card_json=_encode(card),
+        api_card_json=_encode(api_card),
+        price=price_str,
+        first=first,
+        another=f"Another great option is {prop['name']}, also a {bhk_info}, at {price_str}. ",
+        possession=possession_text,
+        summary=summary,
+        details=_single_property_text(prop, price_str),
+    )
+
+
+_rendered = OrderedDict()  # id(record) -> (record, RenderedProperty)
+_rendered_lock = threading.Lock()
+_render_stats = {"hits": 0, "misses": 0}
+
+
+def rendered(prop) -> RenderedProperty:
+    """Cached rendering of one property record (plain dicts are rendered fresh)."""
+    if not isinstance(prop, MappingProxyType):
+        return _render(prop)
+
+    key = id(prop)
+    with _rendered_lock:
+        entry = _rendered.get(key)
+        # The record itself is held, so its id can't be reused while the entry lives
+        if entry is not None and entry[0] is prop:
+            _rendered.move_to_end(key)
+            _render_stats["hits"] += 1
+            return entry[1]
+
+    result = _render(prop)
+    with _rendered_lock:
+        _render_stats["misses"] += 1
+        _rendered[key] = (prop, result)
+        while len(_rendered) > RENDER_CACHE_SIZE:
+            _rendered.popitem(last=False)
+    return result
+
+
+def render_cache_stats() -> dict:
+    with _rendered_lock:
+        lookups = _render_stats["hits"] + _render_stats["misses"]
+        return {
+            "size": len(_rendered),
+            "max_size": RENDER_CACHE_SIZE,
+            **_render_stats,
+            "hit_rate": round(_render_stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+def splice_json(payload: dict, **arrays) -> bytes:
+    """JSON object bytes for payload plus arrays of already encoded items (e.g. cached cards)."""
+    parts = [_encode(payload)[:-1]]
+    needs_comma = bool(payload)
+    for key, items in arrays.items():
+        parts.append(b"," if needs_comma else b"")
+        parts.append(_encode(key) + b":[" + b",".join(items) + b"]")
+        needs_comma = True
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def extend_json(obj: bytes, **fields) -> bytes:
+    """Encoded JSON object with extra fields appended (e.g. a similarity score)."""
+    return obj[:-1] + b"".join(b"," + _encode(key) + b":" + _encode(value) for key, value in fields.items()) + b"}"
+
+
+def cards_json(cards) -> list:
+    """Encoded JSON of each card, reusing the cached encoding of PropertyCards."""
+    return [getattr(card, "json", None) or _encode(card) for card in cards]
 
-    if max_price:
-        filtered = [p for p in filtered if p["price"] <= max_price]
 
-    if bhk:
-        bhk_str = str(bhk).upper()
-        if "BHK" not in bhk_str:
-            bhk_str = f"{bhk} BHK"
-        filtered = [p for p in filtered if bhk_str in p.get("bhk", "").upper()]
+def format_property_response(results, location=None, max_price=None, bhk=None):
+    """Format property results for natural voice conversation.
 
-    if not filtered:
-        return "I found some properties, but none quite fit your criteria. Would you like me to show you options in a nearby area or a slightly different budget?"
+    results are expected to be filtered already (location/max_price/bhk are
+    kept for callers and no longer re-applied).
+    """
+    if not results:
+        return "I couldn't find any properties matching what you're looking for. Would you like to try a different location or budget range?"
 
     # Build natural response
-    count = len(filtered)
-    response = f"Great news! I found {count} {'property' if count == 1 else 'properties'} that might be perfect for you. "
+    count = len(results)
+    parts = [f"Great news! I found {count} {'property' if count == 1 else 'properties'} that might be perfect for you. "]
 
     # Show top 2 for voice (keep it short)
-    for i, prop in enumerate(filtered[:2]):
-        price_str = format_price(prop["price"])
-        area = prop.get("area_sqft", "")
-        bhk_info = prop.get("bhk", "")
-        metro = prop.get("nearby_metro", "")
-        possession = prop.get("possession", "")
-
-        if i == 0:
-            response += f"First up is {prop['name']}, a {bhk_info} in {prop['location']}. "
-            response += f"It's {area} square feet, priced at {price_str}. "
-            if metro:
-                response += f"The {metro.split('(')[0].strip()} is nearby. "
-        else:
-            response += f"Another great option is {prop['name']}, also a {bhk_info}, at {price_str}. "
-
-        if possession and possession != "Ready to Move":
-            response += f"Possession is expected by {possession}. "
-        elif possession == "Ready to Move":
-            response += "And it's ready to move in! "
+    for i, prop in enumerate(results[:2]):
+        r = rendered(prop)
+        parts.append(r.first if i == 0 else r.another)
+        parts.append(r.possession)
 
     if count > 2:
-        response += f"I have {count - 2} more options too. "
+        parts.append(f"I have {count - 2} more options too. ")
 
-    response += "Would you like more details on any of these, or should I tell you about the amenities?"
-
-    return response
+    parts.append("Would you like more details on any of these, or should I tell you about the amenities?")
+    return "".join(parts)
 
 
 def format_property_response_with_links(results, location=None, max_price=None, bhk=None):
-    """Format property results with links for the final response after lead capture."""
+    """Format property results with links for the final response after lead capture (results already filtered)."""
     if not results:
         return "I couldn't find any properties matching what you're looking for right now, but our team will share some great options with you soon!"
 
-    filtered = results
-
-    if max_price:
-        filtered = [p for p in filtered if p["price"] <= max_price]
-
-    if bhk:
-        bhk_str = str(bhk).upper()
-        if "BHK" not in bhk_str:
-            bhk_str = f"{bhk} BHK"
-        filtered = [p for p in filtered if bhk_str in p.get("bhk", "").upper()]
-
-    if not filtered:
-        filtered = results[:3]  # Show top 3 anyway
-
     # Build voice-friendly response
-    voice_response = f"Here are {min(len(filtered), 3)} properties I'd recommend. "
-
-    for i, prop in enumerate(filtered[:3]):
-        price_str = format_price(prop["price"])
-        bhk_info = prop.get("bhk", "")
-
-        voice_response += f"{prop['name']}, a {bhk_info} in {prop['location']} at {price_str}. "
-
-        if prop.get("possession") == "Ready to Move":
-            voice_response += "Ready to move. "
-
-    voice_response += "I've shared the links with photos and virtual tours right here in our chat. "
-    voice_response += "Our property expert will call you within 30 minutes to schedule site visits. "
-    voice_response += "Would you like to know more about any of these?"
-
-    return voice_response
+    shown = results[:3]
+    parts = [f"Here are {len(shown)} properties I'd recommend. "]
+    parts.extend(rendered(prop).summary for prop in shown)
+    parts.append("I've shared the links with photos and virtual tours right here in our chat. ")
+    parts.append("Our property expert will call you within 30 minutes to schedule site visits. ")
+    parts.append("Would you like to know more about any of these?")
+    return "".join(parts)
 
 
 def format_property_cards(results, location=None, max_price=None, bhk=None):
-    """Format property results as cards with links for chat display."""
-    if not results:
-        return []
-
-    filtered = results
-
-    if max_price:
-        filtered = [p for p in filtered if p["price"] <= max_price]
-
-    if bhk:
-        bhk_str = str(bhk).upper()
-        if "BHK" not in bhk_str:
-            bhk_str = f"{bhk} BHK"
-        filtered = [p for p in filtered if bhk_str in p.get("bhk", "").upper()]
-
-    if not filtered:
-        filtered = results[:3]
+    """Format property results as cards with links for chat display.
 
+    Returns up to 3 PropertyCards (copies of the cached cards, with .json).
+    results are expected to be filtered already.
+    """
     cards = []
-    for prop in filtered[:3]:
-        cards.append({
-            "id": prop.get("id"),
-            "name": prop.get("name"),
-            "location": prop.get("location"),
-            "price": format_price(prop.get("price", 0)),
-            "price_raw": prop.get("price"),
-            "bhk": prop.get("bhk"),
-            "area_sqft": prop.get("area_sqft"),
-            "type": prop.get("type"),
-            "possession": prop.get("possession"),
-            "builder": prop.get("builder"),
-            "amenities": prop.get("amenities", [])[:4],
-            "nearby_metro": prop.get("nearby_metro"),
-            "nearby_mall": prop.get("nearby_mall"),
-            "property_url": prop.get("property_url"),
-            "virtual_tour_url": prop.get("virtual_tour_url"),
-            "brochure_url": prop.get("brochure_url"),
-            "images": prop.get("images", []),
-            "contact_number": prop.get("contact_number")
-        })
-
+    for prop in results[:3]:
+        r = rendered(prop)
+        card = PropertyCard(r.card)
+        card.json = r.card_json
+        cards.append(card)
     return cards
 
 
 def format_single_property(prop):
     """Format a single property with full details for voice."""
-    price_str = format_price(prop["price"])
+    return rendered(prop).details
+
+
+def _single_property_text(prop, price_str):
 
     response = f"{prop['name']} is a beautiful {prop.get('bhk', '')} {prop.get('type', 'property')} "
     response += f"in {prop['location']}. "
@@ -0,0 +1,60 @@
+"""
+Shared fixtures. Run from the repository root: python -m pytest tests
+
+No network: API keys are placeholders, embeddings use the local hashing
+embedder, and catalogs are built in temporary directories.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# The app modules create their API clients at import time; tests never call them
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("RAG_EMBEDDER", "local")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.rag.catalog import InMemoryCatalog, _synthetic_catalog, price_key  # noqa: E402
+from app.rag.index import CatalogSnapshot  # noqa: E402
+
+DATA_PATH = os.path.join(ROOT, "app", "data", "properties.json")
+
+
+def write_catalog(directory, records) -> str:
+    """properties.json with records in directory; derived index files are written next to it."""
+    os.makedirs(str(directory), exist_ok=True)
+    path = os.path.join(str(directory), "properties.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    return path
+
+
+def build_snapshot(directory, records) -> CatalogSnapshot:
+    return CatalogSnapshot(InMemoryCatalog(records), write_catalog(directory, records))
+
+
+def walk_pages(catalog, page_size=25, **filters):
+    """Ids of every match, page by page in (price, id) order, plus the reported total."""
+    ids, after = [], None
+    while True:
+        page = catalog.search_page(after=after, page_size=page_size, **filters)
+        ids += [str(p["id"]) for p in page["results"]]
+        if not page["has_more"]:
+            return ids, page["total"]
+        last = page["results"][-1]
+        after = (price_key(last), str(last["id"]))
+
+
+@pytest.fixture(scope="session")
+def records():
+    """300 listings derived from the bundled catalog (same places, varied prices)."""
+    return _synthetic_catalog(300, DATA_PATH)
+
+
+@pytest.fixture(scope="session")
+def snapshot(records, tmp_path_factory):
+    return build_snapshot(tmp_path_factory.mktemp("catalog"), records)
@@ -0,0 +1,114 @@
+import io
+import json
+
+import pytest
+import requests
+
+from app.crm import backfill
+from app.crm.create_lead import SalesforceLeadError, web_to_lead_payload
+
+
+def _transcript(*user_texts, session_id="s1"):
+    return json.dumps({
+        "session_id": session_id,
+        "transcript": [{"role": "user", "text": text} for text in user_texts] + [{"role": "agent", "text": "Thanks!"}],
+    }) + "\n"
+
+
+COMPLETE = _transcript("My name is Asha Rao", "9876543210", "2 bhk in thane under 1 crore", session_id="complete")
+EMAIL_ONLY = _transcript("mail me at ravi@example.com", session_id="email")
+NO_LEAD = _transcript("just browsing", session_id="none")
+
+
+def test_extract_chunk_counts_leads_and_numbers_lines_from_the_chunk_start():
+    lines = [COMPLETE, "\n", EMAIL_ONLY, NO_LEAD]
+    out, complete, invalid, counts = backfill.extract_chunk(("a.ndjson", 41, lines, True))
+
+    leads = [json.loads(line) for line in out]
+    assert [(lead["session_id"], lead["line"]) for lead in leads] == [("complete", 41), ("email", 43)]
+    assert leads[0]["fullName"] == "Asha Rao" and leads[0]["city"] == "Thane"
+    assert [lead["session_id"] for lead in complete] == ["complete"]
+    assert invalid == []
+    assert (counts["transcripts"], counts["complete"]) == (3, 1)
+
+
+def test_extract_chunk_keeps_complete_leads_only_when_pushing():
+    _out, complete, _invalid, counts = backfill.extract_chunk(("a.ndjson", 1, [COMPLETE], False))
+    assert complete == [] and counts["complete"] == 1
+
+
+@pytest.mark.parametrize("line, error", [
+    ("{not json\n", "Expecting property name"),
+    ("[1, 2]\n", "expected a JSON object"),
+    ('{"transcript": "hello"}\n', "transcript must be a list"),
+])
+def test_extract_chunk_reports_invalid_records_and_carries_on(line, error):
+    out, _complete, invalid, counts = backfill.extract_chunk(("a.ndjson", 10, [line, COMPLETE], False))
+    assert [(i["file"], i["line"]) for i in invalid] == [("a.ndjson", 10)]
+    assert error in invalid[0]["error"]
+    assert len(out) == 1 and counts["transcripts"] == 1
+
+
+def test_iter_chunks_numbers_lines_across_chunks_and_files(tmp_path):
+    first, second = tmp_path / "a.ndjson", tmp_path / "b.ndjson"
+    first.write_text("".join(f"{i}\n" for i in range(1, 8)))
+    second.write_text("x\n")
+
+    chunks = list(backfill.iter_chunks([str(first), str(second)], chunk_size=3))
+    assert [(path[-8:], start, len(lines)) for path, start, lines in chunks] == [
+        ("a.ndjson", 1, 3), ("a.ndjson", 4, 3), ("a.ndjson", 7, 1), ("b.ndjson", 1, 1),
+    ]
+    # The first line number of each chunk is the number of its first line
+    assert all(lines[0] == f"{start}\n" for path, start, lines in chunks if path.endswith("a.ndjson"))
+
+
+def test_backfill_counts_invalid_lines_and_writes_leads(tmp_path):
+    archive = tmp_path / "archive.ndjson"
+    archive.write_text(COMPLETE + "{oops\n" + EMAIL_ONLY + '{"messages": 5}\n' + NO_LEAD)
+    out = io.StringIO()
+
+    report = backfill.backfill([str(archive)], out=out, workers=1, chunk_size=2)
+
+    assert (report["transcripts"], report["leads"], report["complete"], report["invalid"]) == (3, 2, 1, 2)
+    assert [e["line"] for e in report["errors"]] == [2, 4]
+    assert [json.loads(line)["line"] for line in out.getvalue().splitlines()] == [1, 3]
+
+
+@pytest.mark.parametrize("error, retry", [
+    (requests.ConnectionError("refused"), True),
+    (SalesforceLeadError(503, "unavailable"), True),
+    (SalesforceLeadError(500, "oops"), True),
+    (SalesforceLeadError(400, "bad request"), False),
+    (SalesforceLeadError(409, "duplicate"), False),
+    (requests.ReadTimeout("no answer"), False),
+    (ValueError("bug"), False),
+])
+def test_only_failures_that_cannot_have_created_the_lead_are_retried(error, retry):
+    assert backfill._retryable(error) is retry
+
+
+def test_pusher_dedupes_numbers_and_does_not_retry_client_errors(monkeypatch):
+    attempts = []
+
+    def create(payload, access_token, instance_url=None, quiet=False):
+        attempts.append(payload["wl"]["mobileNumber"])
+        assert quiet
+        if payload["wl"]["mobileNumber"] == "9000000001":
+            raise SalesforceLeadError(400, "bad request")
+
+    monkeypatch.setattr("app.crm.create_lead.create_salesforce_lead", create)
+    monkeypatch.setattr("app.crm.salesforce_auth.get_access_token", lambda: {"access_token": "t", "instance_url": "u"})
+
+    pusher = backfill.CRMPusher(batch_size=10)
+    for number in ("9000000000", "9000000001", "9000000000"):
+        pusher.add({"mobileNumber": number, "fullName": "A", "file": "a.ndjson", "line": 1})
+    pusher.flush()
+
+    assert sorted(attempts) == ["9000000000", "9000000001"]
+    assert (pusher.report["pushed"], pusher.report["duplicates"], pusher.report["failed"]) == (1, 1, 1)
+
+
+def test_payload_leaves_a_missing_city_empty():
+    payload = web_to_lead_payload({"fullName": "Asha Rao", "mobileNumber": "9876543210", "city": None, "budget": None})
+    assert payload["wl"]["city"] == "" and payload["wl"]["budget"] == ""
+    assert web_to_lead_payload({"city": "Thane"})["wl"]["city"] == "Thane"
@@ -0,0 +1,55 @@
+import json
+import types
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.property_api import MAX_BATCH_QUERIES, BatchSearchQuery, BatchSearchRequest, search_properties_batch
+from app.rag import retriever
+
+QUERIES = [
+    {"location": "thane"},
+    {"location": "Thane", "bhk": "2", "max_price": 15000000},
+    {"location": "thane", "bhk": "2 BHK", "max_price": 30000000},
+    {"bhk": "3", "max_price": 20000000},
+    {"property_type": "villa"},
+    {"location": "gorbunder"},
+    {"location": "timbuktu"},
+    {},
+]
+
+
+@pytest.mark.parametrize("limit", [1, 5, 12])
+def test_batch_matches_one_search_per_query(snapshot, limit):
+    found = snapshot.batch_search(QUERIES, limit=limit)
+    assert len(found) == len(QUERIES)
+    for query, result in zip(QUERIES, found):
+        hits = snapshot.search_hits(k=limit, **query)
+        assert [p["id"] for p in result["results"]] == [p["id"] for p, _score in hits]
+        assert result["scores"] == [score for _p, score in hits]
+        assert result["total"] == len(snapshot.matching_rows(**query))
+
+
+def test_batch_skips_tombstoned_rows(snapshot):
+    gone = [p["id"] for p in snapshot.search(location="thane")[:2]]
+    live = snapshot.without(gone)
+    for result in live.batch_search(QUERIES[:3]):
+        assert not {p["id"] for p in result["results"]} & set(gone)
+
+
+def test_batch_endpoint_answers_in_query_order(snapshot, monkeypatch):
+    monkeypatch.setattr(retriever, "property_index", types.SimpleNamespace(snapshot=snapshot, version=snapshot.version))
+    req = BatchSearchRequest(queries=[BatchSearchQuery(location="thane", budget="1.5 cr"),
+                                      BatchSearchQuery(location="timbuktu")], limit=3)
+
+    body = json.loads(search_properties_batch(req).body)
+
+    assert body["count"] == 2 and body["catalog_version"] == snapshot.version
+    first, second = body["results"]
+    assert 0 < first["count"] <= 3 and all(card["price"] <= 15000000 for card in first["properties"])
+    assert (second["count"], second["total"], second["properties"]) == (0, 0, [])
+
+
+def test_batch_request_size_is_bounded():
+    with pytest.raises(ValidationError):
+        BatchSearchRequest(queries=[BatchSearchQuery()] * (MAX_BATCH_QUERIES + 1))
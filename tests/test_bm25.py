@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.rag.bm25 import B, K1, BM25Index, terms
+from app.rag.catalog import InMemoryCatalog
+
+DOCS = [
+    {"description": "Sea facing flat with a swimming pool", "amenities": ["Gym", "Swimming Pool"], "nearby_landmarks": []},
+    {"description": "Quiet homes near Upvan Lake", "amenities": ["Clubhouse"], "nearby_landmarks": ["Upvan Lake"]},
+    {"description": "Sky garden and clubhouse", "amenities": ["Sky Garden", "Clubhouse"], "nearby_landmarks": ["Viviana Mall"]},
+    {"description": "Glass facade towers", "amenities": [], "nearby_landmarks": []},
+]
+
+
+def _catalog(docs, offset=0):
+    return InMemoryCatalog([dict(d, id=f"p{offset + i}", price=(offset + i + 1) * 1000000) for i, d in enumerate(docs)])
+
+
+def _naive_scores(docs, query):
+    """Okapi BM25 straight from the formula, one document at a time."""
+    bags = [terms(" ".join([d["description"], *d["amenities"], *d["nearby_landmarks"]])) for d in docs]
+    avg = sum(map(len, bags)) / len(bags)
+    out = []
+    for bag in bags:
+        score = 0.0
+        for term in set(terms(query)):
+            df = sum(term in b for b in bags)
+            tf = bag.count(term)
+            if tf:
+                idf = math.log1p((len(bags) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * len(bag) / avg))
+        out.append(score)
+    return out
+
+
+def test_terms_fold_plurals_and_drop_stopwords():
+    assert terms("Pools near the Lakes, with GLASS") == ["pool", "lake", "glass"]
+    assert terms("flats for a bus") == ["bus"]
+
+
+@pytest.mark.parametrize("query", ["clubhouse", "swimming pools", "near Upvan Lake", "sky garden clubhouse", "helipad"])
+def test_scores_match_the_bm25_formula(query):
+    index = BM25Index(_catalog(DOCS))
+    assert np.allclose(index.scores(query), _naive_scores(DOCS, query), atol=1e-5)
+
+
+def test_top_k_keeps_matching_rows_best_first_within_the_mask():
+    index = BM25Index(_catalog(DOCS))
+    rows = [row for row, _score in index.top_k("clubhouse garden", k=5)]
+    assert rows == [2, 1]
+    assert index.top_k("clubhouse", mask=np.array([True, False, False, True]), k=5) == []
+    assert index.top_k("helipad") == []
+
+
+def test_ties_go_to_the_cheaper_listing():
+    index = BM25Index(_catalog([DOCS[3], DOCS[3], DOCS[3]]))
+    assert [row for row, _score in index.top_k("glass", k=2)] == [0, 1]
+
+
+def test_reference_statistics_make_a_small_index_comparable():
+    full = BM25Index(_catalog(DOCS))
+    base = BM25Index(_catalog(DOCS[:3]))
+    overlay = BM25Index(_catalog(DOCS[3:], offset=3), reference=base)
+    assert overlay.document_frequency("glass") == 1
+    assert np.isclose(overlay.scores("glass")[0], full.scores("glass")[3])
+
+
+def test_snapshot_keyword_search_applies_the_structured_filters(snapshot):
+    found = snapshot.keyword_search("clubhouse", location="thane", bhk="2")
+    assert found
+    for prop in found:
+        assert "thane" in (prop["city"] + prop["location"]).lower() and prop["bhk"] == "2 BHK"
+        assert "clubhouse" in " ".join([prop.get("description") or "", *(prop.get("amenities") or ())]).lower()
@@ -0,0 +1,80 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.rag.catalog import (ColumnarCatalog, InMemoryCatalog, compiled_root, open_compiled, source_fingerprint,
+                             thaw)
+from app.rag.index import CatalogSnapshot
+
+from conftest import write_catalog
+
+
+def _open(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    return open_compiled(path, raw), raw
+
+
+@pytest.fixture
+def compiled(records, tmp_path):
+    path = write_catalog(tmp_path, records[:80])
+    return _open(path)[0], InMemoryCatalog(records[:80])
+
+
+def test_columns_and_records_round_trip(compiled):
+    columnar, memory = compiled
+    assert len(columnar) == len(memory) == 80
+    assert [thaw(r) for r in columnar.records] == [thaw(r) for r in memory.records]
+    for name in ("price", "area_sqft"):
+        assert np.array_equal(columnar.numbers(name), memory.numbers(name), equal_nan=True)
+    for name in ("city", "bhk", "description"):
+        assert list(columnar.strings(name)) == memory.strings(name)
+    assert columnar.lists("amenities") == memory.lists("amenities")
+
+
+def test_columns_are_memory_mapped_and_records_read_only(compiled):
+    columnar, _memory = compiled
+    assert isinstance(columnar.numbers("price"), np.memmap)
+    record = columnar.records[-1]
+    assert record is columnar.records[len(columnar) - 1]  # decoded once, then cached
+    with pytest.raises(TypeError):
+        record["price"] = 1
+    with pytest.raises(IndexError):
+        columnar.records[len(columnar)]
+
+
+def test_snapshots_search_the_same_either_way(compiled, tmp_path):
+    columnar, memory = compiled
+    path = os.path.join(str(tmp_path), "properties.json")
+    a, b = CatalogSnapshot(columnar, path), CatalogSnapshot(memory, path)
+    for query in ({"location": "thane"}, {"bhk": "3", "max_price": 20000000}, {"property_type": "villa"}):
+        assert [p["id"] for p in a.search(**query)] == [p["id"] for p in b.search(**query)]
+
+
+def test_an_edit_compiles_a_new_snapshot_and_prunes_the_old_one(records, tmp_path):
+    path = write_catalog(tmp_path, records[:20])
+    first, raw = _open(path)
+    again, _ = _open(path)
+    assert again.directory == first.directory
+
+    edited = write_catalog(tmp_path, records[:21])
+    second, raw2 = _open(edited)
+    assert second.fingerprint == source_fingerprint(raw2) != source_fingerprint(raw)
+    assert os.listdir(compiled_root(path)) == [second.fingerprint]
+    # The pruned snapshot stays readable through its existing mappings
+    assert len(list(first.records)) == 20
+
+
+def test_a_snapshot_from_another_format_version_is_recompiled(records, tmp_path):
+    path = write_catalog(tmp_path, records[:20])
+    first, _ = _open(path)
+    meta = os.path.join(first.directory, "meta.json")
+    with open(meta, "r", encoding="utf-8") as f:
+        stale = dict(json.load(f), format_version=0)
+    with open(meta, "w", encoding="utf-8") as f:
+        json.dump(stale, f)
+
+    reopened, _ = _open(path)
+    assert ColumnarCatalog(reopened.directory).meta["format_version"] != 0
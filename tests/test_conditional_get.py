@@ -0,0 +1,70 @@
+import types
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import property_api
+from app.api.property_api import conditional_get, router
+from app.rag import retriever
+
+from conftest import build_snapshot
+
+
+@pytest.fixture
+def client(snapshot, monkeypatch):
+    """The property API, mounted like app/main.py, serving the test snapshot."""
+    def serve(catalog):
+        monkeypatch.setattr(retriever, "property_index", types.SimpleNamespace(
+            snapshot=catalog, version=catalog.version,
+            get_by_id=catalog.get_by_id, similar_properties=catalog.similar_properties))
+
+    serve(snapshot)
+    app = FastAPI()
+    app.middleware("http")(conditional_get)
+    app.include_router(router, prefix="/api/properties")
+    client = TestClient(app)
+    client.serve = serve
+    return client
+
+
+def test_search_carries_an_etag_and_revalidates_with_304(client):
+    first = client.get("/api/properties/search", params={"location": "thane", "bhk": "2"})
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get("/api/properties/search", params={"bhk": "2", "location": "thane"}, headers={"If-None-Match": f'W/{etag}'})
+    assert again.status_code == 304 and again.content == b"" and again.headers["ETag"] == etag
+
+
+def test_other_queries_and_paths_get_other_etags(client):
+    a = client.get("/api/properties/search", params={"location": "thane"}).headers["ETag"]
+    b = client.get("/api/properties/search", params={"location": "mumbai"}).headers["ETag"]
+    property_id = client.get("/api/properties/search", params={"location": "thane"}).json()["properties"][0]["id"]
+    c = client.get(f"/api/properties/{property_id}/similar").headers["ETag"]
+    assert len({a, b, c}) == 3
+
+    stale = client.get("/api/properties/search", params={"location": "mumbai"}, headers={"If-None-Match": a})
+    assert stale.status_code == 200
+
+
+def test_a_new_catalog_version_invalidates_the_etag(client, records, tmp_path):
+    etag = client.get("/api/properties/search", params={"location": "thane"}).headers["ETag"]
+    client.serve(build_snapshot(tmp_path, records[:50]))
+
+    fresh = client.get("/api/properties/search", params={"location": "thane"}, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["ETag"] != etag
+
+
+def test_errors_and_cache_stats_are_not_cached(client):
+    missing = client.get("/api/properties/no-such-id/similar")
+    assert missing.status_code == 404 and "ETag" not in missing.headers
+
+    stats = client.get("/api/properties/cache-stats")
+    assert stats.headers["Cache-Control"] == "no-store" and "ETag" not in stats.headers
+
+
+def test_max_age_is_configurable(client, monkeypatch):
+    monkeypatch.setattr(property_api, "PROPERTY_CACHE_MAX_AGE", 30)
+    response = client.get("/api/properties/search", params={"location": "thane"})
+    assert response.headers["Cache-Control"] == "public, max-age=30"
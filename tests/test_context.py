@@ -0,0 +1,60 @@
+from app.conversation.context import MESSAGE_OVERHEAD, ConversationHistory, assemble_messages, count_tokens
+
+
+def _history(n, max_messages=4, summary_tokens=80):
+    history = ConversationHistory(max_messages=max_messages, summary_tokens=summary_tokens)
+    for i in range(n):
+        history.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"})
+    return history
+
+
+def _tokens(messages):
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+
+
+def test_count_tokens_is_positive_for_text():
+    assert count_tokens("") == 0
+    assert 0 < count_tokens("Show me a 2 BHK in Thane") <= 12
+
+
+def test_history_keeps_the_newest_messages_and_summarizes_evicted_caller_turns():
+    history = _history(7)
+    assert [m["content"] for m in history] == ["message 3", "message 4", "message 5", "message 6"]
+    assert (len(history), history.total) == (4, 7)
+    # Evicted caller turns 0 and 2 are summarized; Priya's reply (1) is not
+    assert history.summary == "Caller: message 0\nCaller: message 2"
+    assert history[-1]["content"] == "message 6" and [m["content"] for m in history[1:3]] == ["message 4", "message 5"]
+
+
+def test_summary_is_capped_and_long_turns_are_clipped():
+    history = ConversationHistory(max_messages=1, summary_tokens=count_tokens("Caller: message 0") * 2)
+    for i in range(10):
+        history.append({"role": "user", "content": f"message {i}"})
+    assert history.summary.splitlines() == ["Caller: message 7", "Caller: message 8"]
+
+    history.append({"role": "user", "content": " ".join(["word"] * 50)})
+    history.append({"role": "user", "content": "last"})
+    assert history.summary.splitlines()[-1] == "Caller: " + " ".join(["word"] * 20) + " ..."
+
+
+def test_messages_are_laid_out_prefix_summary_turns_status():
+    history = _history(7)
+    messages = assemble_messages("You are Priya.", history, "STATUS: name missing")
+
+    assert messages[0] == {"role": "system", "content": "You are Priya."}
+    assert messages[1]["content"].startswith("Earlier in this call:\nCaller: message 0")
+    assert [m["content"] for m in messages[2:-1]] == [m["content"] for m in history]
+    assert messages[-1] == {"role": "system", "content": "STATUS: name missing"}
+
+
+def test_older_turns_are_dropped_to_fit_the_budget_but_never_the_current_one():
+    history = _history(4, max_messages=8)
+    fixed = _tokens([{"content": "sys"}, {"content": "status"}])
+    one_turn = count_tokens("message 3") + MESSAGE_OVERHEAD
+
+    messages = assemble_messages("sys", history, "status", budget=fixed + 2 * one_turn)
+    assert [m["content"] for m in messages[1:-1]] == ["message 2", "message 3"]
+    assert _tokens(messages) <= fixed + 2 * one_turn
+
+    messages = assemble_messages("sys", history, "status", budget=1)
+    assert [m["content"] for m in messages[1:-1]] == ["message 3"]
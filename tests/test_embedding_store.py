@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from app.rag.embedding_store import EmbeddingBuilder, EmbeddingStore, content_key
+
+
+def fake_embed(texts):
+    """Deterministic 3-d vector per text."""
+    return [[len(t), t.count("a"), 1.0] for t in texts]
+
+
+class Recorder:
+    def __init__(self, fail_first=0):
+        self.batches = []
+        self.fail_first = fail_first
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        if len(self.batches) <= self.fail_first:
+            raise ConnectionError("rate limited")
+        return fake_embed(texts)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "embeddings.sqlite"))
+    yield store
+    store.close()
+
+
+def test_content_key_depends_on_model_and_text():
+    assert content_key("sea view", "m1") == content_key("sea view", "m1")
+    assert content_key("sea view", "m1") != content_key("sea view", "m2")
+    assert content_key("sea view", "m1") != content_key("sea views", "m1")
+
+
+def test_store_survives_reopening(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    store = EmbeddingStore(path)
+    store.put_many([("k1", [1.0, 2.0]), ("k2", np.array([3.0, 4.0]))], "m")
+    store.close()
+
+    reopened = EmbeddingStore(path)
+    found = reopened.get_many(["k1", "k2", "missing"])
+    reopened.close()
+    assert sorted(found) == ["k1", "k2"]
+    assert found["k2"].dtype == np.float32 and list(found["k2"]) == [3.0, 4.0]
+
+
+def test_builder_embeds_each_distinct_text_once_and_reuses_it_next_build(store):
+    embed = Recorder()
+    builder = EmbeddingBuilder(store, embed, "m")
+
+    matrix, report = builder.build(["a", "bb", "a"])
+    assert matrix.shape == (3, 3) and np.array_equal(matrix[0], matrix[2])
+    assert (report["computed"], report["reused"]) == (2, 0)
+
+    _matrix, report = builder.build(["bb", "ccc"])
+    assert (report["computed"], report["reused"]) == (1, 1)
+    assert sorted(t for batch in embed.batches for t in batch) == ["a", "bb", "ccc"]
+
+
+def test_batches_are_bounded_by_count_and_characters(store):
+    embed = Recorder()
+    EmbeddingBuilder(store, embed, "m", batch_size=2, max_batch_chars=10, max_concurrency=1).build(
+        ["aaaa", "bbbb", "cccc", "dddddddd", "e"])
+    assert all(len(batch) <= 2 and sum(map(len, batch)) <= 10 for batch in embed.batches)
+    assert sum(len(batch) for batch in embed.batches) == 5
+
+
+def test_transient_failures_are_retried(store):
+    embed = Recorder(fail_first=1)
+    matrix, report = EmbeddingBuilder(store, embed, "m", max_retries=2).build(["a"])
+    assert len(embed.batches) == 2 and report["computed"] == 1
+    assert list(matrix[0]) == [1.0, 1.0, 1.0]
+
+
+def test_a_vector_count_mismatch_is_an_error(store):
+    builder = EmbeddingBuilder(store, lambda texts: fake_embed(texts)[:-1], "m")
+    with pytest.raises(ValueError, match="1 vectors for 2 texts"):
+        builder.build(["a", "b"])
+    assert len(store) == 0
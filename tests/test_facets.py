@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from app.rag.catalog import InMemoryCatalog, row_order
+from app.rag.facets import FacetIndex, value_key
+
+
+@pytest.fixture(scope="module")
+def rows(records):
+    """Listings in the index's row order."""
+    return row_order(records)
+
+
+@pytest.fixture(scope="module")
+def index(rows):
+    return FacetIndex(InMemoryCatalog(rows))
+
+
+def _cell(record, facet):
+    value = record.get(facet)
+    if isinstance(value, list):
+        return {value_key(facet, v) for v in value}
+    return {value_key(facet, value)} if value else set()
+
+
+def _matches(record, filters):
+    for facet, values in filters.items():
+        wanted = {value_key(facet, v) for v in values}
+        cell = _cell(record, facet)
+        if not (wanted <= cell if facet == "amenities" else wanted & cell):
+            return False
+    return True
+
+
+def test_value_key_folds_case_and_bare_bhk_numbers():
+    assert value_key("bhk", "2") == value_key("bhk", " 2 BHK") == "2 bhk"
+    assert value_key("builder", "Raymond Realty") == "raymond realty"
+
+
+def test_filter_is_or_within_a_facet_and_and_across_facets(index, rows):
+    filters = {"possession": ["ready to move", "Under Construction"], "facing": ["East"], "amenities": ["Clubhouse", "Swimming Pool"]}
+    mask, facet_masks = index.filter(np.ones(index.size, dtype=bool), filters)
+    assert set(facet_masks) == set(filters)
+    assert list(np.flatnonzero(mask)) == [i for i, p in enumerate(rows) if _matches(p, filters)]
+
+
+def test_unknown_values_match_nothing(index):
+    assert not index.facet_mask("builder", ["No Such Builder"]).any()
+    assert not index.facet_mask("amenities", ["Clubhouse", "Helipad"]).any()
+
+
+def test_counts_exclude_each_facets_own_filter(index, rows):
+    base = np.array(["thane" in p["city"].lower() for p in rows])
+    filters = {"possession": ["Under Construction"], "bhk": ["2"]}
+    _mask, facet_masks = index.filter(base, filters)
+
+    counts = index.counts(base, facet_masks)
+    for facet in ("possession", "bhk", "facing"):
+        others = {f: v for f, v in filters.items() if f != facet}
+        expected = {}
+        for p in rows:
+            if "thane" in p["city"].lower() and _matches(p, others):
+                for key in _cell(p, facet):
+                    expected[key] = expected.get(key, 0) + 1
+        assert {value_key(facet, v): n for v, n in counts[facet].items()} == expected
+        assert list(counts[facet].values()) == sorted(counts[facet].values(), reverse=True)
+
+
+def test_counts_of_an_empty_match_are_empty(index):
+    counts = index.counts(np.zeros(index.size, dtype=bool), {})
+    assert counts == {facet: {} for facet in counts}
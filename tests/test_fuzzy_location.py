@@ -0,0 +1,37 @@
+from app.rag.fuzzy import MIN_SIMILARITY, TrigramIndex, normalize_place, trigrams
+
+
+def test_trigrams_are_padded_and_normalized():
+    assert normalize_place("  Thane-West!! ") == "thane west"
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+
+
+def test_search_ranks_by_dice_similarity():
+    index = TrigramIndex(["Thane", "Ghodbunder Road", "Whitefield"])
+    assert index.search("thaane", limit=1)[0][0] == "Thane"
+    assert index.search("whitfeild", limit=1)[0][0] == "Whitefield"
+    assert index.search("Thane")[0] == ("Thane", 1.0)
+    assert index.search("zzz", min_score=MIN_SIMILARITY) == []
+
+
+def test_ties_are_broken_by_name():
+    assert [name for name, _score in TrigramIndex(["ab", "aa"]).search("a")] == ["aa", "ab"]
+
+
+def test_misspelled_locations_find_the_same_listings(snapshot):
+    exact = [p["id"] for p in snapshot.search(location="Ghodbunder Road")]
+    assert exact
+    assert [p["id"] for p in snapshot.search(location="Gorbunder Road")] == exact
+    assert [p["id"] for p in snapshot.search(location="ghodbundar")] == exact
+
+
+def test_unknown_places_match_nothing(snapshot):
+    assert snapshot.search(location="Timbuktu") == []
+    assert snapshot.resolve_location("Timbuktu") == []
+
+
+def test_resolve_location_offers_ranked_places_with_counts(snapshot):
+    candidates = snapshot.resolve_location("thaane west")
+    assert candidates and candidates[0]["score"] >= MIN_SIMILARITY
+    assert "thane" in candidates[0]["place"].lower() and candidates[0]["count"] > 0
+    assert [c["score"] for c in candidates] == sorted((c["score"] for c in candidates), reverse=True)
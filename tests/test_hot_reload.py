@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+
+import pytest
+
+from app.rag import delta, index as index_module
+from app.rag.index import PropertyIndex
+from app.rag.journal import DeltaJournal, journal_path
+
+from conftest import write_catalog
+
+
+@pytest.fixture
+def index_at(monkeypatch, tmp_path):
+    """A fresh PropertyIndex serving properties.json in a temporary directory."""
+    opened = []
+
+    def open_index(records):
+        monkeypatch.setattr(index_module, "_instance", None)
+        index = PropertyIndex()
+        index.data_path = write_catalog(tmp_path, records)
+        index._journal = DeltaJournal(journal_path(index.data_path))
+        index.reload()
+        opened.append(index)
+        return index
+
+    yield open_index
+    for index in opened:
+        index.wait_for_semantic()
+
+
+def _rewrite(path, records):
+    # A new file swapped in, like a deploy would (new inode even if mtime ties)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    os.replace(path + ".tmp", path)
+
+
+def test_unchanged_file_is_not_reloaded(index_at, records):
+    index = index_at(records[:40])
+    before = index.snapshot
+    assert index.reload(force=False) is before
+
+
+def test_reload_publishes_a_new_snapshot_and_old_readers_keep_theirs(index_at, records):
+    index = index_at(records[:40])
+    before = index.snapshot
+    ids = {str(p["id"]) for p in before.properties}
+
+    _rewrite(index.data_path, records[:10])
+    after = index.reload(force=False)
+
+    assert after is index.snapshot and after.version > before.version
+    assert len(after) == 10 and len(before) == 40
+    assert {str(p["id"]) for p in before.properties} == ids
+
+
+def test_a_broken_file_keeps_the_current_snapshot(index_at, records):
+    index = index_at(records[:40])
+    before = index.snapshot
+    with open(index.data_path, "w", encoding="utf-8") as f:
+        f.write("[{not json")
+
+    with pytest.raises(ValueError):
+        index.reload(force=False)
+    assert index.snapshot is before
+
+
+def test_concurrent_readers_always_see_a_whole_snapshot(index_at, records):
+    index = index_at(records[:40])
+    seen, stop = set(), threading.Event()
+
+    def read():
+        while not stop.is_set():
+            snapshot = index.snapshot
+            seen.add((len(snapshot), len(snapshot.properties), len({p["id"] for p in snapshot.properties})))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(6):
+        _rewrite(index.data_path, records[:10] if i % 2 == 0 else records[:40])
+        index.reload()
+    stop.set()
+    reader.join()
+    assert seen and all(len(set(sizes)) == 1 and sizes[0] in (10, 40) for sizes in seen)
+
+
+def test_deltas_are_journaled_and_replayed_by_other_workers(index_at, records):
+    index = index_at(records[:40])
+    changed = dict(records[0], price=1)
+    index.apply_delta(upserts=[changed], deletes=[records[1]["id"]])
+
+    assert index.get_by_id(records[0]["id"])["price"] == 1
+    assert index.get_by_id(records[1]["id"]) is None
+
+    # Another worker on the same files: unchanged properties.json, journal replayed on load
+    other = index_at(records[:40])
+    assert other.get_by_id(records[0]["id"])["price"] == 1
+    assert len(other.snapshot) == 39
+
+
+def test_compaction_folds_the_journal_into_properties_json(index_at, records, monkeypatch):
+    monkeypatch.setattr(delta, "COMPACT_AFTER", 2)
+    index = index_at(records[:40])
+    index.apply_delta(upserts=[dict(records[0], price=1)])
+    index.apply_delta(deletes=[records[1]["id"]])
+
+    with open(index.data_path, "r", encoding="utf-8") as f:
+        compacted = {str(p["id"]): p for p in json.load(f)}
+    assert len(compacted) == 39 and compacted[str(records[0]["id"])]["price"] == 1
+    assert index._journal.read(0)[0] == []
+    assert getattr(index.snapshot, "overlay", None) is None
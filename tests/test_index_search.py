@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from app.rag.catalog import price_key
+from conftest import DATA_PATH, walk_pages
+
+# Location aliases of the original linear-scan search
+BASELINE_ALIASES = {
+    "banglore": "bangalore",
+    "bengalor": "bangalore",
+    "bangalor": "bangalore",
+    "bengaluru": "bangalore",
+    "blr": "bangalore",
+    "thana": "thane",
+    "bombay": "mumbai",
+    "white field": "whitefield",
+}
+
+
+def linear_search(records, location=None, max_price=None, bhk=None, property_type=None):
+    """The original PropertyIndex.search filters (one pass over every listing), in (price, id) order."""
+    results = records
+    if location:
+        location_lower = location.lower().strip()
+        normalized = BASELINE_ALIASES.get(location_lower, location_lower)
+        results = [
+            p for p in results
+            if normalized in p.get("location", "").lower()
+            or normalized in p.get("city", "").lower()
+            or location_lower in p.get("location", "").lower()
+            or location_lower in p.get("city", "").lower()
+            or any(normalized in landmark.lower() for landmark in p.get("nearby_landmarks", []))
+            or normalized in p.get("nearby_metro", "").lower()
+        ]
+    if max_price:
+        results = [p for p in results if price_key(p) <= max_price]
+    if bhk:
+        bhk_str = str(bhk).upper()
+        if "BHK" not in bhk_str:
+            bhk_str = f"{bhk} BHK"
+        results = [p for p in results if bhk_str in p.get("bhk", "").upper()]
+    if property_type:
+        results = [p for p in results if property_type.lower() in p.get("type", "").lower()]
+    return [str(p["id"]) for p in sorted(results, key=lambda p: (price_key(p), str(p["id"])))]
+
+
+def _places(field):
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        bundled = json.load(f)
+    if field == "nearby_landmarks":
+        return sorted({name for p in bundled for name in p.get(field, [])})
+    if field == "location":
+        return sorted({p["location"].split(",")[0].strip() for p in bundled})
+    return sorted({p[field] for p in bundled})
+
+
+FILTERS = [
+    {},
+    {"max_price": 15000000},
+    {"bhk": "2"},
+    {"bhk": "3 BHK", "max_price": 30000000},
+    {"property_type": "apartment"},
+]
+
+
+@pytest.mark.parametrize("location", [None, *_places("city"), *_places("location"), *_places("nearby_landmarks")])
+@pytest.mark.parametrize("filters", FILTERS)
+def test_posting_lists_match_linear_scan(records, snapshot, location, filters):
+    ids, total = walk_pages(snapshot, location=location, **filters)
+    expected = linear_search(records, location=location, **filters)
+    assert ids == expected
+    assert total == len(expected)
+
+
+@pytest.mark.parametrize("location", ["thana", "Thane Metro", "thane west"])
+def test_aliases_and_multiword_places_find_at_least_the_linear_matches(records, snapshot, location):
+    ids, _total = walk_pages(snapshot, location=location)
+    assert set(linear_search(records, location=location)) <= set(ids)
+
+
+@pytest.mark.parametrize("filters", [{"location": "thane"}, {"location": "mumbai", "bhk": "3"}, {"max_price": 12000000}])
+def test_search_returns_top_five_of_the_matches(records, snapshot, filters):
+    found = [str(p["id"]) for p in snapshot.search(**filters)]
+    assert len(found) == min(5, len(linear_search(records, **filters)))
+    assert set(found) <= set(linear_search(records, **filters))
+
+
+def test_get_by_id(records, snapshot):
+    for record in records[::17]:
+        assert snapshot.get_by_id(str(record["id"]))["name"] == record["name"]
+    assert snapshot.get_by_id("no-such-id") is None
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from app.conversation import intents, manager as manager_module
+from app.conversation.intents import IntentClassifier, classify_intent, features, get_classifier
+from app.conversation.manager import ConversationManager
+
+
+def test_features_are_unit_length_and_shape_contact_details():
+    ids, weights = features("Mail me at asha@example.com or 98765 43210")
+    assert np.isclose(np.linalg.norm(weights), 1.0)
+    assert np.array_equal(features("Mail me at ravi@example.org or 91234 56789")[0], ids)
+
+
+def test_classifier_learns_its_training_utterances():
+    examples = [("goodbye", "bye"), ("goodbye", "thanks bye"), ("goodbye", "that's all goodbye"),
+                ("more_options", "show more"), ("more_options", "any other options"), ("more_options", "more flats please")]
+    model = IntentClassifier(examples)
+    assert model.intents == ["goodbye", "more_options"]
+    assert all(model.predict(text)[0] == intent for intent, text in examples)
+    assert np.isclose(model.probabilities("bye").sum(), 1.0)
+
+
+def test_classify_intent_answers_locally_when_confident():
+    class FailingLLM:
+        def generate(self, system, text):
+            raise AssertionError("confident turns never reach the LLM")
+
+    found = classify_intent("okay thank you, bye", llm=FailingLLM())
+    assert (found["intent"], found["source"]) == ("goodbye", "local")
+    assert found["score"] >= intents.INTENT_MIN_CONFIDENCE
+
+
+def test_classify_intent_escalates_unsure_turns_and_keeps_the_local_guess_on_bad_json(monkeypatch):
+    monkeypatch.setattr(intents, "INTENT_MIN_CONFIDENCE", 1.1)
+
+    class LLM:
+        def __init__(self, reply):
+            self.reply = reply
+
+        def generate(self, system, text):
+            return self.reply
+
+    assert classify_intent("bye", llm=LLM('{"intent": "goodbye", "confidence": "high"}'))["source"] == "llm"
+    assert classify_intent("bye", llm=LLM("not json"))["source"] == "local"
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    """A manager whose classifier answers (intent, score) and records the route taken."""
+    manager = ConversationManager()
+    calls = []
+    monkeypatch.setattr(manager, "_show_more_properties", lambda: calls.append("more") or {"text": "more"})
+    monkeypatch.setattr(manager, "_farewell_with_properties", lambda: calls.append("farewell") or {"text": "bye"})
+
+    def route(intent, score, **state):
+        monkeypatch.setattr(manager_module, "classify_intent", lambda text: {"intent": intent, "score": score})
+        for name, value in state.items():
+            setattr(manager, name, value)
+        calls.clear()
+        reply = manager._route_by_intent("whatever")
+        return reply, list(calls)
+
+    return route
+
+
+def test_low_confidence_turns_fall_through_to_the_reply_llm(routed):
+    assert routed("more_options", intents.INTENT_MIN_CONFIDENCE - 0.01, more_properties={"filters": {}}) == (None, [])
+
+
+def test_more_options_routes_only_with_a_search_to_continue(routed):
+    assert routed("more_options", 0.7, more_properties={"filters": {}})[1] == ["more"]
+    assert routed("more_options", 0.7, more_properties=None) == (None, [])
+
+
+def test_ending_the_call_needs_high_confidence(routed):
+    assert routed("goodbye", intents.HIGH_CONFIDENCE - 0.01) == (None, [])
+    assert routed("goodbye", intents.HIGH_CONFIDENCE)[1] == ["farewell"]
+
+
+def test_bundled_classifier_is_trained_once():
+    assert get_classifier() is get_classifier()
@@ -0,0 +1,40 @@
+from app.conversation.manager import ConversationManager
+from app.rag.retriever import search_properties_page
+
+
+def _all_matches(**filters):
+    ids, cursor = [], None
+    while True:
+        page = search_properties_page(cursor=cursor, page_size=3, **filters)
+        ids += [str(p["id"]) for p in page["results"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_more_options_walks_every_match_once(monkeypatch):
+    manager = ConversationManager()
+    monkeypatch.setattr(manager, "_try_save_lead", lambda: None)
+    manager.lead = {"name": "Asha Rao", "city": "Thane"}
+
+    farewell = manager._farewell_with_properties()
+    shown = [str(card["id"]) for card in farewell["properties"]]
+    filters = dict(manager.more_properties["filters"])
+
+    while manager.more_properties:
+        reply = manager._show_more_properties()
+        shown += [str(card["id"]) for card in reply.get("properties", [])]
+
+    assert len(shown) == len(set(shown)), "a listing was shown twice"
+    assert sorted(shown) == sorted(_all_matches(**filters)), "a listing was never shown"
+
+
+def test_more_options_after_last_page_ends_the_search(monkeypatch):
+    manager = ConversationManager()
+    monkeypatch.setattr(manager, "_try_save_lead", lambda: None)
+    manager.lead = {"name": "Asha Rao", "city": "Mumbai"}
+
+    manager._farewell_with_properties()
+    while manager.more_properties:
+        manager._show_more_properties()
+    assert manager.more_properties is None
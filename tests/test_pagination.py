@@ -0,0 +1,138 @@
+import base64
+import json
+import types
+
+import pytest
+
+from app.api.property_api import search_properties
+from app.rag import retriever
+from app.rag.pagination import InvalidCursor, decode_cursor, encode_cursor
+from conftest import build_snapshot, walk_pages
+
+
+def _raw_cursor(fields):
+    return base64.urlsafe_b64encode(json.dumps(fields).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Make retriever serve the given snapshot."""
+    def use(snapshot):
+        monkeypatch.setattr(retriever, "property_index", types.SimpleNamespace(snapshot=snapshot, version=snapshot.version))
+    return use
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12500000, "rr1")) == ((12500000, "rr1"), frozenset())
+    # Unpriced listings sort last
+    assert decode_cursor(encode_cursor(float("inf"), "p9")) == ((float("inf"), "p9"), frozenset())
+    # After a ranked first page: from the start, leaving out what it showed
+    assert decode_cursor(encode_cursor(None, None, ["p1", "p2"])) == (None, frozenset({"p1", "p2"}))
+    assert decode_cursor(encode_cursor(500, "p3", ["p1"])) == ((500, "p3"), frozenset({"p1"}))
+
+
+def test_cursor_with_legacy_version_still_decodes():
+    assert decode_cursor(_raw_cursor([9000000, "p21", 7])) == ((9000000, "p21"), frozenset())
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    _raw_cursor({"price": 1}),
+    _raw_cursor(["cheap", "p1"]),
+    _raw_cursor([True, "p1"]),
+    _raw_cursor([1000, ["p1"]]),
+    _raw_cursor([1000, "p1", 3, 4]),
+    _raw_cursor([1000, None]),
+    _raw_cursor([None, "p1", [{"id": 1}]]),
+    _raw_cursor([None, None, [f"p{i}" for i in range(51)]]),
+    base64.urlsafe_b64encode(b'[NaN, "p1"]').decode("ascii"),
+])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("page_size", [1, 3, 7, 50])
+def test_pages_cover_every_match_once(snapshot, serve, page_size):
+    serve(snapshot)
+    expected, total = walk_pages(snapshot, page_size=1000, location="thane")
+    ids, cursor = [], None
+    while True:
+        page = retriever.search_properties_page(location="thane", cursor=cursor, page_size=page_size)
+        assert page["total"] == total
+        ids += [str(p["id"]) for p in page["results"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert ids == expected
+
+
+def test_cursor_stays_valid_across_a_reload(records, serve, tmp_path):
+    before = build_snapshot(tmp_path / "before", records)
+    serve(before)
+    first = retriever.search_properties_page(location="thane", page_size=10)
+
+    # Reload with a listing cheaper than the first page and one in the middle of the rest
+    thane = [p for p in records if p.get("city") == "Thane"]
+    added = [dict(thane[0], id="cheap-new", price=1), dict(thane[0], id="mid-new", price=thane[len(thane) // 2]["price"])]
+    after = build_snapshot(tmp_path / "after", records + added)
+    serve(after)
+    rest, cursor = [], first["next_cursor"]
+    while cursor:
+        page = retriever.search_properties_page(location="thane", cursor=cursor, page_size=10)
+        rest += [str(p["id"]) for p in page["results"]]
+        cursor = page["next_cursor"]
+
+    shown = [str(p["id"]) for p in first["results"]]
+    everything, _total = walk_pages(after, location="thane")
+    assert not set(shown) & set(rest)
+    assert "mid-new" in rest and "cheap-new" not in rest
+    assert rest == everything[everything.index(shown[-1]) + 1:]
+
+
+def _endpoint_pages(page_size, **filters):
+    """Every page the REST search serves, following next_cursor."""
+    pages, cursor = [], None
+    while True:
+        body = json.loads(search_properties(cursor=cursor, page_size=page_size, **filters).body)
+        pages.append(body)
+        cursor = body["next_cursor"]
+        if not cursor:
+            return pages
+
+
+@pytest.mark.parametrize("filters", [{"location": "thane"}, {"location": "mumbai", "bhk": "3"}, {"budget": "1.2 cr"}])
+@pytest.mark.parametrize("page_size", [5, 7])
+def test_rest_search_ranks_the_first_page_then_pages_the_rest(snapshot, serve, filters, page_size):
+    serve(snapshot)
+    query = dict(location=filters.get("location"), bhk=filters.get("bhk"),
+                 max_price=12000000 if "budget" in filters else None)
+    facet_args = {key: None for key in ("possession", "builder", "property_type", "facing", "amenities")}
+    pages = _endpoint_pages(page_size, q=None, **facet_args, **filters)
+
+    expected, total = walk_pages(snapshot, page_size=1000, location=query["location"], bhk=query["bhk"],
+                                 max_price=query["max_price"])
+    ranked = [str(p["id"]) for p in snapshot.relaxed_search(query["location"], query["max_price"], query["bhk"], k=page_size)["results"]]
+    first = [card["id"] for card in pages[0]["properties"]]
+    assert first == ranked
+    if filters == {"location": "thane"}:
+        assert first != expected[:page_size], "first page should be ranked, not the cheapest matches"
+
+    ids = [card["id"] for page in pages for card in page["properties"]]
+    assert len(ids) == len(set(ids)) == total
+    assert sorted(ids) == sorted(expected)
+    # After the ranked page, the rest come in (price, id) order
+    assert ids[page_size:] == [i for i in expected if i not in set(first)]
+
+
+def test_skip_cursor_pages_fill_up_and_end_exactly(snapshot, serve):
+    serve(snapshot)
+    expected, _total = walk_pages(snapshot, page_size=1000, location="thane")
+    skip = expected[1:4] + expected[-1:]
+    ids, cursor = [], retriever.encode_cursor(None, None, skip)
+    while cursor:
+        page = retriever.search_properties_page(location="thane", cursor=cursor, page_size=3)
+        assert len(page["results"]) == 3 or not page["next_cursor"]
+        ids += [str(p["id"]) for p in page["results"]]
+        cursor = page["next_cursor"]
+    assert ids == [i for i in expected if i not in skip]
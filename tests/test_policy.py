@@ -0,0 +1,67 @@
+import pytest
+
+from app.conversation.manager import ConversationManager
+from app.conversation.policy import _ASKS, SHOW_PROPERTIES, templated_reply
+from app.conversation.slots import scan
+from app.llm.response_cache import get_response_cache
+
+
+def _turn(text, lead, before=None, history=()):
+    history = list(history) + [{"role": "user", "content": text}]
+    return templated_reply(lead, before if before is not None else {}, scan(text), history)
+
+
+def test_greeting_asks_for_the_name():
+    reply = _turn("hi", {})
+    assert reply and any(ask in reply for ask in _ASKS["name"]) and "Priya" in reply
+
+
+def test_a_new_name_is_acknowledged_and_the_phone_asked_for():
+    reply = _turn("Rahul", {"name": "Rahul"}, history=[{"role": "user", "content": "hi"}])
+    assert "Rahul" in reply and any(ask in reply for ask in _ASKS["phone"])
+
+
+def test_new_preferences_are_acknowledged():
+    reply = _turn("2 bhk in thane", {"name": "Rahul", "bhk": "2 BHK", "city": "Thane"}, before={"name": "Rahul"},
+                  history=[{"role": "user", "content": "hi"}])
+    assert "2 BHK in Thane" in reply and any(ask in reply for ask in _ASKS["phone"])
+
+
+@pytest.mark.parametrize("text", [
+    "what amenities does it have?",
+    "is there a loan option",
+    "I mostly care about schools nearby for my kids",
+])
+def test_questions_and_open_ended_turns_go_to_the_llm(text):
+    assert _turn(text, {"name": "Rahul"}, before={"name": "Rahul"}) is None
+
+
+def test_complete_lead_shows_properties_on_new_details_or_a_yes():
+    lead = {"name": "Rahul", "phone": "9876543210", "email": "r@x.com"}
+    assert _turn("r@x.com", lead, before={"name": "Rahul", "phone": "9876543210"}) == SHOW_PROPERTIES
+    assert _turn("yes please", lead, before=lead) == SHOW_PROPERTIES
+    assert _turn("hmm", lead, before=lead) is None
+
+
+def test_the_previous_reply_is_not_repeated(monkeypatch):
+    lead = {"name": "Rahul"}
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "What's your phone number?"}]
+    choices = iter(["", "What's your phone number?", "", "Could you share your mobile number?"])
+    monkeypatch.setattr("app.conversation.policy.random.choice", lambda options: next(choices))
+    assert _turn("ok", lead, before=lead, history=history) == "Could you share your mobile number?"
+
+
+def test_manager_answers_predictable_turns_without_the_llm(monkeypatch):
+    get_response_cache().clear()
+    manager = ConversationManager()
+    calls = []
+    monkeypatch.setattr(manager.llm, "complete", lambda messages: calls.append(messages) or "From the LLM")
+    monkeypatch.setattr(manager, "_try_save_lead", lambda: None)
+
+    greeting = manager.handle_user_input("hi")["text"]
+    assert any(ask in greeting for ask in _ASKS["name"])
+    assert "Rahul" in manager.handle_user_input("My name is Rahul")["text"]
+    assert calls == []
+
+    assert manager.handle_user_input("what amenities do you have?")["text"] == "From the LLM"
+    assert len(calls) == 1
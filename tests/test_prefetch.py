@@ -0,0 +1,93 @@
+import threading
+import types
+
+import pytest
+
+from app.conversation import manager as manager_module
+from app.conversation.manager import ConversationManager
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """Replace the farewell search with a recorder; gate.set() lets background searches finish."""
+    calls, gate = [], threading.Event()
+
+    def search(city, max_price, bhk):
+        calls.append((city, max_price, bhk, threading.current_thread().name))
+        if threading.current_thread().name.startswith("property-prefetch"):
+            gate.wait(5)
+        if city == "Nowhere":
+            raise RuntimeError("search failed")
+        return {"cards": [{"id": f"{city}-{bhk}"}], "city": city}
+
+    monkeypatch.setattr(manager_module, "_search_properties", search)
+    monkeypatch.setattr(manager_module, "PROPERTY_PREFETCH", True)
+    yield types.SimpleNamespace(calls=calls, gate=gate)
+    gate.set()
+
+
+def _manager(**lead):
+    manager = ConversationManager()
+    manager.lead.update(lead)
+    return manager
+
+
+def test_prefetch_starts_once_per_search_key(searches):
+    manager = _manager(city="Thane")
+    manager._prefetch_properties()
+    manager._prefetch_properties()
+    searches.gate.set()
+    manager.prefetch[1].result(5)
+    assert len(searches.calls) == 1 and searches.calls[0][:3] == ("Thane", None, None)
+
+
+def test_changed_preferences_replace_the_prefetch(searches):
+    manager = _manager(city="Thane")
+    manager._prefetch_properties()
+    first = manager.prefetch[1]
+    manager.lead["bhk"] = "2 BHK"
+    manager._prefetch_properties()
+
+    searches.gate.set()
+    assert manager.prefetch[0] == ("Thane", None, "2 BHK")
+    assert manager._property_results()["cards"] == [{"id": "Thane-2 BHK"}]
+    assert first.cancelled() or first.done()
+
+
+def test_farewell_uses_the_prefetched_result_without_searching_again(searches):
+    manager = _manager(city="Thane")
+    manager._prefetch_properties()
+    searches.gate.set()
+    assert manager._property_results()["cards"] == [{"id": "Thane-None"}]
+    assert len(searches.calls) == 1
+
+
+def test_ready_cards_are_pushed_once(searches):
+    manager = _manager(city="Thane")
+    manager._prefetch_properties()
+    assert manager.ready_properties() is None  # still running
+    searches.gate.set()
+    manager.prefetch[1].result(5)
+    assert manager.ready_properties() == [{"id": "Thane-None"}]
+    assert manager.ready_properties() is None
+
+
+def test_a_failed_prefetch_falls_back_to_an_inline_search(searches):
+    manager = _manager(city="Nowhere")
+    manager._prefetch_properties()
+    searches.gate.set()
+    with pytest.raises(RuntimeError):
+        manager._property_results()
+    assert [call[3].startswith("property-prefetch") for call in searches.calls] == [True, False]
+    assert manager.ready_properties() is None
+
+
+def test_nothing_is_prefetched_without_preferences_or_when_disabled(searches, monkeypatch):
+    manager = _manager(name="Asha")
+    manager._prefetch_properties()
+    assert manager.prefetch is None
+
+    monkeypatch.setattr(manager_module, "PROPERTY_PREFETCH", False)
+    manager.lead["city"] = "Thane"
+    manager._prefetch_properties()
+    assert manager.prefetch is None and searches.calls == []
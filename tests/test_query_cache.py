@@ -0,0 +1,61 @@
+import pytest
+
+from app.rag import retriever
+from app.rag.cache import QueryCache
+
+
+def test_hit_after_put_in_the_same_version():
+    cache = QueryCache(max_size=4)
+    assert cache.get("thane", 1) is None
+    cache.put("thane", ("a",), 1)
+    assert cache.get("thane", 1) == ("a",)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_a_new_catalog_version_drops_every_entry():
+    cache = QueryCache(max_size=4)
+    cache.put("thane", ("a",), 1)
+    cache.put("pune", ("b",), 1)
+
+    assert cache.get("thane", 2) is None
+    assert cache.get("pune", 2) is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["catalog_version"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_size=2)
+    cache.put("a", 1, 1)
+    cache.put("b", 2, 1)
+    cache.get("a", 1)
+    cache.put("c", 3, 1)
+
+    assert cache.get("b", 1) is None
+    assert (cache.get("a", 1), cache.get("c", 1)) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = QueryCache(max_size=16)
+    monkeypatch.setattr(retriever, "query_cache", cache)
+    return cache
+
+
+def test_retrieve_properties_shares_one_read_only_result(fresh_cache):
+    first = retriever.retrieve_properties(location="Thane", bhk="2")
+    second = retriever.retrieve_properties(location="thane", bhk="2 BHK")
+
+    assert second is first and isinstance(first, tuple)
+    assert fresh_cache.stats()["hits"] == 1
+    with pytest.raises(TypeError):
+        first[0]["price"] = 1
+
+
+def test_retrieve_properties_misses_after_a_catalog_reload(fresh_cache):
+    retriever.retrieve_properties(location="Thane")
+    retriever.reload_catalog(force=True)
+    retriever.retrieve_properties(location="Thane")
+
+    assert fresh_cache.stats()["misses"] == 2
+    assert fresh_cache.stats()["catalog_version"] == retriever.get_catalog_version()
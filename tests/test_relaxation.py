@@ -0,0 +1,74 @@
+import json
+import types
+
+import pytest
+
+from app.rag import retriever
+from conftest import DATA_PATH, build_snapshot
+
+
+def _listing(template, **fields):
+    return dict(template, nearby_metro="", nearby_landmarks=[], **fields)
+
+
+@pytest.fixture(scope="module")
+def small(tmp_path_factory):
+    """Three listings: two in Thane (different localities) and one in Mumbai."""
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        template = json.load(f)[0]
+    return build_snapshot(tmp_path_factory.mktemp("relaxation"), [
+        _listing(template, id="a", location="Pokhran Road, Thane West", city="Thane", bhk="2 BHK",
+                 price=10000000, type="Apartment", possession="Ready to Move"),
+        _listing(template, id="b", location="Ghodbunder Road, Thane", city="Thane", bhk="3 BHK",
+                 price=20000000, type="Apartment", possession="Under Construction"),
+        _listing(template, id="c", location="Bandra West, Mumbai", city="Mumbai", bhk="2 BHK",
+                 price=30000000, type="Villa", possession="Under Construction"),
+    ])
+
+
+@pytest.mark.parametrize("query, relaxation, ids", [
+    ({"location": "thane", "bhk": "2", "max_price": 10000000}, None, ["a"]),
+    ({"location": "pokhran", "bhk": "2", "max_price": 9500000}, "budget_10", ["a"]),
+    ({"location": "pokhran", "bhk": "2", "max_price": 8500000}, "budget_20", ["a"]),
+    ({"location": "pokhran", "bhk": "1", "max_price": 10000000}, "adjacent_bhk", ["a"]),
+    ({"location": "ghodbunder", "bhk": "2", "max_price": 10000000}, "nearby_locality", ["a"]),
+    ({"location": "bandra", "bhk": "2", "max_price": 10000000}, "any_city", ["a"]),
+    ({"location": "thane", "bhk": "5", "max_price": 1000000}, "top_picks", None),
+])
+def test_each_ladder_step(small, query, relaxation, ids):
+    found = small.relaxed_search(**query)
+    assert found["relaxation"] == relaxation
+    if ids is not None:
+        assert [p["id"] for p in found["results"]] == ids
+        assert found["total"] == len(ids)
+    else:
+        assert found["total"] == len(small)
+
+
+def test_step_filters_reproduce_the_results(small):
+    found = small.relaxed_search(location="ghodbunder", bhk="2", max_price=10000000)
+    filters = {k: v for k, v in found["filters"].items() if k != "facets"}
+    assert found["filters"]["location"].lower() == "thane"
+    assert [p["id"] for p in small.search(**filters)] == ["a"]
+
+
+def test_facets_are_kept_until_top_picks(small):
+    exact = small.relaxed_search(location="thane", max_price=25000000, facets={"possession": ["Under Construction"]})
+    assert (exact["relaxation"], [p["id"] for p in exact["results"]]) == (None, ["b"])
+
+    found = small.relaxed_search(location="thane", bhk="2", max_price=10000000,
+                                 facets={"possession": ["Under Construction"]})
+    assert found["relaxation"] == "top_picks"
+
+
+def test_facets_are_dropped_before_top_picks(small, monkeypatch):
+    monkeypatch.setattr(retriever, "property_index", types.SimpleNamespace(snapshot=small))
+    found = retriever.relaxed_search_properties(location="thane", bhk="2", max_price=10000000,
+                                                facets={"possession": ["Nonexistent"], "builder": None})
+    assert found["relaxation"] == retriever.FACETS_DROPPED
+    assert list(found["dropped_facets"]) == ["possession"]
+    assert [p["id"] for p in found["results"]] == ["a"]
+
+    found = retriever.relaxed_search_properties(location="thane", bhk="2", max_price=10000000,
+                                                facets={"possession": ["Ready to Move"]})
+    assert (found["relaxation"], list(found["dropped_facets"])) == (None, [])
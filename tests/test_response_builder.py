@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app.rag.catalog import freeze, thaw
+from app.response import response_builder
+from app.response.response_builder import (cards_json, extend_json, format_price, format_property_cards,
+                                           format_property_response, format_single_property, rendered,
+                                           render_cache_stats, splice_json)
+
+
+@pytest.fixture
+def record(records):
+    return freeze(dict(thaw(records[0]), id="card-1", possession="Ready to Move"))
+
+
+@pytest.mark.parametrize("price, spoken", [
+    (None, "price on request"), (8500000, "85 lakhs"), (10000000, "1 crore"), (12500000, "1.2 crores"),
+])
+def test_format_price(price, spoken):
+    assert format_price(price) == spoken
+
+
+def test_frozen_records_are_rendered_once(record):
+    before = render_cache_stats()
+    first = rendered(record)
+    assert rendered(record) is first
+    after = render_cache_stats()
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (1, 1)
+
+    # An equal but new record (a reload) gets its own rendering; plain dicts are never cached
+    assert rendered(freeze(thaw(record))) is not first
+    plain = thaw(record)
+    assert rendered(plain) is not rendered(plain)
+
+
+def test_cached_cards_match_a_fresh_rendering(record):
+    cached = rendered(record)
+    fresh = response_builder._render(thaw(record))
+    assert cached == fresh
+    assert json.loads(cached.card_json) == cached.card
+
+
+def test_cards_carry_their_encoding_and_are_copies(record):
+    cards = format_property_cards([record, record, record, record])
+    assert len(cards) == 3
+    cards[0]["price"] = "changed"
+    assert rendered(record).card["price"] != "changed"
+    assert cards_json(cards[1:2]) == [rendered(record).card_json]
+    assert cards_json([{"id": 1}]) == [b'{"id":1}']
+
+
+def test_splice_and_extend_build_valid_json(record):
+    body = splice_json({"success": True}, properties=[rendered(record).api_card_json], empty=[])
+    parsed = json.loads(body)
+    assert parsed["success"] and parsed["properties"][0]["id"] == "card-1" and parsed["empty"] == []
+    assert json.loads(splice_json({}, items=[b"1"])) == {"items": [1]}
+    assert json.loads(extend_json(b'{"a":1}', score=0.5)) == {"a": 1, "score": 0.5}
+
+
+def test_voice_responses_are_assembled_from_the_cached_pieces(record):
+    text = format_property_response([record])
+    assert text.startswith("Great news! I found 1 property")
+    assert rendered(record).first in text and "ready to move in" in text
+    assert format_single_property(record) == rendered(record).details
+
+
+def test_the_cache_is_bounded(records, monkeypatch):
+    monkeypatch.setattr(response_builder, "RENDER_CACHE_SIZE", 3)
+    for prop in records[:10]:
+        rendered(freeze(thaw(prop)))
+    assert render_cache_stats()["size"] <= 3
@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+from app.conversation.manager import ConversationManager
+from app.llm.response_cache import ResponseCache, fingerprint, get_response_cache, normalize_text
+
+
+class Counter:
+    """generate() stand-in that numbers its replies."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"reply {self.calls}"
+
+
+def test_normalize_text_ignores_case_punctuation_and_spacing():
+    assert normalize_text("Hi!!  Show me property in Thane.") == "hi show me property in thane"
+    assert normalize_text("Mail: Asha.Rao@example.com") == "mail asha.rao@example.com"
+
+
+def test_fingerprint_separates_parts():
+    assert fingerprint("ab", "c") != fingerprint("a", "bc")
+    assert fingerprint("status", "v1") == fingerprint("status", "v1")
+
+
+def test_same_words_same_context_hit():
+    cache, generate = ResponseCache(), Counter()
+    assert cache.get_or_generate("Hi there!", "ctx", generate) == "reply 1"
+    assert cache.get_or_generate("hi there", "ctx", generate) == "reply 1"
+    assert generate.calls == 1 and cache.hits == 1
+
+
+def test_other_context_misses():
+    cache, generate = ResponseCache(), Counter()
+    cache.get_or_generate("what next", fingerprint("Name: Asha"), generate)
+    assert cache.get_or_generate("what next", fingerprint("Name: NOT YET COLLECTED"), generate) == "reply 2"
+
+
+def test_entries_expire():
+    cache, generate = ResponseCache(ttl=0.01), Counter()
+    cache.get_or_generate("hello", "ctx", generate)
+    time.sleep(0.02)
+    assert cache.get_or_generate("hello", "ctx", generate) == "reply 2"
+    assert cache.expirations == 1
+
+
+def test_lru_bound():
+    cache, generate = ResponseCache(max_size=2), Counter()
+    for text in ("one", "two", "three"):
+        cache.get_or_generate(text, "ctx", generate)
+    assert cache.evictions == 1
+    assert cache.get_or_generate("one", "ctx", generate) == "reply 4"
+
+
+@pytest.fixture
+def managers(monkeypatch):
+    """ConversationManager factory whose LLM calls are counted instead of sent."""
+    get_response_cache().clear()
+    calls = []
+
+    def make(*turns):
+        manager = ConversationManager()
+        monkeypatch.setattr(manager.llm, "complete", lambda messages: calls.append(messages) or f"reply {len(calls)}")
+        for role, content in turns:
+            manager.history.append({"role": role, "content": content})
+        return manager
+
+    make.calls = calls
+    return make
+
+
+def _reply(manager, text):
+    manager.history.append({"role": "user", "content": text})
+    return manager._generate_response(text)
+
+
+def _caller(managers, *turns, **lead):
+    manager = managers(*turns)
+    manager.lead.update(lead)
+    return manager
+
+
+def test_manager_reuses_replies_across_callers_in_the_same_lead_state(monkeypatch, managers):
+    asha = _caller(managers, ("user", "i want a flat"), ("assistant", "Sure"),
+                   name="Asha Rao", phone="9876543210", city="Thane", budget="1.2 Cr")
+    monkeypatch.setattr(asha.llm, "complete", lambda messages: "Thanks Asha Rao, I'll call 9876543210 about 1.2 Cr flats.")
+    assert _reply(asha, "what next") == "Thanks Asha Rao, I'll call 9876543210 about 1.2 Cr flats."
+
+    # Another caller, another conversation, same collected fields, city and budget band
+    ravi = _caller(managers, ("user", "is it near the lake"), ("assistant", "Yes"),
+                   name="Ravi Kumar", phone="9123456780", city="thane", budget="1.1 Cr")
+    assert _reply(ravi, "What next?") == "Thanks Ravi Kumar, I'll call 9123456780 about 1.1 Cr flats."
+    assert len(managers.calls) == 0
+
+
+def test_manager_cache_holds_no_caller_details(monkeypatch, managers):
+    asha = _caller(managers, name="Asha Rao", email="asha.rao@example.com")
+    monkeypatch.setattr(asha.llm, "complete", lambda messages: "Got it Asha, I'll mail asha.rao@example.com")
+    assert _reply(asha, "my email is asha.rao@example.com") == "Got it Asha, I'll mail asha.rao@example.com"
+
+    stored = repr(list(get_response_cache()._entries.items()))
+    assert "asha" not in stored.lower()
+
+
+@pytest.mark.parametrize("first, second", [
+    ({"name": "Asha Rao"}, {}),
+    ({"name": "Asha Rao"}, {"name": "Asha Rao", "phone": "9876543210"}),
+    ({"city": "Thane"}, {"city": "Mumbai"}),
+    ({"bhk": "2 BHK"}, {"bhk": "3 BHK"}),
+    ({"budget": "1.2 Cr"}, {"budget": "3 Cr"}),
+])
+def test_manager_key_includes_the_lead_state(managers, first, second):
+    assert _reply(_caller(managers, **first), "hello") != _reply(_caller(managers, **second), "hello")
+    assert len(managers.calls) == 2
@@ -0,0 +1,96 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from app.rag.embedder import get_embedder
+from app.rag.semantic import SemanticIndex, embedding_meta_path, property_text
+
+
+class CountingEmbedder:
+    """Local embedder that counts how many texts it was asked to embed."""
+
+    def __init__(self):
+        self.embed_fn, self.model = get_embedder("local")
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.texts += len(texts)
+        return self.embed_fn(texts)
+
+
+def _meta(path):
+    with open(embedding_meta_path(path), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_build_then_load_round_trip(records, tmp_path):
+    path = str(tmp_path / "properties.json")
+    embed = CountingEmbedder()
+    built = SemanticIndex.build(records[:50], path, embed, embed.model, "fp-1")
+    loaded = SemanticIndex.load(records[:50], path, embed.model, "fp-1")
+
+    assert isinstance(loaded.matrix, np.memmap)
+    assert np.array_equal(built.matrix, loaded.matrix)
+    assert SemanticIndex.load(records[:50], path, "other-model", "fp-1") is None
+    assert SemanticIndex.load(records[:50], path, embed.model, "fp-2") is None
+
+    # A catalog's own text is its nearest neighbour, also when restricted to a row subset
+    query = embed.embed_fn([property_text(records[7])])[0]
+    assert loaded.top_k(query, k=1)[0][0] == 7
+    assert [row for row, _score in loaded.top_k(query, rows=[3, 7, 9], k=3)][0] == 7
+
+
+def test_rebuild_writes_a_new_matrix_and_keeps_mapped_readers_valid(records, tmp_path):
+    path = str(tmp_path / "properties.json")
+    embed = CountingEmbedder()
+    old = SemanticIndex.build(records[:40], path, embed, embed.model, "fp-1")
+    old_rows = np.array(old.matrix[:5])
+    old_file = _meta(path)["matrix"]
+
+    changed = [dict(p, description="Sea facing with a private pool") if i < 3 else p for i, p in enumerate(records[:40])]
+    SemanticIndex.build(changed, path, embed, embed.model, "fp-2")
+
+    new_file = _meta(path)["matrix"]
+    assert new_file != old_file
+    assert not os.path.exists(tmp_path / old_file)
+    assert sorted(n for n in os.listdir(tmp_path) if n.endswith(".npy")) == [new_file]
+    # The old mapping still reads the old vectors after its file was replaced
+    assert np.array_equal(np.array(old.matrix[:5]), old_rows)
+    # Only the edited listings were embedded again
+    distinct = {property_text(p) for p in records[:40]}
+    assert embed.texts == len(distinct) + len({property_text(p) for p in changed[:3]})
+
+
+def test_concurrent_builds_embed_once(records, tmp_path):
+    path = str(tmp_path / "properties.json")
+    embed = CountingEmbedder()
+    built = []
+
+    def build():
+        built.append(SemanticIndex.build(records[:60], path, embed, embed.model, "fp-1"))
+
+    threads = [threading.Thread(target=build) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert embed.texts == len({property_text(p) for p in records[:60]})
+    assert len(built) == 4 and all(b.matrix.shape == (60, built[0].matrix.shape[1]) for b in built)
+
+
+def test_snapshot_has_no_semantic_hits_until_built(snapshot):
+    embedder = get_embedder("local")
+    query = embedder[0](["clubhouse near the lake"])[0]
+    bare = snapshot.with_semantic(None)
+    assert not bare.semantic_ready(embedder[1])
+    assert bare.semantic_hits(query, embedder, location="thane") == []
+
+    semantic = SemanticIndex.build(snapshot.properties, snapshot.data_path, embedder[0], embedder[1], snapshot.fingerprint)
+    ready = snapshot.with_semantic(semantic)
+    hits = ready.semantic_hits(query, embedder, location="thane")
+    assert hits and all("thane" in (p["city"] + p["location"]).lower() for p, _score in hits)
@@ -0,0 +1,162 @@
+import os
+import time
+
+import pytest
+
+from app.rag.delta import LiveCatalog
+from app.rag.embedder import get_embedder
+from app.rag.semantic import property_text
+from app.rag.shards import city_slug, open_sharded
+from conftest import build_snapshot, walk_pages, write_catalog
+
+QUERIES = [
+    {},
+    {"location": "thane"},
+    {"location": "mumbai", "bhk": "3"},
+    {"max_price": 12000000},
+    {"location": "Yeoor Hills", "max_price": 20000000, "bhk": "2"},
+    {"location": "pune"},
+    {"location": "thane", "bhk": "5"},
+]
+FACETS = {"possession": ["Ready to Move"]}
+
+
+def _ids(records):
+    return [str(p["id"]) for p in records]
+
+
+@pytest.fixture(scope="module")
+def sharded(records, tmp_path_factory):
+    return open_sharded(write_catalog(tmp_path_factory.mktemp("sharded"), records))
+
+
+@pytest.fixture(scope="module")
+def changes(records):
+    """Deletes every third of the first 40 listings, discounts the rest, adds one listing."""
+    changes = {}
+    for i, record in enumerate(records[:40]):
+        changes[str(record["id"])] = None if i % 3 == 0 else dict(record, price=int((record.get("price") or 9000000) * 0.7))
+    changes["new-1"] = dict(records[5], id="new-1", price=4000000)
+    return changes
+
+
+@pytest.fixture(scope="module")
+def live(snapshot, changes):
+    return LiveCatalog(snapshot, changes)
+
+
+@pytest.fixture(scope="module")
+def compacted(records, changes, tmp_path_factory):
+    """Single snapshot of the catalog the live overlay should be equivalent to."""
+    after = [p for p in records if str(p["id"]) not in changes] + [r for r in changes.values() if r is not None]
+    return build_snapshot(tmp_path_factory.mktemp("compacted"), after)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_sharded_matches_single_snapshot(sharded, snapshot, query):
+    assert walk_pages(sharded, **query) == walk_pages(snapshot, **query)
+    assert sharded.faceted_search(facets=FACETS, **query) == snapshot.faceted_search(facets=FACETS, **query)
+    assert _ids(sharded.search(**query)) == _ids(snapshot.search(**query))
+
+    relaxed, expected = sharded.relaxed_search(k=5, **query), snapshot.relaxed_search(k=5, **query)
+    assert (relaxed["relaxation"], relaxed["total"]) == (expected["relaxation"], expected["total"])
+    assert _ids(relaxed["results"]) == _ids(expected["results"])
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_live_overlay_matches_compacted_snapshot(live, compacted, query):
+    assert walk_pages(live, **query) == walk_pages(compacted, **query)
+    found, expected = live.faceted_search(facets=FACETS, **query), compacted.faceted_search(facets=FACETS, **query)
+    assert (found["total"], found["facets"]) == (expected["total"], expected["facets"])
+
+    relaxed, expected = live.relaxed_search(k=5, **query), compacted.relaxed_search(k=5, **query)
+    assert (relaxed["relaxation"], relaxed["total"]) == (expected["relaxation"], expected["total"])
+
+    # The overlay's "value" ranking feature only sees the overlay, so ranked
+    # results may differ in order - but never in what is allowed to match
+    matches, total = walk_pages(compacted, **query)
+    ranked = _ids(live.search(**query))
+    assert set(ranked) <= set(matches)
+    assert len(ranked) == min(5, total)
+
+
+def test_live_overlay_hides_deleted_and_serves_changed_listings(live, changes):
+    for property_id, record in changes.items():
+        found = live.get_by_id(property_id)
+        if record is None:
+            assert found is None
+        else:
+            assert found["price"] == record["price"]
+    assert len(live) == len(live.properties)
+
+
+def test_sharded_without_hides_tombstoned_ids(sharded, snapshot):
+    hidden = {str(p["id"]) for p in snapshot.search(location="thane")}
+    masked = sharded.without(hidden)
+    ids, total = walk_pages(masked, location="thane")
+    assert not hidden & set(ids)
+    assert total == walk_pages(snapshot, location="thane")[1] - len(hidden)
+
+
+class CountingEmbedder:
+    """Local embedder that records every text it embeds."""
+
+    def __init__(self):
+        self.embed_fn, self.model = get_embedder("local")
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts += texts
+        return self.embed_fn(texts)
+
+
+def _wait_embedded(catalog, slug, model, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if catalog._shard(slug).semantic_ready(model) and not catalog._embedding:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"shard {slug} was not embedded within {timeout}s")
+
+
+def test_shard_embeddings_survive_a_recompile(records, tmp_path):
+    embed = CountingEmbedder()
+    embedder = (embed, embed.model)
+    path = write_catalog(tmp_path, records)
+    catalog = open_sharded(path, embedder=embedder)
+    slug = city_slug(records[0]["city"])
+
+    assert not catalog.semantic_ready(embed.model)
+    catalog.get_by_id(str(records[0]["id"]))  # loads the city, which starts its embedding
+    _wait_embedded(catalog, slug, embed.model)
+    assert catalog.semantic_ready(embed.model)
+    first = len(embed.texts)
+
+    edited = [dict(p, description="Sea facing duplex") if i == 0 else p for i, p in enumerate(records)]
+    reopened = open_sharded(write_catalog(tmp_path, edited), embedder=embedder)
+    assert reopened.directory != catalog.directory and not os.path.exists(catalog.directory)
+    reopened.get_by_id(str(records[0]["id"]))
+    _wait_embedded(reopened, slug, embed.model)
+
+    # Only the edited listing was embedded again
+    assert first > 0 and embed.texts[first:] == [property_text(edited[0])]
+    query = property_text(edited[0])
+    assert str(reopened.semantic_search(query, embedder, k=1)[0]["id"]) == str(records[0]["id"])
+
+
+def test_semantic_search_skips_the_query_embedding_until_a_city_is_embedded(sharded):
+    calls = []
+
+    def failing_embed(texts):
+        calls.append(list(texts))
+        raise RuntimeError("embedder unavailable")
+
+    embedder = (failing_embed, "never-built")
+    assert not sharded.semantic_ready("never-built")
+    assert sharded.semantic_search("clubhouse", embedder, location="thane") == []
+    for _ in range(500):
+        if not sharded._embedding:
+            break
+        time.sleep(0.01)
+    # Only the background city build called the embedder, never for the query
+    assert ["clubhouse"] not in calls
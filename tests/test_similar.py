@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from app.rag.catalog import InMemoryCatalog
+from app.rag.similar import SimilarIndex, _similarity, feature_matrix
+
+
+@pytest.fixture(scope="module")
+def catalog(records):
+    return InMemoryCatalog(records[:120])
+
+
+def _brute_force(catalog, k):
+    """{id: [(neighbor id, score)]} by comparing every pair in the same city."""
+    matrix = feature_matrix(catalog).astype(np.float64)
+    ids, cities = list(catalog.strings("id")), [c.lower() for c in catalog.strings("city")]
+    out = {}
+    for i, property_id in enumerate(ids):
+        scored = [
+            (ids[j], _similarity(-float(((matrix[i] - matrix[j]) ** 2).sum())))
+            for j in range(len(ids)) if j != i and cities[j] == cities[i]
+        ]
+        out[property_id] = sorted(scored, key=lambda item: -item[1])[:k]
+    return out
+
+
+def _scores(lists):
+    return {property_id: [s for _n, s in neighbors] for property_id, neighbors in lists.items()}
+
+
+def assert_same_scores(a, b):
+    """Same ids, same score sequence per id (up to float32 rounding); tied neighbors may swap."""
+    a, b = _scores(a), _scores(b)
+    assert a.keys() == b.keys()
+    for property_id in a:
+        assert np.allclose(a[property_id], b[property_id], atol=2e-3), property_id
+
+
+def _lists(index):
+    return {property_id: neighbors for property_id, (_key, neighbors) in index.lists().items()}
+
+
+def test_neighbors_are_the_closest_listings_in_the_same_city(catalog):
+    index, stats = SimilarIndex.build(catalog, k=5)
+    expected = _brute_force(catalog, 5)
+    assert stats["recomputed"] == len(catalog)
+    assert_same_scores(_lists(index), expected)
+    city = dict(zip(catalog.strings("id"), catalog.strings("city")))
+    assert all(city[n] == city[i] for i, (_key, neighbors) in index.lists().items() for n, _s in neighbors)
+
+
+def test_incremental_build_matches_a_full_build(catalog, records):
+    first, _ = SimilarIndex.build(catalog, k=5)
+    edited = [dict(p, price=p["price"] * 3) if i in (4, 50) else p for i, p in enumerate(records[:120])]
+    edited = [p for i, p in enumerate(edited) if i != 7] + [dict(records[130], id="new-1")]
+    changed = InMemoryCatalog(edited)
+
+    incremental, stats = SimilarIndex.build(changed, k=5, previous=first.lists())
+    full, _ = SimilarIndex.build(changed, k=5)
+
+    assert stats["recomputed"] < len(changed)
+    assert_same_scores(_lists(incremental), _lists(full))
+
+
+def test_save_and_load_round_trip(catalog, tmp_path):
+    index, _ = SimilarIndex.build(catalog, k=4)
+    path = str(tmp_path / "properties.json")
+    index.save(path, {"catalog_fingerprint": "fp"})
+
+    meta, loaded = SimilarIndex.load(path)
+    assert meta["catalog_fingerprint"] == "fp" and meta["k"] == 4
+    assert loaded.lists() == index.lists()
+    assert SimilarIndex.load_or_build(catalog, path, fingerprint="fp", k=4).lists() == index.lists()
+
+
+def test_unknown_ids_have_no_neighbors(catalog):
+    index, _ = SimilarIndex.build(catalog, k=3)
+    assert index.similar("no-such-id") == []
+    assert len(index.similar(catalog.strings("id")[0], limit=2)) == 2
+
+
+def test_snapshot_hides_deleted_neighbors(snapshot):
+    property_id = str(snapshot.properties[0]["id"])
+    neighbors = [p["id"] for p, _score in snapshot.similar_properties(property_id, limit=5)]
+    live = snapshot.without([neighbors[0]])
+
+    assert neighbors[0] not in [p["id"] for p, _score in live.similar_properties(property_id, limit=5)]
+    assert len(live.similar_properties(property_id, limit=5)) == 5
+    assert live.similar_properties(neighbors[0]) == []
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from app.conversation.slots import (INTENT_TRIGGERS, SAMPLE_TURNS, KeywordAutomaton, _keywords, extract_bhk,
+                                    extract_budget, extract_email, extract_lead_info, extract_name, scan)
+
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton([("he", 1), ("she", 2), ("his", 3), ("hers", 4)])
+    assert automaton.find("ushers") == {1, 2, 4}
+    assert automaton.find("") == set()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_automaton_matches_substring_search(seed):
+    keywords = list(_keywords())
+    automaton = KeywordAutomaton(keywords)
+    rng = random.Random(seed)
+    words = [k for k, _ in keywords] + ["flat", "near", "i", "want", "weekend", "xyz", "blrr"]
+    for _ in range(50):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 8)))
+        assert automaton.find(text) == {payload for keyword, payload in keywords if keyword in text}
+
+
+def test_keywords_keep_substring_semantics():
+    assert "end" in scan("see you at the weekend").intents
+    assert {"more", "show"} <= scan("Show more options").intents
+
+
+@pytest.mark.parametrize("text, city", [
+    ("property in Bengaluru please", "Bangalore"),
+    ("thane or mumbai", "Mumbai"),  # earlier alias wins
+    ("any more options in mumbay?", "Mumbai"),
+    ("somewhere near whitefeild", "Whitefield"),
+    ("just browsing", None),
+])
+def test_city_detection(text, city):
+    assert scan(text).city == city
+
+
+@pytest.mark.parametrize("text, name", [
+    ("My name is rahul", "Rahul"),
+    ("Priya", "Priya"),
+    ("I am looking for a flat", None),
+    ("thanks", None),
+])
+def test_extract_name(text, name):
+    assert extract_name(scan(text)) == name
+
+
+def test_extract_contact_and_search_slots():
+    s = scan("I want a 2bhk under 1.5 cr, mail rahul.s@gmail.com.")
+    assert extract_email(s) == "rahul.s@gmail.com"
+    assert extract_bhk(s) == "2 BHK"
+    assert extract_budget(s) == "1.5 crore"
+    assert extract_budget(scan("around 80 lakh")) == "80 lakh"
+    assert (extract_email(scan("no email")), extract_bhk(scan("a big flat")), extract_budget(scan("cheap"))) == (None, None, None)
+    assert scan("call 98765-43210").digits == "9876543210"
+
+
+def test_extract_lead_info_from_a_whole_transcript():
+    info = extract_lead_info(" ".join(SAMPLE_TURNS[1:]))
+    assert info == {
+        "fullName": "Rahul",
+        "emailAddress": "rahul.sharma@gmail.com",
+        "mobileNumber": "9876543210",
+        "city": "Thane",  # earlier LEAD_LOCATIONS city wins over "mumbay"
+        "budget": "1.5 crore",
+        "configuration": "2 BHK",
+    }
+    assert extract_lead_info("hello") == dict.fromkeys(info)
+
+
+def test_every_trigger_is_reported_as_its_intent():
+    for intent, triggers in INTENT_TRIGGERS.items():
+        for trigger in triggers:
+            assert intent in scan(f"well {trigger} then").intents